@@ -0,0 +1,88 @@
+import os
+import sys
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import geometryKernel as gk
+
+####
+# Micro-benchmark of the geometry kernel.
+# Times the vector arithmetic of one ARC bend in mission.draw (two unity vectors, the tangent and normal vectors, the
+# inset, the rotations and the turn test) done three ways:
+# - numpy 2-vectors through np.dot/np.linalg.norm, as the old vectorFunctions module did it,
+# - the kernel's scalar backend on tuples (what mission.draw uses),
+# - the kernel's array backend on a batch of bends at once.
+# Then the points of a line group (missionState.draw) with offsetPoints, from a list of offsets and from an array.
+# Usage: python Benchmarks/bendBenchmark.py [number of repeats]
+
+rotateCW90matrix = np.array([[0.0, -1.0], [1.0, 0.0]])
+rotateCW270matrix = np.array([[0.0, 1.0], [-1.0, 0.0]])
+
+
+# The bend arithmetic as it was done with vectorFunctions.
+def numpyBend(lastVector, currentVector, width):
+    lastUnityVector = lastVector / np.linalg.norm(lastVector)
+    currentUnityVector = currentVector / np.linalg.norm(currentVector)
+    tangentVector = lastUnityVector + currentUnityVector
+    normalVector = currentUnityVector - lastUnityVector
+    inset = (width / 2) * (np.linalg.norm(normalVector) / np.linalg.norm(tangentVector))
+    lineGroupCentre1 = lastVector + lastUnityVector * (-1 * inset)
+    lineGroupCentre2 = lastVector + currentUnityVector * inset
+    lastUnityVector = np.dot(lastUnityVector, rotateCW270matrix)
+    turnTest = np.dot(lastUnityVector, currentUnityVector)
+    currentUnityVector = np.dot(currentUnityVector, rotateCW270matrix)
+    slip = inset > np.linalg.norm(currentVector)
+    return lineGroupCentre1, lineGroupCentre2, currentUnityVector, turnTest, slip
+
+
+# The same bend through the kernel, for either form of vector.
+def kernelBend(lastVector, currentVector, width):
+    lastUnityVector = gk.unity(lastVector)
+    currentUnityVector = gk.unity(currentVector)
+    tangentVector = gk.add(lastUnityVector, currentUnityVector)
+    normalVector = gk.subtract(currentUnityVector, lastUnityVector)
+    inset = (width / 2) * (gk.eDist(normalVector) / gk.eDist(tangentVector))
+    lineGroupCentre1 = gk.add(lastVector, gk.scale(lastUnityVector, -1 * inset))
+    lineGroupCentre2 = gk.add(lastVector, gk.scale(currentUnityVector, inset))
+    lastUnityVector = gk.rotCW270(lastUnityVector)
+    turnTest = gk.dot(lastUnityVector, currentUnityVector)
+    currentUnityVector = gk.rotCW270(currentUnityVector)
+    slip = inset > gk.eDist(currentVector)
+    return lineGroupCentre1, lineGroupCentre2, currentUnityVector, turnTest, slip
+
+
+# Seconds per call of fn(*args), best of a few runs.
+def perCall(fn, args, repeats):
+    return min(timeit.repeat(lambda: fn(*args), number=repeats, repeat=5)) / repeats
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lastVector = (40.0, 0.0)
+    currentVector = (30.0, -25.0)
+    width = 12.0
+
+    batchSize = 1000
+    numpyTime = perCall(numpyBend, (np.array(lastVector), np.array(currentVector), width), repeats)
+    scalarTime = perCall(kernelBend, (lastVector, currentVector, width), repeats)
+    batchTime = perCall(kernelBend, (np.tile(lastVector, (batchSize, 1)), np.tile(currentVector, (batchSize, 1)), width),
+                        max(1, repeats // batchSize)) / batchSize
+    print("Per bend:")
+    print("  numpy 2-vectors (vectorFunctions): %7.2f us" % (numpyTime * 1e6))
+    print("  kernel, scalar backend:            %7.2f us  (%.1fx faster)" % (scalarTime * 1e6, numpyTime / scalarTime))
+    print("  kernel, array backend, %d at once: %7.2f us" % (batchSize, batchTime * 1e6))
+
+    start = (100.0, 50.0)
+    direction = gk.unity(currentVector)
+    for groupSize in (4, 30):
+        offsets = [2.0 * i for i in range(1, groupSize + 1)]
+        listTime = perCall(gk.offsetPoints, (start, direction, offsets), repeats)
+        arrayTime = perCall(gk.offsetPoints, (start, direction, np.array(offsets)), repeats)
+        print("Per line group of " + str(groupSize) + " points:")
+        print("  offsetPoints, list of offsets:     %7.2f us" % (listTime * 1e6))
+        print("  offsetPoints, array of offsets:    %7.2f us" % (arrayTime * 1e6))
+
+
+if __name__ == "__main__":
+    main()
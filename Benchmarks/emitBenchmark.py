@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import eventSources as es
+import eventProcessor as ep
+import layoutTable as lt
+import pageWriter as pw
+
+####
+# Benchmark of the two phases of the layout.
+# Lays an event list out once (timing the layout phase), then emits the layout table into fresh copies of the layers:
+# all the layers in this process, and each layer in a process of its own.
+# Usage: python Benchmarks/emitBenchmark.py [event list] [craft list]
+
+
+# Best time of a few runs of fn().
+def bestTime(fn, runs=5):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    eventListFile = sys.argv[1] if len(sys.argv) > 1 else "Data/eventList.xml"
+    craftListFile = sys.argv[2] if len(sys.argv) > 2 else "Data/craftList.xml"
+    table, sourceCraft = es.loadCachedSources(eventListFile, craftListFile)
+    records = list(table.records())
+
+    processors = []
+
+    def layout():
+        processor = ep.eventProcessor(records[0][0], 10, pw.dateLabelLayer(), pw.groupLayer(), pw.groupLayer(),
+                                      pw.skeletonCollection(), sourceCraft)
+        processor.process(records)
+        processors.append(processor)
+
+    layoutTime = bestTime(layout)
+    layoutTable = processors[-1].layout
+    print("Layout:                         %7.3fs  (%d rows, %d states, %d components)"
+          % (layoutTime, len(layoutTable), len(layoutTable.statePanels), len(layoutTable.componentNames)))
+
+    for workers, label in ((0, "Emission:"), (len(layoutTable.layers), "Emission (a process per layer):")):
+        def emit():
+            layers = [lt.emptyLayerLike(layer) for layer in layoutTable.layers]
+            lt.emitter(layoutTable, layers).emit(workers=workers)
+
+        print("%-32s%7.3fs" % (label, bestTime(emit)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import timeit
+import numpy as np
+
+####
+# Micro-benchmark of drawing the points of a mission state's line group (missionState.draw).
+# The points and arc radii of a group are worked out three ways:
+# - one numpy 2-vector operation per line, as the old lineOffset records did it,
+# - one numpy operation for the whole group, from an array of the offsets (an outer product),
+# - plain float arithmetic on a list of the offsets, with the group vectors taken apart once (what missionState uses).
+# A group has one line per craft and traveler of a mission, from 1 up to about 30.
+# Usage: python Benchmarks/lineGroupBenchmark.py [number of repeats]
+
+
+# One numpy operation per line of the group.
+def perLine(LGStart, LGV, offsets, scaleFactor, width):
+    out = []
+    for offset in offsets:
+        pointVector = LGV * offset
+        pointVector += LGStart
+        out.append((pointVector[0], pointVector[1], width - offset * scaleFactor))
+    return out
+
+
+# The whole group in one numpy operation.
+def batched(LGStart, LGV, offsets, scaleFactor, width):
+    points = np.multiply.outer(offsets, LGV)
+    points += LGStart
+    radii = (width - offsets * scaleFactor).tolist()
+    return [(x, y, radius) for (x, y), radius in zip(points.tolist(), radii)]
+
+
+# Plain floats from a list of offsets.
+def floats(LGStart, LGV, offsets, scaleFactor, width):
+    startX, startY = LGStart.tolist()
+    dx, dy = LGV.tolist()
+    points = [(startX + dx * offset, startY + dy * offset) for offset in offsets]
+    radii = [width - offset * scaleFactor for offset in offsets]
+    return [(x, y, radius) for (x, y), radius in zip(points, radii)]
+
+
+# Seconds per call of fn(*args), best of a few runs.
+def perCall(fn, args, repeats):
+    return min(timeit.repeat(lambda: fn(*args), number=repeats, repeat=5)) / repeats
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    LGStart = np.array([100.0, 50.0])
+    LGV = np.array([0.6, -0.8])
+    scaleFactor = float(np.linalg.norm(LGV))
+    for groupSize in (1, 4, 12, 30):
+        offsets = [2.0 * i + 1.0 for i in range(groupSize)]
+        width = 2.0 * groupSize
+        arrayOffsets = np.array(offsets)
+        # All three give the same numbers.
+        reference = floats(LGStart, LGV, offsets, scaleFactor, width)
+        same = (batched(LGStart, LGV, arrayOffsets, scaleFactor, width) == reference and
+                [tuple(float(v) for v in p) for p in perLine(LGStart, LGV, offsets, scaleFactor, width)] == reference)
+        perLineTime = perCall(perLine, (LGStart, LGV, offsets, scaleFactor, width), repeats)
+        batchedTime = perCall(batched, (LGStart, LGV, arrayOffsets, scaleFactor, width), repeats)
+        floatsTime = perCall(floats, (LGStart, LGV, offsets, scaleFactor, width), repeats)
+        print("Per line group of " + str(groupSize) + " lines (same results: " + str(same) + "):")
+        print("  numpy operation per line:        %7.2f us" % (perLineTime * 1e6))
+        print("  numpy operation per group:       %7.2f us" % (batchedTime * 1e6))
+        print("  floats from a list of offsets:   %7.2f us" % (floatsTime * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import eventProcessor as ep
+import layoutTable as lt
+import pageWriter as pw
+import spaceflight as sf
+import syntheticHistory as sh
+
+####
+# Memory benchmark of the model classes.
+# - The size of each kind of model object: the object itself (with its attribute dict, if it has one), and everything
+#   allocated in making one (its lists, its group on the layer, its row in the layout table...), averaged over many.
+# - The peak memory of laying out a synthetic history (see syntheticHistory), and what the model objects still alive at
+#   the end of it take up. The lines are drawn at the end of the layout, or every retire window events in bounded memory
+#   mode (see eventProcessor.retire).
+# Usage: python Benchmarks/memoryBenchmark.py [history size in events] [missions in LEO] [retire window]
+
+
+# The size of an object and its attribute dict.
+def objectSize(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+# Average object size, and memory allocated per object, of count objects made by make(i).
+def perObject(make, count=20000):
+    objects = [None] * count
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        objects[i] = make(i)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return objectSize(objects[0]), allocated / count
+
+
+def main():
+    eventCount = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = sh.defaultConcurrency()
+    if len(sys.argv) > 2:
+        concurrency["LEO"] = int(sys.argv[2])
+    retireWindow = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    skeletons = pw.skeletonCollection()
+    table = lt.layoutTable()
+    craftLayer = pw.groupLayer()
+    travelerLayer = pw.groupLayer()
+    date = datetime(2000, 1, 1)
+    crewedMission = sf.mission("Crewed", table, skeletons)
+    crewedMission.addCraft(sf.craft("Craft", craftLayer, 21, 120))
+    crewedMission.addTraveler(sf.traveler("Traveler_1", travelerLayer))
+    crewedMission.addTraveler(sf.traveler("Traveler_2", travelerLayer))
+    makers = (("mission", lambda i: sf.mission("Mission_" + str(i), table, skeletons)),
+              ("missionState", lambda i: sf.missionState(crewedMission)),
+              ("craft", lambda i: sf.craft("Craft_" + str(i), craftLayer, 21, 120)),
+              ("traveler", lambda i: sf.traveler("Traveler_" + str(i), travelerLayer)),
+              ("skeleton", lambda i: sf.skeleton(crewedMission, date)),
+              ("transfer", lambda i: sf.transfer(None, None)),
+              ("slotNode", lambda i: sf.slotNode(None, 0.5)))
+    print("%-14s %8s %12s" % ("Per object", "Object", "Allocated"))
+    for name, make in makers:
+        size, allocated = perObject(make)
+        print("%-14s %7dB %11.0fB" % (name, size, allocated))
+
+    generator = sh.historyGenerator(eventCount, concurrency)
+    records = list(generator.records())
+    del makers, crewedMission, table, craftLayer, travelerLayer, skeletons
+    gc.collect()
+    tracemalloc.start()
+    processor = ep.eventProcessor(records[0][0], 10, pw.dateLabelLayer(), pw.groupLayer(), pw.groupLayer(),
+                                  pw.skeletonCollection(), generator.craftRecords, retireWindow)
+    processor.process(records)
+    processor.emit()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print()
+    print("Layout of %d events (%d missions in LEO, retire window %s): peak %.1fMB, %.1fMB at the end"
+          % (len(records), concurrency["LEO"], retireWindow, peak / 2 ** 20, current / 2 ** 20))
+    modelClasses = (sf.mission, sf.missionState, sf.craft, sf.traveler, sf.skeleton, sf.transfer, sf.slotNode)
+    counts = {c: [0, 0] for c in modelClasses}
+    gc.collect()
+    for obj in gc.get_objects():
+        if type(obj) in counts:
+            counts[type(obj)][0] += 1
+            counts[type(obj)][1] += objectSize(obj)
+    print("%-14s %8s %10s" % ("Alive at end", "Objects", "Size"))
+    for c in modelClasses:
+        print("%-14s %8d %9.1fkB" % (c.__name__, counts[c][0], counts[c][1] / 1024))
+
+
+if __name__ == "__main__":
+    main()
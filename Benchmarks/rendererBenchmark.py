@@ -0,0 +1,95 @@
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import renderer as rd
+import syntheticHistory as sh
+
+####
+# Benchmark of rendering many timelines in one warm process.
+# A few synthetic histories (see syntheticHistory) are each rendered:
+# - cold: in a python process of their own, the way SFTL-main.py is run, interpreter and imports and all,
+# - warm: one after another by a renderer in this process,
+# - concurrently: each in a thread of its own, all at the same time, by the same renderer.
+# The pages rendered concurrently are checked to be byte for byte the same as those rendered one after another.
+# Usage: python Benchmarks/rendererBenchmark.py [--histories 4] [--events 2000] [--compact]
+
+packageDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cold, warm and concurrent renders of synthetic histories.")
+    parser.add_argument("--histories", type=int, default=4, help="number of histories to render (default 4)")
+    parser.add_argument("--events", type=int, default=2000, help="events in each history (default 2000)")
+    parser.add_argument("--compact", action="store_true", help="write the pages in the compact format")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        sources = []
+        for i in range(args.histories):
+            generator = sh.historyGenerator(args.events, seed=i)
+            eventListFile = os.path.join(tempDir, "events" + str(i) + ".xml")
+            craftListFile = os.path.join(tempDir, "craft" + str(i) + ".xml")
+            sh.writeXmlEvents(eventListFile, generator.records())
+            sh.writeXmlCraftList(craftListFile, generator.craftRecords)
+            sources.append((eventListFile, craftListFile))
+
+        def outputDir(kind, i):
+            path = os.path.join(tempDir, kind + str(i))
+            os.makedirs(path, exist_ok=True)
+            return path
+
+        # The source caches are written by the first render of each history, so they're there for all of them.
+        timelineRenderer = rd.renderer(compactOutput=args.compact)
+        for i, (eventListFile, craftListFile) in enumerate(sources):
+            timelineRenderer.render(eventListFile, craftListFile, outputDir("warmup", i))
+
+        start = time.perf_counter()
+        for i, (eventListFile, craftListFile) in enumerate(sources):
+            script = ("import renderer as rd\n"
+                      "rd.renderer(compactOutput=" + str(args.compact) + ").render(" + repr(eventListFile) + ", " +
+                      repr(craftListFile) + ", " + repr(outputDir("cold", i)) + ")\n")
+            subprocess.run([sys.executable, "-c", script], cwd=packageDir, check=True)
+        coldTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i, (eventListFile, craftListFile) in enumerate(sources):
+            timelineRenderer.render(eventListFile, craftListFile, outputDir("warm", i))
+        warmTime = time.perf_counter() - start
+
+        errors = []
+
+        def renderInThread(i):
+            try:
+                timelineRenderer.render(sources[i][0], sources[i][1], outputDir("concurrent", i))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=renderInThread, args=(i,)) for i in range(len(sources))]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        concurrentTime = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+
+        same = all(filecmp.cmp(os.path.join(outputDir("warm", i), "SpaceFlightTimeLine.html"),
+                               os.path.join(outputDir(kind, i), "SpaceFlightTimeLine.html"), shallow=False)
+                   for i in range(len(sources)) for kind in ("cold", "concurrent"))
+        print("%d histories of %d events" % (len(sources), args.events))
+        print("%-12s %8.3fs  (%.3fs a render)" % ("Cold", coldTime, coldTime / len(sources)))
+        print("%-12s %8.3fs  (%.3fs a render)" % ("Warm", warmTime, warmTime / len(sources)))
+        print("%-12s %8.3fs  (%d threads)" % ("Concurrent", concurrentTime, len(sources)))
+        print("Pages the same whichever way they were rendered: " + str(same))
+
+
+if __name__ == "__main__":
+    main()
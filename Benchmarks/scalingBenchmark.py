@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import eventSources as es
+import eventProcessor as ep
+import pageWriter as pw
+import syntheticHistory as sh
+
+####
+# Scaling benchmark of the whole pipeline.
+# For each history size a synthetic history is generated (see syntheticHistory) and written out as an event list and
+# craft list, then put through the same steps as SFTL-main.py, each of them timed:
+# - parse: reading the event list into event records, and the craft list,
+# - layout: the event processor laying the missions out (processor.process),
+# - draw: drawing the craft and traveler lines (processor.emit),
+# - write: writing the page out.
+# The whole thing is then run again with tracemalloc on to get the peak memory of each phase (the most allocated at any
+# point during it, including what's still held from the phases before). This is a separate run because tracing slows
+# everything down, and not by the same amount in each phase.
+# Usage: python Benchmarks/scalingBenchmark.py [sizes...] [--tsv] [--concurrency LEO=300 ...] [--rendezvous 0.5]
+#        [--no-memory] [--keep DIR]
+
+phases = ("parse", "layout", "draw", "write")
+dayWidth = 10
+
+
+# Write the page the way SFTL-main.py does with its default settings (a single svg).
+def writePage(fileName, processor):
+    svgWidth = round(processor.xPos + dayWidth * 2, 1)
+    backgroundLayer = pw.elementLayer()
+    for orbit in processor.orbitList:
+        orbit.drawOrbitRectangle(backgroundLayer, 0, svgWidth)
+    with open(fileName, "w") as outFile:
+        page = pw.xmlStream(outFile)
+        page.declaration()
+        page.start("html")
+        page.start("head")
+        processor.skeletons.write(page, [processor.craftLayer, processor.travelerLayer])
+        page.end()
+        page.start("body")
+        page.start("SVG", [("xmlns", "http://www.w3.org/2000/svg"), ("width", str(svgWidth)), ("height", "600")])
+        backgroundLayer.write(page)
+        processor.gridLinesLayer.write(page)
+        processor.craftLayer.write(page)
+        processor.travelerLayer.write(page)
+        page.end()
+        page.end()
+        page.end()
+
+
+# Run the pipeline on an event list and craft list. Returns the time (and, with traceMemory, the peak traced memory)
+# of each phase.
+def runPipeline(eventListFile, craftListFile, pageFile, traceMemory):
+    results = {}
+    state = {}
+
+    def parse():
+        state["records"] = list(es.openEventSource(eventListFile))
+        state["craft"] = es.readXmlCraftList(craftListFile)
+
+    def layout():
+        processor = ep.eventProcessor(state["records"][0][0], dayWidth, pw.dateLabelLayer([("id", "gridLinesLayer")]),
+                                      pw.groupLayer([("id", "craftLayer")]), pw.groupLayer([("id", "travelerLayer")]),
+                                      pw.skeletonCollection(), state["craft"])
+        processor.process(state["records"])
+        state["processor"] = processor
+
+    def draw():
+        state["processor"].emit()
+
+    def write():
+        writePage(pageFile, state["processor"])
+
+    if traceMemory:
+        tracemalloc.start()
+    for name, phase in zip(phases, (parse, layout, draw, write)):
+        if traceMemory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        phase()
+        elapsed = time.perf_counter() - start
+        results[name] = (elapsed, tracemalloc.get_traced_memory()[1] if traceMemory else None)
+    if traceMemory:
+        tracemalloc.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the pipeline on synthetic histories of increasing size.")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000],
+                        help="history sizes in events (default 1000 10000 100000)")
+    parser.add_argument("--tsv", action="store_true", help="write the event lists tab-separated rather than as xml")
+    parser.add_argument("--concurrency", nargs="*", default=[], metavar="ORBIT=N",
+                        help="missions to keep in an orbit (the rest stay at their defaults)")
+    parser.add_argument("--rendezvous", type=float, default=0.5, help="rendezvous density (default 0.5)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--keep", metavar="DIR", help="write the generated files and pages here and keep them")
+    args = parser.parse_args()
+
+    concurrency = sh.defaultConcurrency()
+    for setting in args.concurrency:
+        orbitName, count = setting.split("=")
+        concurrency[orbitName] = int(count)
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        outDir = args.keep or tempDir
+        os.makedirs(outDir, exist_ok=True)
+        print("%10s  %-8s %9s %11s" % ("Events", "Phase", "Time", "Peak memory"))
+        for size in args.sizes:
+            eventListFile = os.path.join(outDir, "events" + str(size) + (".tsv" if args.tsv else ".xml"))
+            craftListFile = os.path.join(outDir, "craft" + str(size) + ".xml")
+            pageFile = os.path.join(outDir, "page" + str(size) + ".html")
+            generator = sh.historyGenerator(size, concurrency, args.rendezvous)
+            if args.tsv:
+                sh.writeTsvEvents(eventListFile, generator.records())
+            else:
+                sh.writeXmlEvents(eventListFile, generator.records())
+            sh.writeXmlCraftList(craftListFile, generator.craftRecords)
+
+            timings = runPipeline(eventListFile, craftListFile, pageFile, False)
+            memory = None if args.no_memory else runPipeline(eventListFile, craftListFile, pageFile, True)
+            for phase in phases:
+                peak = "%9.1fMB" % (memory[phase][1] / 2 ** 20) if memory else "%11s" % "-"
+                print("%10d  %-8s %8.3fs %s" % (size, phase, timings[phase][0], peak))
+            print("%10d  %-8s %8.3fs   (page %.1fMB)" % (size, "total", sum(t for t, _ in timings.values()),
+                                                         os.path.getsize(pageFile) / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
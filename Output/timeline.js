@@ -1,10 +1,73 @@
 // Globals
-var skeletonList = [];
+var missionStates = null;		// The mission detail skeletons, parsed from the page the first time one is needed (see getSkeleton)
+var skeletons = {};			// Panel id to the skeleton objects made so far
+var writtenSkeletons = [];		// The skeletons that have had their detail panels written into the document
+// Tiled pages: the timeline is cut into tiles that are fetched as they're scrolled into view (see loadVisibleTiles)
+var tileArea = null;
+var tilesRequested = [];
+// Levels of detail: the full timeline is level 0, the overviews scaled down across by levelScales[1], [2]... follow (see showLevel)
+var overviewArea = null;
+var levelScales = [1];
+var level = 0;
+var overviews = [];
+// Canvas pages: the craft and traveler lines are drawn on a canvas from binary geometry (see loadGeometry)
+var canvasArea = null;
+var geometry = null;
+var highlightedComponent = null;
+var canvasDrawPending = false;
 
-// Callback functions for array methods
-// Callback function to compare an object using its "mission" attribute
-function comparePanelId(obj){
-	return obj.panelId == this;
+// Returns the skeleton for a mission detail panel, or null if there isn't one.
+function getSkeleton(panelId){
+	var thisSkeleton = skeletons[panelId];
+	if(!thisSkeleton){
+		if(!missionStates){
+			missionStates = JSON.parse(document.getElementById("missionStates").textContent);
+		}
+		if(missionStates.p){
+			// Compact page: turn the entry into the same form as a normal page's
+			var n = panelNumber(panelId);
+			var compactEntry = missionStates.p[n];
+			var entry = compactEntry && [n, missionStates.n[compactEntry[0]], dayDate(compactEntry[1]), dayDate(compactEntry[2]), panelToken(compactEntry[3]), panelToken(compactEntry[4]), compactEntry[5], compactEntry[6]];
+		}
+		else{
+			var entry = missionStates.panels[panelId];
+		}
+		if(!entry){
+			return null;
+		}
+		thisSkeleton = new skeleton(panelId, entry, missionStates.names || missionStates.n);
+		skeletons[panelId] = thisSkeleton;
+	}
+	return thisSkeleton;
+}
+
+// Compact pages list the skeletons in the order of their panel tokens ("_" and the number in base 36), refer to the panels by those numbers, give the mission names as their numbers in the names and the dates as day numbers (see pageWriter.skeletonCollection.write).
+function panelNumber(panelId){
+	return parseInt(panelId.slice(1), 36);
+}
+function panelToken(n){
+	return (n === null) ? null : "_" + n.toString(36);
+}
+function dayDate(day){
+	return (typeof day == "number") ? new Date(day * 24 * 60 * 60 * 1000).toISOString().slice(0, 19) : day;		// The same iso date (without a time zone) as a normal page
+}
+
+// Returns the mission detail panel that a line (or button) refers to. Lines in compact pages use the short "p" attribute.
+function getPanelRef(element){
+	return element.getAttribute("missiondetailpanel") || element.getAttribute("p");
+}
+
+// Returns the groups of lines drawn by a craft or traveler. In a tiled page there's one in each tile it's drawn in.
+function getComponentGroups(name){
+	var group = document.getElementById(name);
+	if(group){
+		return [group];
+	}
+	return document.querySelectorAll('g[component="' + CSS.escape(name) + '"]');
+}
+// Returns the name of the craft or traveler a group of lines belongs to
+function getComponentName(group){
+	return group.getAttribute("id") || group.getAttribute("component");
 }
 
 // EVENT HANDLERS
@@ -13,25 +76,30 @@ function clearStyle(){
 }
 // Function to show/hide detail panels when the user clicks on a line
 function showMissionDetail(){
-	var panelId = this.getAttribute("missiondetailpanel");
+	openMissionDetail(getPanelRef(this));
+}
+function openMissionDetail(panelId){
 	var missionPanel = document.getElementById(panelId);						// Try to find a pre-existing panel in the document
 	if(!missionPanel){										// If it's not there create it
-		var i = skeletonList.findIndex(comparePanelId, panelId);		// Find the relevant skeleton object
-		var currentSkeleton = skeletonList[i];
-		var totalSkeletons = skeletonList.length;
-		// It looks nice if the detail panels are written into the document in the same order they are in the skeletonList. So, find out if any skeletons further down the list have been written out already.
-		while(i < totalSkeletons && skeletonList[i].written == 0){
-			i++;			
+		var currentSkeleton = getSkeleton(panelId);		// Find the relevant skeleton object
+		if(!currentSkeleton){
+			return;
 		}
+		// It looks nice if the detail panels are written into the document in the same order as the skeletons. So, find the first panel already written that comes after this one.
 		var successorPanel = null;
-		// If a successor panel has already been written, grab it.
-		if(i < totalSkeletons){
-			successorPanel = document.getElementById(skeletonList[i].panelId);
+		var successorSequence = Infinity;
+		for(var i=0; i<writtenSkeletons.length; i++){
+			var sequence = writtenSkeletons[i].sequence;
+			if(sequence > currentSkeleton.sequence && sequence < successorSequence){
+				successorSequence = sequence;
+				successorPanel = document.getElementById(writtenSkeletons[i].panelId);
+			}
 		}
 		missionPanel = currentSkeleton.createDetailPanel();
 		// Add in the new panel before the successor. If there isn't one, this will write to the end (i.e. same as appendChild)
 		missionDetailArea.insertBefore(missionPanel, successorPanel);
 		currentSkeleton.written = 1;
+		writtenSkeletons.push(currentSkeleton);
 	}
 	else{
 		// missionPanel.classList.add("flashBorderRed");
@@ -42,7 +110,7 @@ function showMissionDetail(){
 	missionPanel.style.display = "block";
 }
 function showLineOnly(){
-	lineDetailArea.innerHTML = this.parentNode.getAttribute("id");
+	lineDetailArea.innerHTML = getComponentName(this.parentNode);
 }
 function hideLineOnly(){
 	lineDetailArea.innerHTML = "";
@@ -54,17 +122,25 @@ function hideParent(){
 
 // Function to highlight space travelers in the diagram (changed the class of the group to which all the lines belong)
 function highlightTraveler(){
-	var travelerId = this.getAttribute("travelerId");
-	var travelerGroup = document.getElementById(travelerId);
-	if(travelerGroup){
-		travelerGroup.setAttribute("class", "travelerGroupHighlight");
+	if(geometry){
+		highlightedComponent = this.getAttribute("travelerId");
+		drawCanvas();
+		return;
+	}
+	var travelerGroups = getComponentGroups(this.getAttribute("travelerId"));
+	for(var i=0; i<travelerGroups.length; i++){
+		travelerGroups[i].setAttribute("class", "travelerGroupHighlight");
 	}
 }
 function unHighlightTraveler(){
-	var travelerId = this.getAttribute("travelerId");
-	var travelerGroup = document.getElementById(travelerId);
-	if(travelerGroup){
-		travelerGroup.setAttribute("class", "travelerGroup");
+	if(geometry){
+		highlightedComponent = null;
+		drawCanvas();
+		return;
+	}
+	var travelerGroups = getComponentGroups(this.getAttribute("travelerId"));
+	for(var i=0; i<travelerGroups.length; i++){
+		travelerGroups[i].setAttribute("class", "travelerGroup");
 	}
 }
 
@@ -78,6 +154,34 @@ function drawDateLine(xPosition, SVGlayer){
 	SVGlayer.appendChild(line);
 }
 
+// Function to add buttons for the previous and next mission detail panels of a craft or traveler to a list item
+// code is the craft or traveler's number in the mission states' names, its panels are looked up in the same numbers.
+function addNeighbourButtons(li, code, panelId){
+	var panels = missionStates.componentPanels ? missionStates.componentPanels[code] : missionStates.c[code].map(panelToken);
+	var j = panels.indexOf(panelId);
+	if(j < 0){
+		return;
+	}
+	if(j + 1 < panels.length){
+		const sucButtonElement = document.createElement("Input");
+		sucButtonElement.setAttribute("missiondetailpanel", panels[j + 1]);
+		sucButtonElement.type = "button";
+		sucButtonElement.onclick = showMissionDetail;
+		sucButtonElement.style = "float:right;";
+		sucButtonElement.value = ">";
+		li.appendChild(sucButtonElement);
+	}
+	if(j > 0){
+		const preButtonElement = document.createElement("Input");
+		preButtonElement.setAttribute("missiondetailpanel", panels[j - 1]);
+		preButtonElement.type = "button";
+		preButtonElement.onclick = showMissionDetail;
+		preButtonElement.style = "float:right;";
+		preButtonElement.value = "<";
+		li.appendChild(preButtonElement);
+	}
+}
+
 // Function to create a detail panel to capture the current state of the mission
 function createMissionDetailPanelFromSkeleton(){		
 	var i;
@@ -167,36 +271,7 @@ function createMissionDetailPanelFromSkeleton(){
 			t = document.createTextNode(this.travelers[i]);
 			a.appendChild(t);
 			// Pred/Succ for travelers
-			var tGroup = document.getElementById(this.travelers[i]);
-			var tLines = tGroup.children;
-			// Iterate through traveler lines
-			for(var j=0; j<tLines.length; j++){
-				var lineMDPRef = tLines[j].getAttribute("missiondetailpanel");
-				if(lineMDPRef == this.panelId){
-					var sucLine = tLines[j].nextElementSibling;
-					if(sucLine){
-						sucMDPRef = sucLine.getAttribute("missiondetailpanel");
-						const preButtonElement = document.createElement("Input");
-						preButtonElement.setAttribute("missiondetailpanel", sucMDPRef);
-						preButtonElement.type = "button";
-						preButtonElement.onclick = showMissionDetail;
-						preButtonElement.style = "float:right;";
-						preButtonElement.value = ">";
-						li.appendChild(preButtonElement);
-					}
-					var preLine = tLines[j].previousElementSibling;
-					if(preLine){
-						preMDPRef = preLine.getAttribute("missiondetailpanel");
-						const preButtonElement = document.createElement("Input");
-						preButtonElement.setAttribute("missiondetailpanel", preMDPRef);
-						preButtonElement.type = "button";
-						preButtonElement.onclick = showMissionDetail;
-						preButtonElement.style = "float:right;";
-						preButtonElement.value = "<";
-						li.appendChild(preButtonElement);
-					}
-				}
-			}
+			addNeighbourButtons(li, this.travelerCodes[i], this.panelId);
 		}
 	}
 	t = document.createTextNode("Number of craft: " + this.craft.length);
@@ -212,36 +287,7 @@ function createMissionDetailPanelFromSkeleton(){
 			t = document.createTextNode(this.craft[i]);
 			li.appendChild(t);
 			// Pred/Succ for craft
-			var cGroup = document.getElementById(this.craft[i]);
-			var cLines = cGroup.children;
-			// Iterate through craft lines
-			for(var j=0; j<cLines.length; j++){
-				var lineMDPRef = cLines[j].getAttribute("missiondetailpanel");
-				if(lineMDPRef == this.panelId){
-					var sucLine = cLines[j].nextElementSibling;
-					if(sucLine){
-						sucMDPRef = sucLine.getAttribute("missiondetailpanel");
-						const preButtonElement = document.createElement("Input");
-						preButtonElement.setAttribute("missiondetailpanel", sucMDPRef);
-						preButtonElement.type = "button";
-						preButtonElement.onclick = showMissionDetail;
-						preButtonElement.style = "float:right;";
-						preButtonElement.value = ">";
-						li.appendChild(preButtonElement);
-					}
-					var preLine = cLines[j].previousElementSibling;
-					if(preLine){
-						preMDPRef = preLine.getAttribute("missiondetailpanel");
-						const preButtonElement = document.createElement("Input");
-						preButtonElement.setAttribute("missiondetailpanel", preMDPRef);
-						preButtonElement.type = "button";
-						preButtonElement.onclick = showMissionDetail;
-						preButtonElement.style = "float:right;";
-						preButtonElement.value = "<";
-						li.appendChild(preButtonElement);
-					}
-				}
-			}
+			addNeighbourButtons(li, this.craftCodes[i], this.panelId);
 		}
 	}
 
@@ -249,100 +295,70 @@ function createMissionDetailPanelFromSkeleton(){
 	return details;
 }
 
-// Class skeleton - mission panel skeleton	// Mission panel skeleton
-function skeleton(XMLSkeleton){
+// Class skeleton - mission panel skeleton, made from its entry in the mission states (see pageWriter.skeletonCollection.write)
+function skeleton(panelId, entry, names){
 	this.written = 0;		// Flag to indicate whether or not a skeleton has been written into the document
-	this.sequence = null;
-	// Initialise these as they won't necessarily get values
-	this.panelId = null;
-	this.startDate = null;
-	this.endDate = null;
-	this.sucessor = null;
-	this.predecessor = null;
+	this.panelId = panelId;
+	this.sequence = entry[0];
+	this.name = entry[1];
+	this.startDate = entry[2];
+	this.endDate = entry[3];
+	this.predecessor = entry[4];
+	this.sucessor = entry[5];
+	this.craftCodes = entry[6];
+	this.travelerCodes = entry[7];
+	this.craft = entry[6].map(function(code){ return names[code]; });
+	this.travelers = entry[7].map(function(code){ return names[code]; });
 	this.createDetailPanel = createMissionDetailPanelFromSkeleton;
-	// Read attributes
-	var attributes = XMLSkeleton.attributes;
-	var n = attributes.length;
-	for(var i=0; i<n; i++){
-		switch(attributes[i].nodeName){
-			case "name":
-				this.name = attributes[i].nodeValue;
-			break;
-			case "sdate":
-				this.startDate = attributes[i].nodeValue;
-			break;
-			case "edate":
-				this.endDate = attributes[i].nodeValue;
-			break;
-			case "pid":
-				this.panelId = attributes[i].nodeValue;
-			break;
-			case "pre":
-				this.predecessor = attributes[i].nodeValue;
-			break;
-			case "suc":
-				this.sucessor = attributes[i].nodeValue;
-			break;
-			}
-	}
-	// Read child nodes
-	this.travelers = [];
-	this.craft = [];
-	var children = XMLSkeleton.childNodes;
-	var n = children.length;
-	for(var i=0;i<n;i++){
-		if(children[i].nodeType == 1){		// Element, there are two elements, cr for craft and tv for traveler
-			switch(children[i].localName){
-				case "cr":
-					this.craft.push(children[i].textContent);
-				break;
-				case "tv":
-					this.travelers.push(children[i].textContent);
-				break;
-			}
-		}
-	}
 }
 
-// Function to do some drawing after the initial document load
-// The idea here is that the page loads and the user gets to start using it but some extra bits come later
-function completeDraw(){
-	// Add event handlers to lines
-	craftLayer = document.getElementById("craftLayer");
-	var l = craftLayer.children.length;
+// Function to add the event handlers to the lines of a layer of component groups
+function addLineHandlers(layer){
+	var l = layer.children.length;
 	for(var i=0; i<l; i++){
-		var l2 = craftLayer.children[i].children.length;
+		var l2 = layer.children[i].children.length;
 		for(var j=0; j<l2; j++){
-			var line = craftLayer.children[i].children[j];
+			var line = layer.children[i].children[j];
 			line.onclick = showMissionDetail;
 			line.onmouseenter = showLineOnly;
 			line.onmouseleave = hideLineOnly;
 		}
 	}
-	travelerLayer = document.getElementById("travelerLayer");
-	var l = travelerLayer.children.length;
-	for(var i=0; i<l; i++){
-		var l2 = travelerLayer.children[i].children.length;
-		for(var j=0; j<l2; j++){
-			var line = travelerLayer.children[i].children[j];
-			line.onclick = showMissionDetail;
-			line.onmouseenter = showLineOnly;
-			line.onmouseleave = hideLineOnly;
-		}
-	}
-	// Draw vertical gridlines
-	// There are tens of thousands of these, so it makes sense to create the SVG elements after the page has loaded, after all, they're not terribly interesting.
+}
+
+// Function to draw the vertical gridlines between the date text elements of a layer
+function drawDateLines(gridLinesLayer){
 	var keyDates = [];
-	var textElements = document.getElementsByTagName("text");
+	var textElements = gridLinesLayer.getElementsByTagName("text");
 	var l = textElements.length;
+	if(l == 0){
+		return;
+	}
 	// First of all read data from all of the date text elements. These provide a mapping between the absolute date and the pixel position within the SVG.
 	for(var i=0; i<l; i++){
 		var key = [];
-		key[0] = Date.parse(textElements[i].getAttribute("id"));
-		key[1] = Number(textElements[i].getAttribute("x")) + 5;		// Text element is 10 wide so is offset to the left by 5
+		var label = textElements[i];
+		if(label.hasAttribute("transform")){
+			key[1] = Number(label.getAttribute("x")) + 5;		// Text element is 10 wide so is offset to the left by 5
+		}
+		else{
+			key[1] = 5 - Number(label.getAttribute("y"));		// Compact page: the label is at (520, -x), turned by the style sheet
+		}
+		if(label.hasAttribute("id")){
+			key[0] = Date.parse(label.getAttribute("id"));
+		}
+		else{
+			// A compact page's label, or the copy of a label in the tile next to its own: read the date from the text.
+			var day = label.textContent.split("/");
+			var id = day[2] + "-" + day[1] + "-" + day[0] + "T00:00:00";
+			key[0] = Date.parse(id);
+			// Give a compact label the id a normal page's would have, for the detail panels' date links. Only one of the copies of it in the tiles gets it, they're all in the same place.
+			if(!label.hasAttribute("transform") && !document.getElementById(id)){
+				label.setAttribute("id", id);
+			}
+		}
 		keyDates.push(key);
 	}
-	var gridLinesLayer = document.getElementById("gridLinesLayer");
 	const MSperDay = 1000 * 24 * 60 * 60;
 	const dayWidth = 10;		// Needs to be the same as in the python script that drew the mission lines.
 	// Now draw the first date, this one has no predecessor to consider.
@@ -355,12 +371,290 @@ function completeDraw(){
 			drawDateLine(keyDates[i][1] - (j * dayWidth), gridLinesLayer);
 		}
 	}
+}
+
+// Tiled pages
+// Function to fetch any tiles that are in view (or next to it) that haven't been already
+function loadVisibleTiles(){
+	if(level > 0){
+		return;		// Zoomed out to an overview, the view isn't over the tiles
+	}
+	var viewport = tileArea.parentNode;
+	var tileWidth = Number(tileArea.getAttribute("tileWidth"));
+	var tiles = Number(tileArea.getAttribute("tiles"));
+	var first = Math.max(Math.floor(viewport.scrollLeft / tileWidth) - 1, 0);
+	var last = Math.min(Math.floor((viewport.scrollLeft + viewport.clientWidth) / tileWidth) + 1, tiles - 1);
+	for(var i=first; i<=last; i++){
+		if(!tilesRequested[i]){
+			tilesRequested[i] = true;
+			loadTile(i);
+		}
+	}
+}
+function loadTile(i){
+	fetch(tileArea.getAttribute("tileUrl") + i + ".svg")
+		.then(function(response){ return response.text(); })
+		.then(function(text){ attachTile(i, text); })
+		.catch(function(){ tilesRequested[i] = false; });		// Try again next time it's scrolled into view
+}
+// Function to add a fetched tile to the page. Tiles are kept in order, so that a component's lines are too.
+function attachTile(i, text){
+	var tileDocument = new DOMParser().parseFromString(text, "image/svg+xml");
+	var tile = document.importNode(tileDocument.documentElement, true);
+	tile.setAttribute("tile", i);
+	var next = null;
+	var children = tileArea.children;
+	for(var j=0; j<children.length; j++){
+		if(children[j].hasAttribute("tile") && Number(children[j].getAttribute("tile")) > i){
+			next = children[j];
+			break;
+		}
+	}
+	tileArea.insertBefore(tile, next);
+	addLineHandlers(tile.querySelector("g.craftLayer"));
+	addLineHandlers(tile.querySelector("g.travelerLayer"));
+	drawDateLines(tile.querySelector("g.gridLinesLayer"));
+}
+
+// Canvas pages
+// Function to fetch the geometry index and vertex buffer
+function loadGeometry(){
+	var url = canvasArea.getAttribute("geometryUrl");
+	Promise.all([
+		fetch(url + ".json").then(function(response){ return response.json(); }),
+		fetch(url + ".bin").then(function(response){ return response.arrayBuffer(); })
+	]).then(function(results){
+		geometry = results[0];
+		geometry.vertices = new Float32Array(results[1]);		// Little endian, as near enough every browser is
+		prepareGeometry();
+		drawCanvas();
+	});
+}
+// Function to work out the stroke of each group and the bounding box of each path from the geometry index
+function prepareGeometry(){
+	var vertices = geometry.vertices;
+	for(var l=0; l<geometry.layers.length; l++){
+		var groups = geometry.layers[l].groups;
+		for(var g=0; g<groups.length; g++){
+			var group = groups[g];
+			// Travelers are styled by their class (see timeline.css), craft by their own style
+			group.stroke = "black";
+			group.lineWidth = group["class"] == "travelerGroup" ? 3 : 1;
+			var declarations = group.style.split(";");
+			for(var i=0; i<declarations.length; i++){
+				var declaration = declarations[i].split(":");
+				if(declaration[0] == "stroke"){
+					group.stroke = declaration[1];
+				}
+				else if(declaration[0] == "stroke-width"){
+					group.lineWidth = Number(declaration[1]);
+				}
+			}
+			for(var p=0; p<group.paths.length; p++){
+				var path = group.paths[p];
+				var first = path[1] * 2;
+				var end = first + path[2] * 2;
+				var box = [Infinity, Infinity, -Infinity, -Infinity];
+				for(var v=first; v<end; v+=2){
+					box[0] = Math.min(box[0], vertices[v]);
+					box[1] = Math.min(box[1], vertices[v + 1]);
+					box[2] = Math.max(box[2], vertices[v]);
+					box[3] = Math.max(box[3], vertices[v + 1]);
+				}
+				path.push(box);
+			}
+		}
+	}
+}
+// Function to draw the lines in view onto the canvas
+function drawCanvas(){
+	canvasDrawPending = false;
+	if(!geometry){
+		return;
+	}
+	var viewport = canvasArea.parentNode;
+	var canvas = canvasArea.querySelector("canvas");
+	if(canvas.width != viewport.clientWidth){
+		canvas.width = viewport.clientWidth;
+	}
+	var left = viewport.scrollLeft;
+	var right = left + canvas.width;
+	var vertices = geometry.vertices;
+	var context = canvas.getContext("2d");
+	context.clearRect(0, 0, canvas.width, canvas.height);
+	context.save();
+	context.translate(-left, 0);
+	context.lineCap = "round";
+	context.lineJoin = "round";
+	for(var l=0; l<geometry.layers.length; l++){
+		var groups = geometry.layers[l].groups;
+		for(var g=0; g<groups.length; g++){
+			var group = groups[g];
+			context.strokeStyle = group.component == highlightedComponent ? "red" : group.stroke;
+			context.lineWidth = group.lineWidth;
+			for(var p=0; p<group.paths.length; p++){
+				var path = group.paths[p];
+				if(path[2] < 2 || path[3][2] + group.lineWidth < left || path[3][0] - group.lineWidth > right){
+					continue;
+				}
+				var first = path[1] * 2;
+				var end = first + path[2] * 2;
+				context.beginPath();
+				context.moveTo(vertices[first], vertices[first + 1]);
+				for(var v=first + 2; v<end; v+=2){
+					context.lineTo(vertices[v], vertices[v + 1]);
+				}
+				context.stroke();
+			}
+		}
+	}
+	context.restore();
+}
+function requestCanvasDraw(){
+	if(!canvasDrawPending){
+		canvasDrawPending = true;
+		window.requestAnimationFrame(drawCanvas);
+	}
+}
+// Returns [group, path] of the line at a mouse event on the canvas (the one drawn last if there are several), or null
+function hitTest(event){
+	if(!geometry){
+		return null;
+	}
+	var rect = canvasArea.getBoundingClientRect();
+	var x = event.clientX - rect.left;		// The canvas area scrolls with the timeline, so this is the position in it
+	var y = event.clientY - rect.top;
+	var vertices = geometry.vertices;
+	for(var l=geometry.layers.length - 1; l>=0; l--){
+		var groups = geometry.layers[l].groups;
+		for(var g=groups.length - 1; g>=0; g--){
+			var group = groups[g];
+			var reach = Math.max(group.lineWidth / 2, 3);
+			for(var p=group.paths.length - 1; p>=0; p--){
+				var path = group.paths[p];
+				var box = path[3];
+				if(path[2] < 2 || x < box[0] - reach || x > box[2] + reach || y < box[1] - reach || y > box[3] + reach){
+					continue;
+				}
+				var end = (path[1] + path[2]) * 2;
+				for(var v=path[1] * 2 + 2; v<end; v+=2){
+					if(segmentDistance(x, y, vertices[v - 2], vertices[v - 1], vertices[v], vertices[v + 1]) <= reach){
+						return [group, path];
+					}
+				}
+			}
+		}
+	}
+	return null;
+}
+// Returns the distance from x, y to the line from x1, y1 to x2, y2
+function segmentDistance(x, y, x1, y1, x2, y2){
+	var dx = x2 - x1;
+	var dy = y2 - y1;
+	var length2 = dx * dx + dy * dy;
+	var t = length2 ? Math.min(Math.max(((x - x1) * dx + (y - y1) * dy) / length2, 0), 1) : 0;
+	return Math.hypot(x - x1 - t * dx, y - y1 - t * dy);
+}
+function canvasClick(event){
+	var hit = hitTest(event);
+	if(hit){
+		openMissionDetail(hit[1][0]);
+	}
+}
+function canvasMouseMove(event){
+	var hit = hitTest(event);
+	lineDetailArea.innerHTML = hit ? hit[0].component : "";
+	this.style.cursor = hit ? "pointer" : "";
+}
+
+// Levels of detail
+// Function to zoom in or out a level with ctrl + the mouse wheel
+function zoomTimeline(event){
+	if(!event.ctrlKey){
+		return;
+	}
+	event.preventDefault();
+	var newLevel = Math.min(Math.max(level + (event.deltaY > 0 ? 1 : -1), 0), levelScales.length - 1);
+	showLevel(newLevel, event.clientX - overviewArea.parentNode.getBoundingClientRect().left);
+}
+// Function to zoom back in to the full timeline at the date clicked on in an overview
+function zoomToDetail(event){
+	showLevel(0, event.clientX - overviewArea.parentNode.getBoundingClientRect().left);
+}
+// Function to switch to a level, keeping the date that is offset pixels into the view where it is
+function showLevel(newLevel, offset){
+	if(newLevel == level){
+		return;
+	}
+	var viewport = overviewArea.parentNode;
+	var x = (viewport.scrollLeft + offset) * levelScales[level];		// Position in the full timeline
+	level = newLevel;
+	var detail = viewport.firstElementChild;		// The full timeline's svg (or tile area)
+	if(level == 0){
+		overviewArea.style.display = "none";
+		detail.style.display = "";
+		viewport.scrollLeft = x - offset;
+		if(tileArea){
+			loadVisibleTiles();
+		}
+		return;
+	}
+	detail.style.display = "none";
+	overviewArea.style.display = "block";
+	var scale = levelScales[level];
+	if(overviews[level]){
+		overviewArea.replaceChildren(overviews[level]);
+		viewport.scrollLeft = x / scale - offset;
+		return;
+	}
+	var fetchLevel = level;
+	fetch(overviewArea.getAttribute("overviewUrl") + scale + ".svg")
+		.then(function(response){ return response.text(); })
+		.then(function(text){
+			var overviewDocument = new DOMParser().parseFromString(text, "image/svg+xml");
+			overviews[fetchLevel] = document.importNode(overviewDocument.documentElement, true);
+			if(level == fetchLevel){
+				overviewArea.replaceChildren(overviews[fetchLevel]);
+				viewport.scrollLeft = x / scale - offset;
+			}
+		});
+}
+
+// Function to do some drawing after the initial document load
+// The idea here is that the page loads and the user gets to start using it but some extra bits come later
+function completeDraw(){
+	tileArea = document.getElementById("tileArea");
+	canvasArea = document.getElementById("canvasArea");
+	if(canvasArea){
+		// The lines are drawn on the canvas, the dates are still svg
+		var canvas = canvasArea.querySelector("canvas");
+		canvas.onclick = canvasClick;
+		canvas.onmousemove = canvasMouseMove;
+		canvas.onmouseleave = hideLineOnly;
+		canvasArea.parentNode.addEventListener("scroll", requestCanvasDraw);
+		window.addEventListener("resize", requestCanvasDraw);
+		loadGeometry();
+		drawDateLines(document.getElementById("gridLinesLayer"));
+	}
+	else if(tileArea){
+		// The lines and dates are all in the tiles
+		loadVisibleTiles();
+		tileArea.parentNode.addEventListener("scroll", loadVisibleTiles);
+		window.addEventListener("resize", loadVisibleTiles);
+	}
+	else{
+		// Add event handlers to lines
+		addLineHandlers(document.getElementById("craftLayer"));
+		addLineHandlers(document.getElementById("travelerLayer"));
+		// Draw vertical gridlines
+		// There are tens of thousands of these, so it makes sense to create the SVG elements after the page has loaded, after all, they're not terribly interesting.
+		drawDateLines(document.getElementById("gridLinesLayer"));
+	}
 	
-	// Parse mission state skeleton xml
-	var xmlSkeletons = document.getElementsByTagName("ms");
-	var skeletons = xmlSkeletons.length;
-	for(var i=0;i<skeletons;i++){
-		var thisSkeleton = new skeleton(xmlSkeletons[i]);
-		skeletonList.push(thisSkeleton);
+	overviewArea = document.getElementById("overviewArea");
+	if(overviewArea){
+		levelScales = [1].concat(overviewArea.getAttribute("scales").split(" ").map(Number));
+		overviewArea.parentNode.addEventListener("wheel", zoomTimeline, {passive: false});
+		overviewArea.onclick = zoomToDetail;
 	}
 }
\ No newline at end of file
@@ -1,374 +1,63 @@
-from datetime import datetime
-from xml.dom import minidom
 import spaceflight as sf
+import eventProcessor as ep
+import layoutTable as lt
+import renderer as rd
 
 logLevel = 0
 sf.logLevel = 0
-
-
-# SpaceEvent class
-class SpaceEvent:
-    def __init__(self, xmlevent):
-        for f in xmlevent.childNodes:
-            if f.nodeType == 1:
-                if f.localName == 'date':
-                    self.date = datetime.fromisoformat(f.firstChild.data)
-                elif f.localName == 'subject':
-                    self.subject = f.firstChild.data
-                elif f.localName == 'eventType':
-                    self.eventType = f.firstChild.data
-                elif f.localName == 'object':
-                    self.object = f.firstChild.data
-
-    def print(self):
-        print('Date: ' + self.date.strftime("%d/%m/%Y"))
-        print('Subject: ' + self.subject)
-        print('Event Type: ' + self.eventType)
-        if self.eventType != 'ENDS':
-            print('Object: ' + self.object)
+ep.logLevel = 0
+lt.logLevel = 0
 
 
 # MAIN Routine
-epochDate = datetime.fromisoformat("1970-01-01T00:00:00.000")
-secPerDay = 24 * 60 * 60
 # The number of pixels per day.
 dayWidth = 10
-# Ratio between the time difference in seconds and the draw grid. This value should give 20px per day.
-xRatio = secPerDay / dayWidth
-# A stretching of the x-axis in pixels to accomodate things that don't fit
-timeSlip = 0
-
-
-def drawdate(date):
-    timeD = date - startDate
-    secsFromStart = timeD.total_seconds()
-    xPosition = secsFromStart / xRatio + timeSlip
-    textElement = outDoc.createElementNS("http://www.w3.org/2000/svg", "text")
-    textElement.setAttribute("x", str(round(xPosition - 5)))
-    textElement.setAttribute("y", "520")
-    textElement.setAttribute("transform", "rotate(90," + str(round(xPosition - 5)) + " , 520)")
-    textElement.setAttribute("id", date.isoformat())
-    tn = outDoc.createTextNode(date.strftime("%d/%m/%Y"))
-    textElement.appendChild(tn)
-    gridLinesLayer.appendChild(textElement)
-
-
-# Parse xml event list into a list of python spaceEvent objects + startDate global
-mydoc = minidom.parse('Data/eventList.xml')
-xmlSpaceEventList = mydoc.getElementsByTagName('spaceEvent')
-spaceEventList = []
-for xmlSpaceEvent in xmlSpaceEventList:
-    thisSpaceEvent = SpaceEvent(xmlSpaceEvent)
-    spaceEventList.append(thisSpaceEvent)
-startDate = spaceEventList[0].date
-
-# Define the structure of the XML document to which we will be writing
-outDoc = minidom.Document()
-
-htmlE = outDoc.createElement("html")
-outDoc.appendChild(htmlE)
-
-headE = outDoc.createElement("head")
-headE.innerHTML = '<link rel="stylesheet" type="text/css" href="timeline.css">'
-htmlE.appendChild(headE)
-
-scriptE = outDoc.createElement("script")
-scriptE.setAttribute("src", "timeline.js")
-t = outDoc.createTextNode("")
-scriptE.appendChild(t)
-headE.appendChild(scriptE)
-
-codeE = outDoc.createElement("code")
-codeE.setAttribute("style", "display:none;")
-skCollectionRoot = outDoc.createElement("missionStates")
-codeE.appendChild(skCollectionRoot)
-headE.appendChild(codeE)
-
-linkE = outDoc.createElement("link")
-linkE.setAttribute("rel", "stylesheet")
-linkE.setAttribute("type", "text/css")
-linkE.setAttribute("href", "timeline.css")
-headE.appendChild(linkE)
-
-bodyE = outDoc.createElement("body")
-bodyE.setAttribute("onload", "completeDraw();")
-htmlE.appendChild(bodyE)
-
-svgDivE = outDoc.createElement("div")
-svgDivE.setAttribute("height", "600")
-svgDivE.setAttribute("style", "overflow:auto; border:1px solid black;")
-bodyE.appendChild(svgDivE)
-
-SVGElement = outDoc.createElementNS("http://www.w3.org/2000/svg", "SVG")
-SVGElement.setAttribute("xmlns", "http://www.w3.org/2000/svg")
-SVGElement.setAttribute("width", "1024")
-SVGElement.setAttribute("height", "600")
-svgDivE.appendChild(SVGElement)
-
-backgroundLayer = outDoc.createElement("g")
-SVGElement.appendChild(backgroundLayer)
-
-gridLinesLayer = outDoc.createElement("g")
-gridLinesLayer.setAttribute("id", "gridLinesLayer")
-SVGElement.appendChild(gridLinesLayer)
-
-craftLayer = outDoc.createElement("g")
-craftLayer.setAttribute("id", "craftLayer")
-SVGElement.appendChild(craftLayer)
-
-travelerLayer = outDoc.createElement("g")
-travelerLayer.setAttribute("id", "travelerLayer")
-SVGElement.appendChild(travelerLayer)
-
-detailDiv = outDoc.createElement("div")
-detailDiv.setAttribute("id", "detailArea")
-detailDiv.setAttribute("style", "border:1px solid black;")
-bodyE.appendChild(detailDiv)
-
-lineDetailDiv = outDoc.createElement("div")
-lineDetailDiv.setAttribute("id", "lineDetailArea")
-lineDetailDiv.setAttribute("style", "height:30px;")
-t = outDoc.createTextNode("")
-lineDetailDiv.appendChild(t)
-detailDiv.appendChild(lineDetailDiv)
-
-missionDetailDiv = outDoc.createElement("div")
-missionDetailDiv.setAttribute("id", "missionDetailArea")
-detailDiv.appendChild(missionDetailDiv)
-
-# Initialise variables for event processing
-craftList = []
-travelerList = []
-missionList = []
-lastGridLineTime = startDate
-activeTransferBatch = None
-orbitList = [
-    sf.orbit("Heliocentric", 0, 15, "rgb(255,255,192)"),
-    sf.orbit("Lunar_Surface", 15, 15, "rgb(128,128,128)"),
-    sf.orbit("Lunar_Orbit", 30, 45, "rgb(192,192,192)"),
-    sf.orbit("Lunar_Flyby", 75, 20, "rgb(224,224,224)"),
-    sf.orbit("HEO", 95, 20, "rgb(224,224,255)"),
-    sf.orbit("LEO", 115, 350, "rgb(192,192,255)"),
-    sf.orbit("Sub_Orbital", 465, 20, "rgb(160,160,255)"),
-    sf.orbit("Earth", 485, 35, "rgb(160,255,160)")]
-
-# Parse xml craft list into a list of python craft objects
-mydoc = minidom.parse('Data/craftList.xml')
-xmlCraftList = mydoc.getElementsByTagName('craft')
-for xmlCraft in xmlCraftList:
-    for field in xmlCraft.childNodes:
-        if field.nodeType == 1:
-            if field.localName == 'name':
-                xmlCraftName = field.firstChild.data
-            elif field.localName == 'CrewCapacity':
-                xmlCraftWidth = int(field.firstChild.data) * 7
-            elif field.localName == 'Hue':
-                xmlCraftHue = int(field.firstChild.data)
-    newCraft = sf.craft(xmlCraftName, craftLayer, xmlCraftWidth, xmlCraftHue)
-    craftList.append(newCraft)
-
-for spaceEvent in spaceEventList:
-    # Update the X position at which we're writing using the date of the event.
-    eventDate = spaceEvent.date
-    # epochDiff = eventDate - epochDate
-    # epochDiffSeconds = epochDiff.total_seconds()
-
-    # Various conditions under which an active transfer batch should be executed and deleted.
-    # - Date has moved on.
-    # - Event type is not either SUPPORTS or JOINS
-    if not(activeTransferBatch is None):
-        if activeTransferBatch.date != eventDate or not (
-                spaceEvent.eventType == "SUPPORTS" or spaceEvent.eventType == "JOINS"):
-            # Use the batch's date to work out where on the x-axis to draw the batched events. Note that transfer events don't change the y-axis value of missions, only their components.
-            timeDiff = activeTransferBatch.date - startDate
-            secondsFromStart = timeDiff.total_seconds()
-            executionXPos = secondsFromStart / xRatio + timeSlip
-            timeSlip += activeTransferBatch.execute(executionXPos)
-            activeTransferBatch = None
-
-    # If a grid line has not yet been drawn for this time point,
-    # draw one, and also fill in all those since the last time point.
-    if lastGridLineTime != eventDate:
-        drawdate(eventDate)
-        lastGridLineTime = eventDate
-
-    if spaceEvent.eventType == "SUPPORTS":
-        # Check to see if a transfer batch is active, if not, create a new one.
-        if activeTransferBatch is None:
-            activeTransferBatch = sf.transferBatch(eventDate)
-        # Find the craft object, or create a new one and add it to the list
-        try:
-            ci = craftList.index(spaceEvent.subject)  # Find the craft with the correct name from craft list
-            subjectCraft = craftList[ci]
-        except ValueError:  # IF there isn't one, create one.
-            subjectCraft = sf.craft(spaceEvent.subject, craftLayer)
-            craftList.append(subjectCraft)
-            if logLevel > 0:
-                print("WARNING: Craft missing from imported craft list: " + subjectCraft.name)
-        # Find the mission object to which the event refers
-        try:
-            mi = missionList.index(spaceEvent.object)  # Find the mission with the correct name from mission list
-            objectMission = missionList[mi]
-        except ValueError:  # IF there isn't one, create one.
-            objectMission = sf.mission(spaceEvent.object)
-            missionList.append(objectMission)
-        # Add a supports entry to the transfer batch
-        activeTransferBatch.addSupports(subjectCraft, objectMission)
-        # If the craft is already assigned to a mission, find it and use it to create an unSupport entry.
-        if not(subjectCraft.mission is None):
-            try:
-                mi = missionList.index(subjectCraft.mission)  # Find the mission with the correct name from mission list
-            except ValueError:
-                print("ERROR: Craft "
-                      + subjectCraft.name
-                      + " is assigned to a mission "
-                      + subjectCraft.mission
-                      + " that cannot be found in master mission list")
-            else:
-                activeTransferBatch.addUnSupports(subjectCraft, missionList[mi])
-
-    elif spaceEvent.eventType == "JOINS":
-        # Check to see if a transfer batch is active, if not, create a new one.
-        if activeTransferBatch is None:
-            activeTransferBatch = sf.transferBatch(eventDate)
-        # Find the traveler object, or create a new one and add it to the list
-        try:
-            ci = travelerList.index(spaceEvent.subject)  # Find the traveler with the correct name from traveler list
-            subjectTraveler = travelerList[ci]
-        except ValueError:  # IF there isn't one, create one.
-            subjectTraveler = sf.traveler(spaceEvent.subject, travelerLayer)
-            travelerList.append(subjectTraveler)
-        # Find the mission object to which the event refers
-        try:
-            mi = missionList.index(spaceEvent.object)  # Find the mission with the correct name from mission list
-            objectMission = missionList[mi]
-        except ValueError:  # IF there isn't one, create one.
-            objectMission = sf.mission(spaceEvent.object)
-            missionList.append(objectMission)
-        # Add a joins entry to the transfer batch
-        activeTransferBatch.addJoins(subjectTraveler, objectMission)
-        # If the traveler is already assigned to a mission, find it and use it to create a leaves entry.
-        if not(subjectTraveler.mission is None):
-            try:
-                mi = missionList.index(
-                    subjectTraveler.mission)  # Find the mission with the correct name from mission list
-            except ValueError:
-                print("ERROR: Traveler "
-                      + subjectTraveler.name
-                      + " is assigned to a mission "
-                      + subjectTraveler.mission
-                      + " that cannot be found in master mission list")
-            else:
-                activeTransferBatch.addLeaves(subjectTraveler, missionList[mi])
-
-    elif spaceEvent.eventType == "ARRIVES" or spaceEvent.eventType == "DEPARTS":
-        # Executing a transfer batch will right shift following events as it takes up space,
-        # the timeSlip variable catches this, include it when calculating the x-axis position of these events.
-        timeDiff = eventDate - startDate
-        secondsFromStart = timeDiff.total_seconds()
-        xPos = secondsFromStart / xRatio + timeSlip
-
-        # Find the mission object to which the event refers
-        try:
-            mi = missionList.index(spaceEvent.subject)  # Find the mission with the correct name from mission list
-            subjectMission = missionList[mi]
-        except ValueError:  # IF there isn't one, create one.
-            subjectMission = sf.mission(spaceEvent.subject)
-            missionList.append(subjectMission)
-
-        # Find the orbit
-        try:
-            oi = orbitList.index(spaceEvent.object)
-            orbit = orbitList[oi]
-        except ValueError:
-            print("ERROR: Mission " + spaceEvent.subject + ": Orbit " + spaceEvent.object + " is not defined.")
-            orbit = None
-
-        if not(orbit is None) and spaceEvent.eventType == "ARRIVES":
-            if logLevel > 1:
-                print(
-                    "INFO: Mission "
-                    + spaceEvent.subject
-                    + " arrives at orbit "
-                    + spaceEvent.object
-                    + " at x position "
-                    + str(xPos))
-            orbit.addMission(subjectMission)
-            # Draw a mission line group on the SVG for all the missions in the orbit.
-            timeSlip += orbit.draw(xPos)
-            # Special extra bit for arriving back on Earth, ends mission without an explicit END.
-            if spaceEvent.object == "Earth":
-                subjectMission.end(eventDate)
-                # Remove mission from global mission list, this will speed up future searches of this list.
-                try:
-                    missionList.remove(subjectMission.name)
-                except ValueError:
-                    print("Failed to remove mission " + subjectMission.name + " from global mission list")
-
-        elif not(orbit is None) and spaceEvent.eventType == "DEPARTS":
-            if logLevel > 1:
-                print("INFO: Mission "
-                      + spaceEvent.subject
-                      + " departs orbit "
-                      + spaceEvent.object
-                      + " at x position "
-                      + str(xPos))
-            # Special case for Earth, all missions start here without an explicit ARRIVES.
-            if spaceEvent.object == "Earth":
-                orbit.addMission(subjectMission)
-            # Draw a mission line group on the SVG for all the missions in the orbit,
-            # note that for DEPARTS is is before the change is actually made.
-            timeSlip += orbit.draw(xPos)
-            orbit.removeMission(subjectMission)
-
-    elif spaceEvent.eventType == "ENDS":
-        # Find the mission object to which the event refers
-        try:
-            # Find the mission with the correct name from mission list
-            mi = missionList.index(spaceEvent.subject)
-            subjectMission = missionList[mi]
-            if logLevel > 1:
-                print("INFO: Mission: " + subjectMission.name + " ends.")
-            subjectMission.end(eventDate)
-            # Remove mission from global mission list, this will speed up future searches of this list.
-            try:
-                missionList.remove(subjectMission.name)
-            except ValueError:
-                print("Failed to remove mission " + subjectMission.name + " from global mission list")
-
-        except ValueError:
-            if logLevel > 0:
-                print("WARNING: Unable to end mission " + spaceEvent.subject + " as it does not exist right now")
-
-# Check that all the craft in our list have been drawn
-for c in craftList:
-    if c.drawFlag == 0:
-        if logLevel > 0:
-            print("WARNING: Craft " + c.name + " created but never drawn")
-
-# Resize the svg element to accomodate everything that's been drawn
-SVGElement.setAttribute("width", str(xPos + dayWidth * 2))
-
-# Draw the orbit backgrounds (same width as SVG)
-for orbit in orbitList:
-    orbit.drawOrbitRectangle(backgroundLayer, 0, xPos + dayWidth * 2)
-
-# Dump the detail panels to XML
-skCollectionRoot = outDoc.createElement("missionStates")
-codeE.appendChild(skCollectionRoot)
-for s in sf.skeleton.skeletonList:
-    skXML = s.toXml()
-    skCollectionRoot.appendChild(skXML)
-
-# Write out xml
-outFile = open("Output/SpaceFlightTimeLine.html", "w")
-# Write out. First string is indent of root, 2nd is indent of each sub-node, third is newline.
-outDoc.writexml(outFile, "", "    ", "\n")
-outFile.close()
+# The event list to draw. Either the xml event list or a tab-separated dump like those in Notebooks/data.
+eventListFile = 'Data/eventList.xml'
+craftListFile = 'Data/craftList.xml'
+# Keep a compiled binary copy of the event and craft lists next to the event list, so they only get parsed when they change.
+useSourceCache = True
+# Layout checkpoint file (None to switch off). The layout state is saved here at the end of the render. If the event list
+# has only had events added to the end since then, the next render carries on from the checkpoint instead of starting again.
+checkpointFile = None
+# Write the page in the compact format: relative path commands, short tokens for the detail panel ids, css classes for
+# the craft styles and a css rotation for the date labels, shorter detail panel data, and no indentation. Draws the same
+# but is a lot smaller and quicker to load.
+compactOutput = False
+# Simplify the paths as they are written out: straight runs that are collinear to within this many pixels are drawn as a
+# single line (arcs are left as they are), e.g. 0.05. None to write every vertex as it was drawn.
+simplifyTolerance = None
+# Cut the timeline into tiles this many pixels wide (None for one svg holding everything). The tiles are written to
+# files of their own in Output/tiles and the page fetches them as they're scrolled into view, so it opens just as quickly
+# however long the history is. Browsers won't fetch the tiles of a page opened straight from a file, it has to be
+# served, e.g. with python -m http.server in the Output folder.
+tileWidth = None
+# Also write overviews of the timeline scaled down across by each of these, e.g. (10, 100), to Output/overview<scale>.svg.
+# Ctrl + mouse wheel over the timeline zooms out to them (and back), clicking on one zooms back in to that date. Like the
+# tiles they're fetched, so the page has to be served.
+overviewScales = ()
+# Write the craft and traveler lines as binary geometry (Output/geometry.bin, with its index in Output/geometry.json) for
+# the page to draw on a canvas, rather than as svg. Scales to much bigger histories in the browser. The page has to be
+# served, and tileWidth is ignored.
+canvasOutput = False
+# Write a profile of the render to this file (None to switch off): the time spent in each phase and counts of the hot
+# paths (mission draws by the kind of bend, slip, transfer batches, lines and arcs drawn...) as JSON. An xml event list
+# without the source cache is read as it's laid out, so its parsing is timed as part of the layout phase.
+profileFile = None
+# Bounded memory mode: every this many events, draw the lines laid out so far and drop everything that won't be drawn in
+# again (the layout rows, the states of ended missions, the groups of craft and travelers idle since the time before),
+# so memory follows the number of missions in flight rather than the length of the history. None keeps it all till the
+# end, which is quicker. Gives the same page either way.
+retireWindow = None
+
+# Render the timeline in one go with the settings above (see renderer for rendering more than once in a process).
+timelineRenderer = rd.renderer(dayWidth, useSourceCache, compactOutput, simplifyTolerance, tileWidth, overviewScales,
+                               canvasOutput, retireWindow, logLevel)
+result = timelineRenderer.render(eventListFile, craftListFile, "Output", checkpointFile, profileFile)
 
 # List out what's remaining in memory at the end (this is just a quick little visual check)
 print("Missions remaining in memory at the end:")
-for o in orbitList:
-    print("Orbit: " + o.name)
-    for m in o.slots:
-        print("\tMission: " + m.name)
+for orbitName, missionNames in result["remainingMissions"]:
+    print("Orbit: " + orbitName)
+    for missionName in missionNames:
+        print("\tMission: " + missionName)
@@ -0,0 +1,43 @@
+import re
+
+####
+# Helpers for the tests: read svg path data (as pageWriter writes it, absolute or compact) back into absolute points, so
+# that the two formats can be checked to draw the same thing.
+
+commandArity = {"m": 2, "l": 2, "a": 7}
+tokenPattern = re.compile(r"[MmLlAa]|-?(?:\d+\.?\d*|\.\d+)")
+
+
+# Returns the points of svg path data as a list of (command, x, y), command being "M", "L" or "A" and x, y the absolute
+# end point (rounded to 1 decimal place, as the page's coordinates are).
+def pathPoints(data):
+    points = []
+    x = y = 0.0
+    command = None
+    numbers = []
+    for token in tokenPattern.findall(data):
+        if token.isalpha():
+            command = token
+            numbers = []
+            continue
+        numbers.append(float(token))
+        if len(numbers) < commandArity[command.lower()]:
+            continue
+        dx, dy = numbers[-2], numbers[-1]
+        if command.islower():
+            x, y = x + dx, y + dy
+        else:
+            x, y = dx, dy
+        points.append((command.upper(), round(x, 1), round(y, 1)))
+        numbers = []
+        # Pairs after a move carry on as lines.
+        if command == "m":
+            command = "l"
+        elif command == "M":
+            command = "L"
+    return points
+
+
+# Returns the d attributes of the paths in an svg document, in order.
+def documentPaths(text):
+    return re.findall(r"<path [^>]*\bd=\"([^\"]*)\"", text)
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import renderer as rd
+import syntheticHistory as sh
+from svgPaths import pathPoints, documentPaths
+
+####
+# Tests that the compact format draws the same lines as the normal one: a synthetic history is rendered both ways, and
+# the paths of each file written are read back into absolute points and compared. And that the tiles keep the ids of the
+# page unique.
+
+
+def renderBoth(tempDir, **settings):
+    generator = sh.historyGenerator(1500, seed=3)
+    eventListFile = os.path.join(tempDir, "events.xml")
+    craftListFile = os.path.join(tempDir, "craft.xml")
+    sh.writeXmlEvents(eventListFile, generator.records())
+    sh.writeXmlCraftList(craftListFile, generator.craftRecords)
+    outputDirs = []
+    for compact in (False, True):
+        outputDir = os.path.join(tempDir, "compact" if compact else "normal")
+        os.makedirs(outputDir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            rd.renderer(useSourceCache=False, compactOutput=compact, **settings).render(eventListFile, craftListFile,
+                                                                                      outputDir)
+        outputDirs.append(outputDir)
+    return outputDirs
+
+
+def filePoints(fileName):
+    with open(fileName) as f:
+        return [pathPoints(data) for data in documentPaths(f.read())]
+
+
+def testOverviewsDrawTheSamePoints(tmp_path):
+    normalDir, compactDir = renderBoth(str(tmp_path), overviewScales=(10, 100))
+    for scale in (10, 100):
+        fileName = "overview" + str(scale) + ".svg"
+        normal = filePoints(os.path.join(normalDir, fileName))
+        assert normal
+        # The overview paths are made up of several runs each, which is what the compact format has to get right.
+        assert any(sum(1 for point in points if point[0] == "M") > 1 for points in normal)
+        assert filePoints(os.path.join(compactDir, fileName)) == normal
+
+
+def testTilesDrawTheSamePoints(tmp_path):
+    normalDir, compactDir = renderBoth(str(tmp_path), tileWidth=2000)
+    tileNames = sorted(os.listdir(os.path.join(normalDir, "tiles")))
+    assert len(tileNames) > 1
+    assert sorted(os.listdir(os.path.join(compactDir, "tiles"))) == tileNames
+    clipped = False
+    for tileName in tileNames:
+        normal = filePoints(os.path.join(normalDir, "tiles", tileName))
+        clipped = clipped or any(sum(1 for point in points if point[0] == "M") > 1 for points in normal)
+        assert filePoints(os.path.join(compactDir, "tiles", tileName)) == normal
+    # Some of the paths are clipped into several runs.
+    assert clipped
+
+
+def testTileLabelIdsAreUnique(tmp_path):
+    normalDir, compactDir = renderBoth(str(tmp_path), tileWidth=2000)
+    ids = []
+    labels = 0
+    for tileName in os.listdir(os.path.join(normalDir, "tiles")):
+        with open(os.path.join(normalDir, "tiles", tileName)) as f:
+            text = f.read()
+        labels += text.count("<text ")
+        ids += re.findall(r"<text [^>]*\bid=\"([^\"]*)\"", text)
+    # The labels next to a tile are copied into it too, but only the tile a label belongs to gives it its id.
+    assert labels > len(ids)
+    assert len(set(ids)) == len(ids)
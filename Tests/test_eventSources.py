@@ -0,0 +1,109 @@
+import os
+import shutil
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import eventSources as es
+
+####
+# Tests of the compiled source cache: what's read back from it is what was written, and it's rebuilt when the sources
+# change.
+
+dataDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data")
+
+
+def copySources(tmp_path):
+    eventListFile = str(tmp_path / "eventList.xml")
+    craftListFile = str(tmp_path / "craftList.xml")
+    shutil.copy(os.path.join(dataDir, "eventList.xml"), eventListFile)
+    shutil.copy(os.path.join(dataDir, "craftList.xml"), craftListFile)
+    return eventListFile, craftListFile
+
+
+# The records of the sources parsed straight from the files, as an eventTable has them (an event with no object has "").
+def parsedSources(eventListFile, craftListFile):
+    records = es.tableFromRecords(es.openEventSource(eventListFile)).records()
+    return list(records), es.readXmlCraftList(craftListFile)
+
+
+def testCacheRoundTrip(tmp_path):
+    records = [(0, "SUPPORTS", "Station_1", "Mission_1"),
+               (86400, "DEPARTS", "Mission_1", "Earth"),
+               (86400, "ARRIVES", "Mission_1", "LEO"),
+               (-3000000000, "JOINS", "Traveller_ß", "Mission_1"),
+               (2 ** 40, "ENDS", "Mission_1", "")]
+    craftRecords = [("Station_1", 3, 120), ("Капсула", 1, 7)]
+    cacheName = str(tmp_path / "events.sftlcache")
+    digest = bytes(range(32))
+    es.writeCache(cacheName, digest, es.tableFromRecords(records), craftRecords)
+    table, cachedCraft = es.readCache(cacheName, digest)
+    assert list(table.records()) == records
+    assert cachedCraft == craftRecords
+    # Built from other sources.
+    assert es.readCache(cacheName, bytes(32)) is None
+
+
+def testEmptyCacheRoundTrip(tmp_path):
+    cacheName = str(tmp_path / "events.sftlcache")
+    es.writeCache(cacheName, bytes(32), es.tableFromRecords([]), [])
+    table, cachedCraft = es.readCache(cacheName, bytes(32))
+    assert len(table) == 0
+    assert cachedCraft == []
+
+
+def testDamagedCacheIsIgnored(tmp_path):
+    cacheName = str(tmp_path / "events.sftlcache")
+    records = [(0, "DEPARTS", "Mission_1", "Earth"), (10, "ARRIVES", "Mission_1", "LEO")]
+    es.writeCache(cacheName, bytes(32), es.tableFromRecords(records), [])
+    with open(cacheName, "r+b") as f:
+        f.truncate(os.path.getsize(cacheName) - 1)
+    assert es.readCache(cacheName, bytes(32)) is None
+    assert es.readCache(str(tmp_path / "missing.sftlcache"), bytes(32)) is None
+
+
+def testLoadCachedSourcesUsesTheCache(tmp_path, monkeypatch):
+    eventListFile, craftListFile = copySources(tmp_path)
+    expectedEvents, expectedCraft = parsedSources(eventListFile, craftListFile)
+    table, craftRecords = es.loadCachedSources(eventListFile, craftListFile)
+    assert list(table.records()) == expectedEvents
+    assert craftRecords == expectedCraft
+    assert os.path.exists(es.cacheFileName(eventListFile))
+
+    # The sources haven't changed, so the second load comes from the cache without parsing them.
+    def noParsing(fileName):
+        raise AssertionError("the event list was parsed")
+    monkeypatch.setattr(es, "iterXmlEvents", noParsing)
+    table, craftRecords = es.loadCachedSources(eventListFile, craftListFile)
+    assert isinstance(table.seconds, np.memmap)
+    assert list(table.records()) == expectedEvents
+    assert craftRecords == expectedCraft
+
+
+def testCacheIsRebuiltWhenTheSourcesChange(tmp_path):
+    eventListFile, craftListFile = copySources(tmp_path)
+    es.loadCachedSources(eventListFile, craftListFile)
+
+    # An event added to the end of the event list.
+    with open(eventListFile) as f:
+        text = f.read()
+    text = text.replace("</spaceEventList>", "\t<spaceEvent>\n\t\t<date>1971-08-09T00:00:00.000</date>\n"
+                        "\t\t<subject>Salyut_1</subject>\n\t\t<eventType>ENDS</eventType>\n\t</spaceEvent>\n"
+                        "</spaceEventList>")
+    with open(eventListFile, "w") as f:
+        f.write(text)
+    expectedEvents, expectedCraft = parsedSources(eventListFile, craftListFile)
+    table, craftRecords = es.loadCachedSources(eventListFile, craftListFile)
+    assert list(table.records()) == expectedEvents
+    assert expectedEvents[-1][1:3] == ("ENDS", "Salyut_1")
+
+    # A craft's crew capacity changed in the craft list.
+    with open(craftListFile) as f:
+        text = f.read()
+    with open(craftListFile, "w") as f:
+        f.write(text.replace("<CrewCapacity>3</CrewCapacity>", "<CrewCapacity>4</CrewCapacity>", 1))
+    expectedEvents, expectedCraft = parsedSources(eventListFile, craftListFile)
+    table, craftRecords = es.loadCachedSources(eventListFile, craftListFile)
+    assert craftRecords == expectedCraft
+    assert craftRecords[0][1] == 4
+    assert list(table.records()) == expectedEvents
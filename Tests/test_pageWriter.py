@@ -0,0 +1,163 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import pageWriter as pw
+from svgPaths import pathPoints
+
+####
+# Tests of the page writer's path serialisation, simplification and clipping, and of retired path groups.
+
+
+def makePath(*parts):
+    commands = []
+    coords = []
+    for command, values in parts:
+        commands.append(command)
+        coords.extend(values)
+    return np.array(commands, dtype=np.int8), np.array(coords, dtype=np.float64)
+
+
+def testRelativePathDataSingleRun():
+    commands, coords = makePath((pw.pathMove, (100.25, 250)), (pw.pathLine, (130, 274)),
+                                (pw.pathArc, (21, 1, 151, 295)), (pw.pathLine, (151, 502.5)))
+    data = pw.relativePathData(commands, coords)
+    assert data.startswith("M")
+    assert pathPoints(data) == pathPoints(pw.pathData(commands, coords))
+
+
+def testRelativePathDataSeveralMoves():
+    # Runs of a path clipped to a tile, or of several paths joined up for an overview.
+    commands, coords = makePath((pw.pathMove, (5000.3, 250)), (pw.pathLine, (5030, 274)),
+                                (pw.pathMove, (5100, 300.5)), (pw.pathLine, (5090, 310)),
+                                (pw.pathArc, (7, 0, 5097, 317)),
+                                (pw.pathMove, (4990, 12)), (pw.pathMove, (4995, 20)), (pw.pathLine, (4995, 40)))
+    data = pw.relativePathData(commands, coords)
+    # Only the first move is absolute.
+    assert data.count("M") == 1
+    assert data.count("m") == 3
+    points = pathPoints(data)
+    assert points == pathPoints(pw.pathData(commands, coords))
+    assert points[2] == ("M", 5100.0, 300.5)
+    assert points[5] == ("M", 4990.0, 12.0)
+
+
+def pathParts(commands, coords):
+    parts = []
+    values = coords.tolist()
+    i = 0
+    for command in commands.tolist():
+        n = 4 if command == pw.pathArc else 2
+        parts.append((command, tuple(values[i:i + n])))
+        i += n
+    return parts
+
+
+def simplified(tolerance, *parts):
+    commands, coords, removed = pw.simplifyPath(*makePath(*parts), tolerance)
+    return pathParts(commands, coords), removed
+
+
+def testSimplifyMergesCollinearRuns():
+    parts, removed = simplified(0.05, (pw.pathMove, (0, 0)), (pw.pathLine, (10, 0)), (pw.pathLine, (20, 0)),
+                                (pw.pathLine, (30, 0)))
+    assert parts == [(pw.pathMove, (0, 0)), (pw.pathLine, (30, 0))]
+    assert removed == 2
+
+
+def testSimplifyToleranceEdge():
+    # A vertex exactly tolerance from the merged line is dropped, one a little further is kept.
+    path = ((pw.pathMove, (0, 0)), (pw.pathLine, (10, 0.5)), (pw.pathLine, (20, 0)))
+    parts, removed = simplified(0.5, *path)
+    assert parts == [(pw.pathMove, (0, 0)), (pw.pathLine, (20, 0))]
+    assert removed == 1
+    parts, removed = simplified(0.49, *path)
+    assert parts == list(path)
+    assert removed == 0
+
+
+def testSimplifyKeepsEveryDroppedVertexInTolerance():
+    # (20, 0) is near enough the line to (30, -0.6), but (10, 0.5), dropped already, isn't.
+    parts, removed = simplified(0.5, (pw.pathMove, (0, 0)), (pw.pathLine, (10, 0.5)), (pw.pathLine, (20, 0)),
+                                (pw.pathLine, (30, -0.6)))
+    assert parts == [(pw.pathMove, (0, 0)), (pw.pathLine, (20, 0)), (pw.pathLine, (30, -0.6))]
+    assert removed == 1
+
+
+def testSimplifyKeepsTurnsBack():
+    # A line that turns back on itself is collinear, but the vertex it turns at is beyond the end of the merged line.
+    path = ((pw.pathMove, (0, 0)), (pw.pathLine, (10, 0)), (pw.pathLine, (5, 0)))
+    assert simplified(0.05, *path) == (list(path), 0)
+
+
+def testSimplifyLeavesArcsAlone():
+    # The vertices either end of the arc are in line with the lines before and after it, but stay.
+    path = ((pw.pathMove, (0, 0)), (pw.pathLine, (10, 0)), (pw.pathArc, (5, 1, 20, 0)), (pw.pathLine, (30, 0)),
+            (pw.pathMove, (40, 0)), (pw.pathLine, (50, 0)))
+    assert simplified(0.05, *path) == (list(path), 0)
+    # Lines after an arc are merged from its end.
+    parts, removed = simplified(0.05, (pw.pathMove, (0, 0)), (pw.pathArc, (5, 1, 10, 0)), (pw.pathLine, (20, 0)),
+                                (pw.pathLine, (30, 0)))
+    assert parts == [(pw.pathMove, (0, 0)), (pw.pathArc, (5, 1, 10, 0)), (pw.pathLine, (30, 0))]
+    assert removed == 1
+
+
+def clipped(x1, x2, *parts):
+    result = pw.clipPath(*makePath(*parts), x1, x2)
+    return None if result is None else pathParts(*result)
+
+
+def testClipKeepsLinesTouchingTheEdges():
+    # Lines that end exactly on either edge of the tile are kept, and joined up where they follow on from each other.
+    parts = clipped(100, 200, (pw.pathMove, (50, 0)), (pw.pathLine, (100, 0)), (pw.pathLine, (150, 5)),
+                    (pw.pathLine, (200, 5)), (pw.pathLine, (250, 5)))
+    assert parts == [(pw.pathMove, (50, 0)), (pw.pathLine, (100, 0)), (pw.pathLine, (150, 5)),
+                     (pw.pathLine, (200, 5)), (pw.pathLine, (250, 5))]
+
+
+def testClipStartsARunAtEachReentry():
+    # The path leaves the tile and comes back into it: each part in the tile is a run of its own, starting with a move
+    # to where its first line starts.
+    parts = clipped(100, 200, (pw.pathMove, (90, 0)), (pw.pathLine, (150, 0)), (pw.pathLine, (250, 10)),
+                    (pw.pathLine, (300, 10)), (pw.pathLine, (300, 20)), (pw.pathLine, (180, 20)))
+    assert parts == [(pw.pathMove, (90, 0)), (pw.pathLine, (150, 0)), (pw.pathLine, (250, 10)),
+                     (pw.pathMove, (300, 20)), (pw.pathLine, (180, 20))]
+
+
+def testClipDropsLinesOutsideTheTile():
+    parts = clipped(100, 200, (pw.pathMove, (0, 0)), (pw.pathLine, (99.9, 0)), (pw.pathLine, (99.9, 50)),
+                    (pw.pathLine, (120, 50)))
+    assert parts == [(pw.pathMove, (99.9, 50)), (pw.pathLine, (120, 50))]
+    assert clipped(100, 200, (pw.pathMove, (0, 0)), (pw.pathLine, (99.9, 0)), (pw.pathMove, (200.1, 0)),
+                   (pw.pathLine, (300, 0))) is None
+
+
+def testClipKeepsArcsReachingIntoTheTile():
+    # Both ends of the arc are left of the tile, but it bulges into it by up to its radius.
+    parts = clipped(100, 200, (pw.pathMove, (80, 0)), (pw.pathArc, (21, 1, 95, 10)), (pw.pathLine, (50, 10)))
+    assert parts == [(pw.pathMove, (80, 0)), (pw.pathArc, (21, 1, 95, 10))]
+    assert clipped(100, 200, (pw.pathMove, (70, 0)), (pw.pathArc, (5, 1, 75, 5))) is None
+
+
+def testRetiredGroupIsReadFromTheSpool():
+    layer = pw.groupLayer()
+    group = layer.addGroup([("id", "Mission_1")])
+    group.newPath(1, 0, 0)
+    group.lineTo(10, 0)
+    group.newPath(2, 10, 0)
+    group.arcTo(5, 1, 20, 0)
+    group.closePath()
+    records = list(group.pathRecords())
+    group.retire()
+    # The page writers can still read it, but it can't be drawn in until it's revived.
+    assert list(group.pathRecords()) == records
+    assert list(group.finishedPaths()[1]) == [1, 2]
+    with pytest.raises(AttributeError, match="Mission_1"):
+        group.newPath(3, 20, 0)
+    group.revive()
+    group.newPath(3, 20, 0)
+    group.lineTo(30, 0)
+    assert len(list(group.pathRecords())) == 3
+    assert list(group.panels) == [1, 2, 3]
@@ -0,0 +1,27 @@
+import contextlib
+import io
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import renderer as rd
+import syntheticHistory as sh
+
+####
+# Tests of the renderer on histories at the edges of what it's given.
+
+
+def testHistoryWithoutArrivalsOrDepartures(tmp_path):
+    # Nothing moves, so the timeline never gets past its start and the page is just wide enough for the date labels.
+    eventListFile = str(tmp_path / "events.xml")
+    craftListFile = str(tmp_path / "craft.xml")
+    sh.writeXmlEvents(eventListFile, [(0, "JOINS", "Traveller_1", "Mission_1"),
+                                      (86400, "LEAVES", "Traveller_1", "Mission_1")])
+    sh.writeXmlCraftList(craftListFile, [("Mission_1", 3, 120)])
+    with contextlib.redirect_stdout(io.StringIO()):
+        rd.renderer(useSourceCache=False).render(eventListFile, craftListFile, str(tmp_path))
+    with open(str(tmp_path / "SpaceFlightTimeLine.html")) as f:
+        text = f.read()
+    assert re.search(r"<SVG [^>]*\bwidth=\"20\"", text)
+    assert "id=\"Mission_1\"" in text
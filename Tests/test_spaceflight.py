@@ -0,0 +1,90 @@
+import os
+import random
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import spaceflight as sf
+
+####
+# Tests of the order-statistic tree behind the orbit slots (slotList), against a plain list doing the same.
+
+
+# Check the tree under node: sizes, parent pointers and priorities (a parent's is higher than its children's).
+# Returns the number of nodes.
+def checkTree(node, parent=None):
+    if node is None:
+        return 0
+    assert node.parent is parent
+    if not(parent is None):
+        assert node.priority < parent.priority
+    size = 1 + checkTree(node.left, node) + checkTree(node.right, node)
+    assert node.size == size
+    return size
+
+
+def checkAgainst(slots, nodes, expected):
+    assert len(slots) == len(expected)
+    assert list(slots) == expected
+    assert checkTree(slots.root) == len(expected)
+    for index, item in enumerate(expected):
+        assert slots[index] == item
+        assert sf.slotList.index(nodes[item]) == index
+
+
+def testInsertRemoveIndexAgainstList():
+    chooser = random.Random(7)
+    slots = sf.slotList()
+    expected = []
+    nodes = {}
+    for step in range(2000):
+        if expected and chooser.random() < 0.45:
+            item = chooser.choice(expected)
+            slots.remove(nodes.pop(item))
+            expected.remove(item)
+        else:
+            index = chooser.randint(0, len(expected))
+            nodes[step] = slots.insert(index, step)
+            expected.insert(index, step)
+        # Checking everything after every step is slow, so the first steps are checked each time and then every so often.
+        if step < 100 or step % 50 == 0:
+            checkAgainst(slots, nodes, expected)
+    checkAgainst(slots, nodes, expected)
+
+
+def testAppendAndIterateAfterChanges():
+    slots = sf.slotList()
+    nodes = {item: slots.append(item) for item in "abcde"}
+    assert list(slots) == list("abcde")
+    slots.remove(nodes["c"])
+    # The ordered list is rebuilt after a change.
+    assert list(slots) == list("abde")
+    nodes["x"] = slots.insert(0, "x")
+    assert list(slots) == list("xabde")
+    assert [sf.slotList.index(nodes[item]) for item in "xabde"] == [0, 1, 2, 3, 4]
+
+
+def testRemoveEverything():
+    slots = sf.slotList()
+    nodes = [slots.append(item) for item in range(50)]
+    random.Random(3).shuffle(nodes)
+    for node in nodes:
+        slots.remove(node)
+    assert len(slots) == 0
+    assert list(slots) == []
+    assert slots.root is None
+
+
+def testErrors():
+    slots = sf.slotList()
+    other = sf.slotList()
+    slots.append("a")
+    slots.append("b")
+    otherNode = other.append("c")
+    other.append("d")
+    with pytest.raises(IndexError):
+        slots[2]
+    with pytest.raises(IndexError):
+        slots[-1]
+    with pytest.raises(ValueError):
+        slots.remove(otherNode)
@@ -0,0 +1,282 @@
+import spaceflight as sf
+import eventSources as es
+import layoutTable as lt
+import renderProfile as rp
+
+logLevel = 0
+
+####
+# The event processor works through event records, keeping the registries of craft, travelers, missions and orbits up
+# to date and laying the missions out into its layout table. The date labels are drawn straight onto the grid lines layer,
+# the craft and traveler lines are drawn onto their layers from the table afterwards, by emit (see layoutTable). All of
+# the layout state that carries from one event to the next lives on the processor, along with the table and the layers it
+# draws onto, so a render can be stopped and carried on later (see layoutCheckpoint).
+
+secPerDay = 24 * 60 * 60
+
+
+# Returns a fresh registry of the orbits, top to bottom.
+def defaultOrbits():
+    return sf.registry([
+        sf.orbit("Heliocentric", 0, 15, "rgb(255,255,192)"),
+        sf.orbit("Lunar_Surface", 15, 15, "rgb(128,128,128)"),
+        sf.orbit("Lunar_Orbit", 30, 45, "rgb(192,192,192)"),
+        sf.orbit("Lunar_Flyby", 75, 20, "rgb(224,224,224)"),
+        sf.orbit("HEO", 95, 20, "rgb(224,224,255)"),
+        sf.orbit("LEO", 115, 350, "rgb(192,192,255)"),
+        sf.orbit("Sub_Orbital", 465, 20, "rgb(160,160,255)"),
+        sf.orbit("Earth", 485, 35, "rgb(160,255,160)")])
+
+
+# eventProcessor class
+# - startSeconds: date of the first event of the whole history (x = 0), as seconds since epoch.
+# - dayWidth: the number of pixels per day.
+# - gridLinesLayer: pageWriter.dateLabelLayer to draw the date labels onto.
+# - craftLayer, travelerLayer: pageWriter.groupLayers to draw the craft and traveler lines onto.
+# - skeletons: pageWriter.skeletonCollection to write the missions' detail skeletons to.
+# - sourceCraft: list of (name, crewCapacity, hue) of the known craft, created up front in this order.
+# - retireWindow: see retire.
+class eventProcessor:
+    def __init__(self, startSeconds, dayWidth, gridLinesLayer, craftLayer, travelerLayer, skeletons, sourceCraft=(),
+                 retireWindow=None):
+        self.startSeconds = startSeconds
+        self.startDate = es.secondsToDate(startSeconds)
+        # Ratio between the time difference in seconds and the draw grid.
+        self.xRatio = secPerDay / dayWidth
+        # A stretching of the x-axis in pixels to accomodate things that don't fit
+        self.timeSlip = 0
+        # x position of the most recent ARRIVES/DEPARTS event
+        self.xPos = None
+        self.gridLinesLayer = gridLinesLayer
+        self.craftLayer = craftLayer
+        self.travelerLayer = travelerLayer
+        self.skeletons = skeletons
+        # Where the missions are laid out to, and what draws them from there.
+        self.layout = lt.layoutTable()
+        self.emitter = lt.emitter(self.layout)
+        # Bounded memory mode: every retireWindow events, draw what's been laid out and drop it (see retire). None to
+        # keep everything till the end.
+        self.retireWindow = retireWindow
+        self.eventsSinceRetire = 0
+        # Registries of all the craft, travelers and (active) missions, looked up by name.
+        self.craftList = sf.registry()
+        self.travelerList = sf.registry()
+        self.missionList = sf.registry()
+        self.orbitList = defaultOrbits()
+        self.lastGridLineTime = self.startDate
+        # (year, x) of the first date label drawn in each year, to mark the years on the overviews.
+        self.yearMarks = []
+        self.activeTransferBatch = None
+        self.eventDate = self.startDate
+        self.lastEventSeconds = startSeconds
+        # Turn the craft list into a list of python craft objects
+        for craftName, crewCapacity, craftHue in sourceCraft:
+            newCraft = sf.craft(craftName, craftLayer, crewCapacity * 7, craftHue)
+            self.craftList.add(newCraft)
+
+    # Draw a date label for a grid line. The label reads downwards from just left of the date, so it covers about 10
+    # pixels either side of it.
+    def drawdate(self, date):
+        timeD = date - self.startDate
+        secsFromStart = timeD.total_seconds()
+        xPosition = secsFromStart / self.xRatio + self.timeSlip
+        self.gridLinesLayer.addLabel(round(xPosition - 5), date, xPosition - 10, xPosition + 10)
+        if not self.yearMarks or self.yearMarks[-1][0] != date.year:
+            self.yearMarks.append((date.year, xPosition))
+
+    # Emission phase: draw the craft and traveler lines of everything laid out since the last emit.
+    # - workers: 2 or more draws the layers in separate processes, at the same time.
+    def emit(self, workers=0):
+        self.emitter.emit(workers=workers)
+
+    # Draw everything laid out so far and drop what can't be drawn in again from memory: the rows of the layout table,
+    # the mission states no active mission is in, and the groups of the components that have been idle for a whole
+    # window (see layoutTable.emitter.retire). The paths and skeletons finished by then are already in the spools.
+    # Apart from a little bookkeeping per craft and traveler (their registry entries and group stubs), what's left in
+    # memory follows the number of missions active at a time rather than the length of the history.
+    def retire(self):
+        self.emit()
+        self.emitter.retire(self.liveStates())
+        self.eventsSinceRetire = 0
+
+    # The mission states that can still be drawn in: those of the active missions.
+    def liveStates(self):
+        liveStates = []
+        for m in self.missionList:
+            liveStates.append(m.currentState)
+            if not(m.lastState is None):
+                liveStates.append(m.lastState)
+        return liveStates
+
+    # Layout phase: process a stream of event records (seconds, eventType, subject, object). Nothing is drawn onto the craft
+    # and traveler layers until emit is called.
+    def process(self, records):
+        for eventSeconds, eventType, eventSubject, eventObject in records:
+            if rp.state.enabled:
+                rp.count("events." + eventType)
+            if not(self.retireWindow is None):
+                self.eventsSinceRetire += 1
+                if self.eventsSinceRetire > self.retireWindow:
+                    self.retire()
+            # Update the X position at which we're writing using the date of the event.
+            # Only build a python datetime when the date actually changes, most events share their date with the one before.
+            if eventSeconds != self.lastEventSeconds:
+                self.eventDate = es.secondsToDate(eventSeconds)
+                self.lastEventSeconds = eventSeconds
+
+            # Various conditions under which an active transfer batch should be executed and deleted.
+            # - Date has moved on.
+            # - Event type is not either SUPPORTS or JOINS
+            if not(self.activeTransferBatch is None):
+                if self.activeTransferBatch.date != self.eventDate or not (
+                        eventType == "SUPPORTS" or eventType == "JOINS"):
+                    # Use the batch's date to work out where on the x-axis to draw the batched events. Note that transfer events don't change the y-axis value of missions, only their components.
+                    timeDiff = self.activeTransferBatch.date - self.startDate
+                    secondsFromStart = timeDiff.total_seconds()
+                    executionXPos = secondsFromStart / self.xRatio + self.timeSlip
+                    self.timeSlip += self.activeTransferBatch.execute(executionXPos)
+                    self.activeTransferBatch = None
+
+            # If a grid line has not yet been drawn for this time point,
+            # draw one, and also fill in all those since the last time point.
+            if self.lastGridLineTime != self.eventDate:
+                self.drawdate(self.eventDate)
+                self.lastGridLineTime = self.eventDate
+
+            if eventType == "SUPPORTS":
+                # Check to see if a transfer batch is active, if not, create a new one.
+                if self.activeTransferBatch is None:
+                    self.activeTransferBatch = sf.transferBatch(self.eventDate)
+                # Find the craft object, or create a new one and add it to the list
+                try:
+                    subjectCraft = self.craftList[eventSubject]  # Find the craft with the correct name from craft list
+                except KeyError:  # IF there isn't one, create one.
+                    subjectCraft = sf.craft(eventSubject, self.craftLayer)
+                    self.craftList.add(subjectCraft)
+                    if logLevel > 0:
+                        print("WARNING: Craft missing from imported craft list: " + subjectCraft.name)
+                # Find the mission object to which the event refers
+                try:
+                    objectMission = self.missionList[eventObject]  # Find the mission with the correct name from mission list
+                except KeyError:  # IF there isn't one, create one.
+                    objectMission = sf.mission(eventObject, self.layout, self.skeletons)
+                    self.missionList.add(objectMission)
+                # Add a supports entry to the transfer batch
+                self.activeTransferBatch.addSupports(subjectCraft, objectMission)
+                # If the craft is already assigned to a mission, find it and use it to create an unSupport entry.
+                if not(subjectCraft.mission is None):
+                    try:
+                        craftMission = self.missionList[subjectCraft.mission]  # Find the mission with the correct name from mission list
+                    except KeyError:
+                        print("ERROR: Craft "
+                              + subjectCraft.name
+                              + " is assigned to a mission "
+                              + subjectCraft.mission
+                              + " that cannot be found in master mission list")
+                    else:
+                        self.activeTransferBatch.addUnSupports(subjectCraft, craftMission)
+
+            elif eventType == "JOINS":
+                # Check to see if a transfer batch is active, if not, create a new one.
+                if self.activeTransferBatch is None:
+                    self.activeTransferBatch = sf.transferBatch(self.eventDate)
+                # Find the traveler object, or create a new one and add it to the list
+                try:
+                    subjectTraveler = self.travelerList[eventSubject]  # Find the traveler with the correct name from traveler list
+                except KeyError:  # IF there isn't one, create one.
+                    subjectTraveler = sf.traveler(eventSubject, self.travelerLayer)
+                    self.travelerList.add(subjectTraveler)
+                # Find the mission object to which the event refers
+                try:
+                    objectMission = self.missionList[eventObject]  # Find the mission with the correct name from mission list
+                except KeyError:  # IF there isn't one, create one.
+                    objectMission = sf.mission(eventObject, self.layout, self.skeletons)
+                    self.missionList.add(objectMission)
+                # Add a joins entry to the transfer batch
+                self.activeTransferBatch.addJoins(subjectTraveler, objectMission)
+                # If the traveler is already assigned to a mission, find it and use it to create a leaves entry.
+                if not(subjectTraveler.mission is None):
+                    try:
+                        travelerMission = self.missionList[subjectTraveler.mission]  # Find the mission with the correct name from mission list
+                    except KeyError:
+                        print("ERROR: Traveler "
+                              + subjectTraveler.name
+                              + " is assigned to a mission "
+                              + subjectTraveler.mission
+                              + " that cannot be found in master mission list")
+                    else:
+                        self.activeTransferBatch.addLeaves(subjectTraveler, travelerMission)
+
+            elif eventType == "ARRIVES" or eventType == "DEPARTS":
+                # Executing a transfer batch will right shift following events as it takes up space,
+                # the self.timeSlip variable catches this, include it when calculating the x-axis position of these events.
+                self.xPos = (eventSeconds - self.startSeconds) / self.xRatio + self.timeSlip
+
+                # Find the mission object to which the event refers
+                try:
+                    subjectMission = self.missionList[eventSubject]  # Find the mission with the correct name from mission list
+                except KeyError:  # IF there isn't one, create one.
+                    subjectMission = sf.mission(eventSubject, self.layout, self.skeletons)
+                    self.missionList.add(subjectMission)
+
+                # Find the orbit
+                try:
+                    orbit = self.orbitList[eventObject]
+                except KeyError:
+                    print("ERROR: Mission " + eventSubject + ": Orbit " + eventObject + " is not defined.")
+                    orbit = None
+
+                if not(orbit is None) and eventType == "ARRIVES":
+                    if logLevel > 1:
+                        print(
+                            "INFO: Mission "
+                            + eventSubject
+                            + " arrives at orbit "
+                            + eventObject
+                            + " at x position "
+                            + str(self.xPos))
+                    orbit.addMission(subjectMission)
+                    # Draw a mission line group on the SVG for all the missions in the orbit.
+                    self.timeSlip += orbit.draw(self.xPos)
+                    # Special extra bit for arriving back on Earth, ends mission without an explicit END.
+                    if eventObject == "Earth":
+                        subjectMission.end(self.eventDate)
+                        # Remove mission from global mission list, a later mission with the same name is a new mission.
+                        try:
+                            self.missionList.remove(subjectMission.name)
+                        except KeyError:
+                            print("Failed to remove mission " + subjectMission.name + " from global mission list")
+
+                elif not(orbit is None) and eventType == "DEPARTS":
+                    if logLevel > 1:
+                        print("INFO: Mission "
+                              + eventSubject
+                              + " departs orbit "
+                              + eventObject
+                              + " at x position "
+                              + str(self.xPos))
+                    # Special case for Earth, all missions start here without an explicit ARRIVES.
+                    if eventObject == "Earth":
+                        orbit.addMission(subjectMission)
+                    # Draw a mission line group on the SVG for all the missions in the orbit,
+                    # note that for DEPARTS is is before the change is actually made.
+                    self.timeSlip += orbit.draw(self.xPos)
+                    orbit.removeMission(subjectMission)
+
+            elif eventType == "ENDS":
+                # Find the mission object to which the event refers
+                try:
+                    # Find the mission with the correct name from mission list
+                    subjectMission = self.missionList[eventSubject]
+                    if logLevel > 1:
+                        print("INFO: Mission: " + subjectMission.name + " ends.")
+                    subjectMission.end(self.eventDate)
+                    # Remove mission from global mission list, a later mission with the same name is a new mission.
+                    try:
+                        self.missionList.remove(subjectMission.name)
+                    except KeyError:
+                        print("Failed to remove mission " + subjectMission.name + " from global mission list")
+
+                except KeyError:
+                    if logLevel > 0:
+                        print("WARNING: Unable to end mission " + eventSubject + " as it does not exist right now")
@@ -0,0 +1,277 @@
+import csv
+import hashlib
+import os
+import struct
+import tempfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+import numpy as np
+
+####
+# Readers that turn the various event list formats into a stream of events for the renderer.
+# Whatever the source format, the renderer consumes event records: (seconds, eventType, subject, object) tuples,
+# where seconds is the number of whole seconds since epochDate.
+
+epochDate = datetime.fromisoformat("1970-01-01T00:00:00.000")
+
+
+# SpaceEvent class
+# Built from a single <spaceEvent> element (ElementTree flavour, as produced by iterparse).
+class SpaceEvent:
+    def __init__(self, xmlevent):
+        self.subject = None
+        self.object = None  # ENDS events have no object
+        for f in xmlevent:
+            if f.tag == 'date':
+                self.date = datetime.fromisoformat(f.text)
+            elif f.tag == 'subject':
+                self.subject = f.text
+            elif f.tag == 'eventType':
+                self.eventType = f.text
+            elif f.tag == 'object':
+                self.object = f.text
+
+    def print(self):
+        print('Date: ' + self.date.strftime("%d/%m/%Y"))
+        print('Subject: ' + self.subject)
+        print('Event Type: ' + self.eventType)
+        if self.eventType != 'ENDS':
+            print('Object: ' + self.object)
+
+
+# Generator that reads an xml event list incrementally, yielding one SpaceEvent at a time.
+# Each <spaceEvent> element is discarded as soon as it has been turned into an object, so the parser never holds more than
+# the event currently being read. Anything the caller wants to keep (e.g. the active transfer batch) is its own business.
+def iterXmlEvents(fileName):
+    root = None
+    for xmlEvent, element in ElementTree.iterparse(fileName, events=("start", "end")):
+        if xmlEvent == "start":
+            # Grab the document root on the way in so that finished events can be detached from it.
+            if root is None:
+                root = element
+        elif element.tag == 'spaceEvent':
+            yield SpaceEvent(element)
+            element.clear()
+            root.clear()
+
+
+# Converts a python datetime into the whole seconds since epoch used by event records.
+def dateToSeconds(date):
+    return int((date - epochDate).total_seconds())
+
+
+# Converts the seconds of an event record back into a python datetime.
+def secondsToDate(seconds):
+    return epochDate + timedelta(seconds=seconds)
+
+
+# Generator that turns a stream of SpaceEvent objects into event records.
+def spaceEventRecords(spaceEvents):
+    for spaceEvent in spaceEvents:
+        yield dateToSeconds(spaceEvent.date), spaceEvent.eventType, spaceEvent.subject, spaceEvent.object
+
+
+# eventTable class - a columnar, in-memory event list.
+# - seconds: int64 array of event dates as seconds since epoch.
+# - typeCodes, subjectCodes, objectCodes: integer arrays of codes into the string tables below.
+# - eventTypes: string table for typeCodes.
+# - names: string table shared by subjectCodes and objectCodes, so a mission has the same code whether it is the subject or object of an event.
+class eventTable:
+    def __init__(self, seconds, typeCodes, subjectCodes, objectCodes, eventTypes, names):
+        self.seconds = seconds
+        self.typeCodes = typeCodes
+        self.subjectCodes = subjectCodes
+        self.objectCodes = objectCodes
+        self.eventTypes = eventTypes
+        self.names = names
+
+    def __len__(self):
+        return len(self.seconds)
+
+    # Generator of event records. The arrays are converted to python lists in one go, which is much cheaper than indexing numpy arrays one element at a time.
+    def records(self):
+        eventTypes = self.eventTypes
+        names = self.names
+        for seconds, t, s, o in zip(self.seconds.tolist(),
+                                    self.typeCodes.tolist(),
+                                    self.subjectCodes.tolist(),
+                                    self.objectCodes.tolist()):
+            yield seconds, eventTypes[t], names[s], names[o]
+
+
+# Load a tab-separated event list (as dumped by the notebooks) into an eventTable.
+# The file has a header line (date, subject, eventType, object). Dates may be plain dates or full ISO timestamps.
+def loadTsvEvents(fileName):
+    with open(fileName, newline='', encoding='utf-8') as tsvFile:
+        reader = csv.reader(tsvFile, delimiter='\t')
+        next(reader)  # Skip the header
+        rows = [row for row in reader if row]
+    # Pad out any short rows (e.g. ENDS events with the trailing object column missing)
+    columns = np.array([(row + ['', '', '', ''])[:4] for row in rows], dtype=str).reshape(-1, 4)
+    seconds = columns[:, 0].astype('datetime64[s]').astype(np.int64)
+    eventTypes, typeCodes = np.unique(columns[:, 2], return_inverse=True)
+    # Subject and object share one string table, so encode them together then split the codes back out.
+    names, nameCodes = np.unique(columns[:, [1, 3]], return_inverse=True)
+    nameCodes = nameCodes.reshape(-1, 2)
+    return eventTable(seconds,
+                      typeCodes.astype(np.int32),
+                      np.ascontiguousarray(nameCodes[:, 0], dtype=np.int32),
+                      np.ascontiguousarray(nameCodes[:, 1], dtype=np.int32),
+                      eventTypes.tolist(),
+                      names.tolist())
+
+
+# Build an eventTable from a stream of event records (e.g. a streamed xml event list), interning strings as they are met.
+def tableFromRecords(records):
+    strings = []
+    stringCodes = {}
+    columns = ([], [], [], [])
+
+    def intern(text):
+        if text is None:
+            text = ''
+        code = stringCodes.get(text)
+        if code is None:
+            code = len(strings)
+            stringCodes[text] = code
+            strings.append(text)
+        return code
+
+    for seconds, eventType, subject, obj in records:
+        columns[0].append(seconds)
+        columns[1].append(intern(eventType))
+        columns[2].append(intern(subject))
+        columns[3].append(intern(obj))
+    return eventTable(np.array(columns[0], dtype=np.int64),
+                      np.array(columns[1], dtype=np.int32),
+                      np.array(columns[2], dtype=np.int32),
+                      np.array(columns[3], dtype=np.int32),
+                      strings,
+                      strings)
+
+
+# Read the xml craft list into a list of (name, crewCapacity, hue) tuples.
+def readXmlCraftList(fileName):
+    craftRecords = []
+    for xmlCraft in ElementTree.parse(fileName).getroot().iter('craft'):
+        craftRecords.append((xmlCraft.findtext('name'),
+                             int(xmlCraft.findtext('CrewCapacity')),
+                             int(xmlCraft.findtext('Hue'))))
+    return craftRecords
+
+
+# Open an event list file as a stream of event records, choosing the reader from the file extension.
+# xml files are streamed, tab-separated (.txt, .tsv) files are loaded into an eventTable first.
+def openEventSource(fileName):
+    if fileName.endswith(".txt") or fileName.endswith(".tsv"):
+        return loadTsvEvents(fileName).records()
+    return spaceEventRecords(iterXmlEvents(fileName))
+
+
+####
+# Compiled source cache
+# Parsing the event and craft lists is the bulk of the start up time for big histories, and they rarely change between renders.
+# The cache is a single binary file, laid out as:
+# - Header: magic, sha256 of the source files, length of the string blob, number of events, number of craft.
+# - String blob: every string used by the events and craft, utf-8 encoded, interned and separated by NUL bytes.
+# - Event table: packed cacheEventRecord structs, in event order.
+# - Craft table: packed cacheCraftRecord structs, in craft list order.
+# The two tables are memory mapped when the cache is loaded so nothing is read until the renderer gets to it.
+
+cacheMagic = b"SFTLCAC1"
+cacheHeader = struct.Struct("<8s32sQQQ")
+cacheEventRecord = np.dtype([("seconds", "<i8"), ("type", "<i4"), ("subject", "<i4"), ("object", "<i4")])
+cacheCraftRecord = np.dtype([("name", "<i4"), ("crewCapacity", "<i4"), ("hue", "<i4")])
+
+
+# Hash of all the source files that go into a cache (and the cache layout itself, so that changing it invalidates old caches).
+def sourceHash(fileNames):
+    h = hashlib.sha256(cacheMagic)
+    for fileName in fileNames:
+        with open(fileName, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.digest()
+
+
+# The cache for an event list lives next to it.
+def cacheFileName(eventFileName):
+    return eventFileName + ".sftlcache"
+
+
+# Write an eventTable and craft list out as a cache file. Written to a temporary file first so a half written cache can never be picked up.
+# The temporary file has a name of its own, so renders of the same event list at the same time can't write into each
+# other's.
+def writeCache(cacheName, digest, table, craftRecords):
+    # Re-intern the event strings and the craft names into a single string table.
+    strings = []
+    stringCodes = {}
+    for text in list(table.eventTypes) + list(table.names) + [c[0] for c in craftRecords]:
+        if text not in stringCodes:
+            stringCodes[text] = len(strings)
+            strings.append(text)
+    typeMap = np.array([stringCodes[t] for t in table.eventTypes], dtype=np.int32)
+    nameMap = np.array([stringCodes[n] for n in table.names], dtype=np.int32)
+
+    events = np.empty(len(table), dtype=cacheEventRecord)
+    events["seconds"] = table.seconds
+    events["type"] = typeMap[table.typeCodes]
+    events["subject"] = nameMap[table.subjectCodes]
+    events["object"] = nameMap[table.objectCodes]
+    craft = np.array([(stringCodes[c[0]], c[1], c[2]) for c in craftRecords], dtype=cacheCraftRecord)
+
+    blob = "\0".join(strings).encode("utf-8")
+    handle, tmpName = tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(cacheName) + ".",
+                                       dir=os.path.dirname(cacheName) or ".")
+    with os.fdopen(handle, "wb") as f:
+        f.write(cacheHeader.pack(cacheMagic, digest, len(blob), len(events), len(craft)))
+        f.write(blob)
+        f.write(events.tobytes())
+        f.write(craft.tobytes())
+    os.replace(tmpName, cacheName)
+
+
+# Read a cache file. Returns (eventTable, craftRecords), or None if the file is missing, damaged or was built from different sources.
+def readCache(cacheName, digest):
+    try:
+        with open(cacheName, "rb") as f:
+            magic, cachedDigest, blobLength, nEvents, nCraft = cacheHeader.unpack(f.read(cacheHeader.size))
+            if magic != cacheMagic or cachedDigest != digest:
+                return None
+            strings = f.read(blobLength).decode("utf-8").split("\0")
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+    eventsOffset = cacheHeader.size + blobLength
+    craftOffset = eventsOffset + nEvents * cacheEventRecord.itemsize
+    if os.path.getsize(cacheName) != craftOffset + nCraft * cacheCraftRecord.itemsize:
+        return None
+    if nEvents > 0:
+        events = np.memmap(cacheName, dtype=cacheEventRecord, mode="r", offset=eventsOffset, shape=(nEvents,))
+    else:
+        events = np.empty(0, dtype=cacheEventRecord)
+    craft = np.fromfile(cacheName, dtype=cacheCraftRecord, count=nCraft, offset=craftOffset)
+    table = eventTable(events["seconds"], events["type"], events["subject"], events["object"], strings, strings)
+    craftRecords = [(strings[c["name"]], int(c["crewCapacity"]), int(c["hue"])) for c in craft]
+    return table, craftRecords
+
+
+# Load the event and craft lists through the cache.
+# If the cache matches the current sources it is used as is, otherwise the sources are parsed and the cache rebuilt.
+# Returns (eventTable, craftRecords).
+def loadCachedSources(eventFileName, craftFileName):
+    cacheName = cacheFileName(eventFileName)
+    digest = sourceHash([eventFileName, craftFileName])
+    cached = readCache(cacheName, digest)
+    if cached is not None:
+        return cached
+    if eventFileName.endswith(".txt") or eventFileName.endswith(".tsv"):
+        table = loadTsvEvents(eventFileName)
+    else:
+        table = tableFromRecords(spaceEventRecords(iterXmlEvents(eventFileName)))
+    craftRecords = readXmlCraftList(craftFileName)
+    try:
+        writeCache(cacheName, digest, table, craftRecords)
+    except OSError as e:
+        # Not being able to write the cache shouldn't stop the render.
+        print("WARNING: Unable to write source cache " + cacheName + ": " + str(e))
+    return table, craftRecords
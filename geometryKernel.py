@@ -0,0 +1,119 @@
+import math
+import numpy as np
+
+####
+# Geometry kernel: the 2d vector operations the mission lines are laid out with.
+# Every function takes vectors in either of two forms and has a backend for each:
+# - A single vector is a tuple (x, y). These are worked out with plain python floats. For two numbers the overhead of a
+#   numpy call is many times the arithmetic, and mission.draw does a dozen or so of these for every bend.
+# - Many vectors at once are a numpy array with the x and y in its last axis (e.g. shape (n, 2)). These are worked out
+#   with one numpy operation per step for the whole array.
+# Both backends do the same arithmetic in the same order, so a vector gives exactly the same answer whichever form it is
+# passed in (including the signs of any zeros).
+
+
+# Make an array of vectors from arrays of their x and y.
+def pair(shape, x, y):
+    out = np.empty(shape)
+    out[..., 0] = x
+    out[..., 1] = y
+    return out
+
+
+# Make a single vector.
+def vector(x, y):
+    return (float(x), float(y))
+
+
+# Sum of two vectors.
+def add(a, b):
+    if type(a) is tuple:
+        return (a[0] + b[0], a[1] + b[1])
+    return np.add(a, b)
+
+
+# Difference of two vectors, a - b.
+def subtract(a, b):
+    if type(a) is tuple:
+        return (a[0] - b[0], a[1] - b[1])
+    return np.subtract(a, b)
+
+
+# Vector multiplied by a scalar (or, for arrays, by an array of scalars, one for each vector).
+def scale(a, k):
+    if type(a) is tuple:
+        return (a[0] * k, a[1] * k)
+    return a * np.asarray(k)[..., None]
+
+
+# Scalar (dot) product of two vectors.
+def dot(a, b):
+    if type(a) is tuple:
+        return a[0] * b[0] + a[1] * b[1]
+    return a[..., 0] * b[..., 0] + a[..., 1] * b[..., 1]
+
+
+# Rotate clockwise 90 deg
+# The zero products are kept so that the signs of zeros come out as they would from multiplying by a rotation matrix.
+def rotCW90(a):
+    if type(a) is tuple:
+        x, y = a
+        return (y + x * 0.0, y * 0.0 - x)
+    x = a[..., 0]
+    y = a[..., 1]
+    return pair(a.shape, y + x * 0.0, y * 0.0 - x)
+
+
+# Rotate clockwise 180 deg
+def rotCW180(a):
+    if type(a) is tuple:
+        x, y = a
+        return (y * 0.0 - x, x * 0.0 - y)
+    x = a[..., 0]
+    y = a[..., 1]
+    return pair(a.shape, y * 0.0 - x, x * 0.0 - y)
+
+
+# Rotate clockwise 270 deg
+def rotCW270(a):
+    if type(a) is tuple:
+        x, y = a
+        return (x * 0.0 - y, x + y * 0.0)
+    x = a[..., 0]
+    y = a[..., 1]
+    return pair(a.shape, x * 0.0 - y, x + y * 0.0)
+
+
+# Returns the length of the vector
+def eDist(a):
+    if type(a) is tuple:
+        x, y = a
+        return math.sqrt(x * x + y * y)
+    x = a[..., 0]
+    y = a[..., 1]
+    return np.sqrt(x * x + y * y)
+
+
+# Returns a vector with Euclidean distance of 1 but the same direction as the input (provided the vector actually has
+# direction, i.e. is not zero distance, zero vectors are returned as they are)
+def unity(a):
+    if type(a) is tuple:
+        length = eDist(a)
+        if length > 0:
+            return (a[0] / length, a[1] / length)
+        return a
+    length = eDist(a)
+    return a / np.where(length > 0, length, 1.0)[..., None]
+
+
+# Points spaced out along a line: start + offset * direction for each of a list of offsets.
+# start and direction are single vectors. A list of offsets gives a list of single vectors, an array of offsets gives an
+# array of shape (len(offsets), 2). For the handful of points in a line group the list is the quicker of the two.
+def offsetPoints(start, direction, offsets):
+    if type(offsets) is list:
+        x, y = start
+        dx, dy = direction
+        return [(x + dx * offset, y + dy * offset) for offset in offsets]
+    points = np.multiply.outer(offsets, direction)
+    points += start
+    return points
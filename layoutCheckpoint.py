@@ -0,0 +1,67 @@
+import hashlib
+import pickle
+
+####
+# Layout checkpoints for incremental (append only) rendering.
+# At the end of a render the layout state (the eventProcessor, with timeSlip, registries of craft/travelers/missions/orbits
+# with all their pen and slot state, any open transfer batch...) is pickled together with the geometry drawn so far (the
+# processor's layers and the skeleton collection, spools and all). A later render of the same event list with extra
+# events on the end can then load the checkpoint, skip the events it already covers, and lay out only the new ones on
+# top of the existing geometry.
+# A checkpoint is only used if the render settings match and the event list still starts with exactly the events it covers.
+
+checkpointVersion = 18
+
+
+# eventLog class - counts and hashes event records as they are consumed, so a checkpoint can tell if an event list has only been appended to.
+class eventLog:
+    def __init__(self):
+        self.count = 0
+        self.hash = hashlib.sha256()
+
+    # Generator that passes event records through, logging each one.
+    def wrap(self, records):
+        for record in records:
+            seconds, eventType, subject, obj = record
+            self.hash.update(("%d\t%s\t%s\t%s\n" % (seconds, eventType, subject or '', obj or '')).encode('utf-8'))
+            self.count += 1
+            yield record
+
+    def digest(self):
+        return self.hash.hexdigest()
+
+
+# Save a checkpoint.
+# - settings: anything that changes the layout (dayWidth etc.) A checkpoint is only reused with identical settings.
+# - log: the eventLog of all the events the render consumed.
+# - state: dict of layout state to be pickled, including everything that has been drawn.
+def saveCheckpoint(fileName, settings, log, state):
+    checkpoint = {
+        "version": checkpointVersion,
+        "settings": settings,
+        "eventCount": log.count,
+        "eventDigest": log.digest(),
+        "state": state}
+    with open(fileName, "wb") as f:
+        pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+
+
+# Load a checkpoint. Returns None if there isn't one, it can't be read, or it was made with different settings.
+def loadCheckpoint(fileName, settings):
+    try:
+        with open(fileName, "rb") as f:
+            checkpoint = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if checkpoint.get("version") != checkpointVersion or checkpoint.get("settings") != settings:
+        return None
+    return checkpoint
+
+
+# Consume the events a checkpoint covers from a logged event stream.
+# Returns True if the stream started with exactly those events, i.e. the checkpoint can be resumed from.
+def skipCoveredEvents(checkpoint, log, records):
+    for _ in range(checkpoint["eventCount"]):
+        if next(records, None) is None:
+            return False
+    return log.digest() == checkpoint["eventDigest"]
@@ -0,0 +1,363 @@
+import copy
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import geometryKernel as gk
+import pageWriter as pw
+import renderProfile as rp
+
+logLevel = 0
+
+####
+# Two phase layout: working out where everything goes, then drawing it.
+# - Layout: the event processor works out where every mission goes. Each time a mission's line group is placed (its
+#   centre and direction at a draw point, or the start of a bend) a row is added to the layoutTable, along with the mission
+#   state it was placed in. Nothing is drawn. Everything that decides timeSlip (bends, slips...) happens in this phase,
+#   including the choice of bend style.
+# - Emission: an emitter goes through the rows and draws the lines of the craft and travelers in each line group into
+#   their groups on the craft and traveler layers.
+# The table is plain arrays, so it's compact and cheap to pickle or send to another process. A component's lines depend
+# on nothing but the rows its states are in, so each layer can be emitted on its own: at the same time as the others (in
+# separate processes), again into other layers, or timed on its own.
+# In bounded memory mode (see eventProcessor.retire) the rows are emitted as the layout goes along, and once emitted
+# are dropped from the table, along with the states no mission is in any more (see layoutTable.compact). Row and state
+# indexes carry on counting from where they were, so the table only holds the rows and states since the last compact.
+
+rowDraw = 0  # Row of a line group being placed. ref is the state, coords the centre and line group vector, turn the turnTest
+rowLift = 1  # Row of a component's pen being lifted (its mission has ended), so its next line starts afresh. ref is the component
+
+
+# layoutTable class - the output of the layout phase.
+# - Components: the layer (index into layers) and group (index into that layer's groups) each draws into, and its name.
+# - States: for each mission state its detail panel id, width and the components of its line group with their offsets
+#   (see missionState), the line groups of all the states being kept end to end in memberComponents/memberOffsets.
+# - Rows: kind, ref and turn of each row, with its x, y, vx, vy in rowCoords.
+# Components and states are given their index in the table (tableIndex) when they are added.
+# rowBase, stateBase and memberBase are the number of rows, states and members dropped from the start of the table.
+class layoutTable:
+    def __init__(self):
+        self.layers = []
+        self.componentLayers = array("b")
+        self.componentGroups = array("q")
+        self.componentNames = []
+        self.statePanels = array("q")
+        self.stateWidths = array("d")
+        self.stateFirstMembers = array("q")
+        self.stateMemberCounts = array("q")
+        self.memberComponents = array("q")
+        self.memberOffsets = array("d")
+        self.rowKinds = array("b")
+        self.rowRefs = array("q")
+        self.rowTurns = array("b")
+        self.rowCoords = array("d")
+        self.rowBase = 0
+        self.stateBase = 0
+        self.memberBase = 0
+
+    # The number of rows added, including those dropped.
+    def __len__(self):
+        return self.rowBase + len(self.rowKinds)
+
+    # Add a component (if it hasn't been already). Returns its index.
+    def addComponent(self, lineObject):
+        if lineObject.tableIndex is None:
+            for layerIndex, layer in enumerate(self.layers):
+                if layer is lineObject.layer:
+                    break
+            else:
+                layerIndex = len(self.layers)
+                self.layers.append(lineObject.layer)
+            lineObject.tableIndex = len(self.componentNames)
+            self.componentLayers.append(layerIndex)
+            self.componentGroups.append(lineObject.groupIndex)
+            self.componentNames.append(lineObject.name)
+        return lineObject.tableIndex
+
+    # Add a mission state. Returns its index.
+    def addState(self, state):
+        self.statePanels.append(state.panelId)
+        self.stateWidths.append(state.width)
+        self.stateFirstMembers.append(self.memberBase + len(self.memberComponents))
+        self.stateMemberCounts.append(len(state.lineObjects))
+        for lineObject, offset in zip(state.lineObjects, state.lineOffsets):
+            self.memberComponents.append(self.addComponent(lineObject))
+            self.memberOffsets.append(offset)
+        return self.stateBase + len(self.statePanels) - 1
+
+    # Add a row placing the line group of a state. position and LGV are single vectors (see missionState.draw).
+    def addDraw(self, stateIndex, position, LGV, turnTest):
+        self.rowKinds.append(rowDraw)
+        self.rowRefs.append(stateIndex)
+        self.rowTurns.append(turnTest)
+        self.rowCoords.extend((position[0], position[1], LGV[0], LGV[1]))
+
+    # Add a row lifting the pen of a component.
+    def addLift(self, lineObject):
+        self.rowKinds.append(rowLift)
+        self.rowRefs.append(self.addComponent(lineObject))
+        self.rowTurns.append(0)
+        self.rowCoords.extend((0.0, 0.0, 0.0, 0.0))
+
+    # Drop all the rows (which must all have been emitted) and all the states but liveStates, the states that can still
+    # be drawn in. They're added again, so they get new indexes. Returns the components whose pens were lifted in the
+    # rows dropped.
+    def compact(self, liveStates):
+        lifted = [self.rowRefs[row] for row in range(len(self.rowKinds)) if self.rowKinds[row] == rowLift]
+        self.rowBase = len(self)
+        for rowArray in (self.rowKinds, self.rowRefs, self.rowTurns, self.rowCoords):
+            del rowArray[:]
+        states = len(self.statePanels)
+        members = len(self.memberComponents)
+        added = set()
+        for state in liveStates:
+            if not(id(state) in added):
+                added.add(id(state))
+                state.tableIndex = self.addState(state)
+        for stateArray in (self.statePanels, self.stateWidths, self.stateFirstMembers, self.stateMemberCounts):
+            del stateArray[:states]
+        for memberArray in (self.memberComponents, self.memberOffsets):
+            del memberArray[:members]
+        self.stateBase += states
+        self.memberBase += members
+        return lifted
+
+
+# A new groupLayer with the same attributes and (empty) groups as another, e.g. to emit a table again into.
+def emptyLayerLike(layer):
+    newLayer = pw.groupLayer(layer.attributes)
+    for group in layer.groups:
+        newLayer.addGroup(group.attributes)
+    return newLayer
+
+
+# emitter class - the emission phase. Draws the rows of a layoutTable into groupLayers.
+# - layers: the groupLayers to draw the table's layers into, by the table's layer index. Defaults to the layers the
+#   components were created on.
+# An emitter keeps track of how far through the table it has got (position) and where each component's pen is, so it can
+# be run again as more rows are added and carry on where it left off.
+class emitter:
+    def __init__(self, table, layers=None):
+        self.table = table
+        self.layers = layers
+        self.position = 0
+        # Pen of each component: where it last drew to (None once lifted) and the detail panel of the path it's drawing.
+        self.penX = []
+        self.penY = []
+        self.penPanels = []
+        # Components whose pens were lifted in the rows dropped by the last retire (see retire).
+        self.lifted = []
+
+    # Draw the rows from position up to end (default all of them).
+    # - layerIndexes: only draw the components in these of the table's layers (default all).
+    # - workers: with 2 or more, and more than one layer to draw, each layer is drawn in a process of its own.
+    def emit(self, end=None, layerIndexes=None, workers=0):
+        table = self.table
+        if end is None:
+            end = len(table)
+        if layerIndexes is None:
+            layerIndexes = range(len(table.layers))
+        layerIndexes = list(layerIndexes)
+        newPens = len(table.componentNames) - len(self.penX)
+        self.penX.extend([None] * newPens)
+        self.penY.extend([None] * newPens)
+        self.penPanels.extend([None] * newPens)
+        if workers > 1 and len(layerIndexes) > 1:
+            self.emitInParallel(end, layerIndexes, workers)
+        else:
+            self.emitRows(end, layerIndexes)
+        if rp.state.enabled:
+            rp.count("emit.rows", end - self.position)
+        self.position = end
+
+    def targetLayers(self):
+        if self.layers is None:
+            return self.table.layers
+        return self.layers
+
+    # The group component c draws into, or None if its layer isn't one of layerIndexes.
+    def componentGroup(self, c, layerIndexes):
+        layerIndex = self.table.componentLayers[c]
+        if layerIndex in layerIndexes:
+            return self.targetLayers()[layerIndex].groups[self.table.componentGroups[c]]
+        return None
+
+    # Draw the rows from position up to end. Returns the group of each component met in the rows (see componentGroup),
+    # which are looked up as they're met so that only the components in the rows are gone through, however many the
+    # table has.
+    def emitRows(self, end, layerIndexes):
+        table = self.table
+        groups = {}
+        penX = self.penX
+        penY = self.penY
+        penPanels = self.penPanels
+        names = table.componentNames
+        rowCoords = table.rowCoords
+        # Counts for the profile, kept in locals while the rows are drawn.
+        profiling = rp.state.enabled
+        pathCount = lineCount = arcCount = zeroLengthCount = 0
+        stateBase = table.stateBase
+        memberBase = table.memberBase
+        for row in range(self.position - table.rowBase, end - table.rowBase):
+            if table.rowKinds[row] == rowLift:
+                # The component's path is finished, so spool it now rather than keep it open till the next one.
+                c = table.rowRefs[row]
+                if not(c in groups):
+                    groups[c] = self.componentGroup(c, layerIndexes)
+                if not(groups[c] is None):
+                    groups[c].closePath()
+                    penX[c] = None
+                    penY[c] = None
+                    penPanels[c] = None
+                continue
+            state = table.rowRefs[row] - stateBase
+            turnTest = table.rowTurns[row]
+            position = (rowCoords[row * 4], rowCoords[row * 4 + 1])
+            LGV = (rowCoords[row * 4 + 2], rowCoords[row * 4 + 3])
+            panelId = table.statePanels[state]
+            width = table.stateWidths[state]
+            first = table.stateFirstMembers[state] - memberBase
+            members = range(first, first + table.stateMemberCounts[state])
+            offsets = table.memberOffsets[first:first + len(members)].tolist()
+            # The points of the line group (and the arc radii) as worked out by missionState.draw.
+            LGStart = gk.add(position, gk.scale(LGV, -0.5 * width))
+            scaleFactor = gk.eDist(LGV)
+            points = gk.offsetPoints(LGStart, LGV, offsets)
+            if turnTest == -1:
+                radii = [offset * scaleFactor * -1 for offset in offsets]
+            elif turnTest == 1:
+                radii = [width - offset * scaleFactor for offset in offsets]
+            else:
+                radii = [0] * len(offsets)
+            for member, (newX, newY), radius in zip(members, points, radii):
+                c = table.memberComponents[member]
+                if c in groups:
+                    group = groups[c]
+                else:
+                    group = groups[c] = self.componentGroup(c, layerIndexes)
+                if group is None:
+                    continue
+                # Draw a line from the component's previous point to the new one.
+                # If the line is to the same coords as the previous draw do nothing.
+                if penX[c] == newX and penY[c] == newY:
+                    if profiling:
+                        zeroLengthCount += 1
+                    if logLevel > 0:
+                        print("WARNING: Line " + names[c] + " not drawn due to zero length")
+                    continue
+                # If the mission panel id has changed create a new line
+                if penPanels[c] != panelId:
+                    if profiling:
+                        pathCount += 1
+                    # If the pen has been lifted start the path at the new point. Only a lifted pen's group can have
+                    # been retired (see retire), so this is where it's brought back.
+                    if penX[c] is None and penY[c] is None:
+                        group.revive()
+                        group.newPath(panelId, newX, newY)
+                        if logLevel > 1:
+                            print("INFO: Initialising line " + names[c] + " at " + str(newX) + "," + str(newY))
+                        penX[c] = newX
+                        penY[c] = newY
+                        penPanels[c] = panelId
+                        continue
+                    # Otherwise start the path using the previous point
+                    group.newPath(panelId, penX[c], penY[c])
+                # Append this draw to the existing path (possibly including the one we just created)
+                if radius:  # If a radius is specified draw an arc
+                    direction = 1
+                    if radius < 0:  # The direction of the radius indicates the direction of the arc, CW or CCW
+                        radius = radius * -1  # Radius must be positive
+                        direction = 0  # 1 = CCW
+                    group.arcTo(radius, direction, newX, newY)
+                    if profiling:
+                        arcCount += 1
+                    if logLevel > 1:
+                        print("INFO: Line " + names[c] + " drawn arc to " + str(newX) + "," + str(newY))
+                else:
+                    group.lineTo(newX, newY)
+                    if profiling:
+                        lineCount += 1
+                    if logLevel > 1:
+                        print("INFO: Line " + names[c] + " drawn straight to " + str(newX) + "," + str(newY))
+                penPanels[c] = panelId
+                penX[c] = newX
+                penY[c] = newY
+        if profiling:
+            rp.count("component.draw.paths", pathCount)
+            rp.count("component.draw.lines", lineCount)
+            rp.count("component.draw.arcs", arcCount)
+            rp.count("component.draw.zeroLength", zeroLengthCount)
+        return groups
+
+    # Drop everything drawn so far from the table (see layoutTable.compact), keeping liveStates, and retire the groups
+    # of the components that have been idle since the retire before this one: their pens were lifted in the rows it
+    # dropped and haven't drawn since (see pageWriter.pathGroup.retire). All the rows must have been emitted.
+    def retire(self, liveStates):
+        layers = self.targetLayers()
+        table = self.table
+        for c in self.lifted:
+            if self.penX[c] is None:
+                layers[table.componentLayers[c]].groups[table.componentGroups[c]].retire()
+        self.lifted = table.compact(liveStates)
+
+    # Draw each layer in a process of its own. The processes are sent the table (without its layers), the pens and the
+    # open path of each group, and send back the paths they've drawn and the pens as they left them (and what they
+    # counted, if profiling).
+    def emitInParallel(self, end, layerIndexes, workers):
+        table = copy.copy(self.table)
+        table.layers = [None] * len(self.table.layers)
+        layers = self.targetLayers()
+        tasks = []
+        for layerIndex in layerIndexes:
+            openPaths = [group.openRecord() for group in layers[layerIndex].groups]
+            tasks.append((table, layerIndex, openPaths, self.position, end, (self.penX, self.penY, self.penPanels),
+                          rp.state.enabled))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(emitLayer, tasks))
+        for layerIndex, (groupPaths, pens, counters) in zip(layerIndexes, results):
+            rp.merge(counters)
+            groups = layers[layerIndex].groups
+            for groupIndex, records, openPath in groupPaths:
+                group = groups[groupIndex]
+                group.revive()
+                group.reopenPath(None)
+                for record in records:
+                    group.addPath(record)
+                group.reopenPath(openPath)
+            for c, x, y, panelId in pens:
+                self.penX[c] = x
+                self.penY[c] = y
+                self.penPanels[c] = panelId
+
+
+# Draw one layer of a layout table. This is what runs in the worker processes (see emitter.emitInParallel).
+# Returns a list of (group index, finished path records, open path record) of the groups that were drawn in, the pens
+# of the layer's components in the rows as (component, x, y, panel id), and the profile counters.
+def emitLayer(task):
+    table, layerIndex, openPaths, position, end, pens, profiling = task
+    rp.state.enabled = profiling
+    rp.reset()
+    layer = pw.groupLayer()
+    for openPath in openPaths:
+        group = layer.addGroup([])
+        group.reopenPath(openPath)
+    layers = list(table.layers)
+    layers[layerIndex] = layer
+    layerEmitter = emitter(table, layers)
+    layerEmitter.position = position
+    layerEmitter.penX, layerEmitter.penY, layerEmitter.penPanels = pens
+    groups = layerEmitter.emitRows(end, [layerIndex])
+    groupPaths = []
+    pens = []
+    sent = set()
+    for c, group in groups.items():
+        if group is None:
+            continue
+        pens.append((c, layerEmitter.penX[c], layerEmitter.penY[c], layerEmitter.penPanels[c]))
+        groupIndex = table.componentGroups[c]
+        if groupIndex in sent:
+            continue
+        sent.add(groupIndex)
+        openPath = group.openRecord()
+        if len(group.paths) > 0 or openPath != openPaths[groupIndex]:
+            records = [layer.spool.read(group.paths[i], group.paths[i + 1]) for i in range(0, len(group.paths), 2)]
+            groupPaths.append((groupIndex, records, openPath))
+    return groupPaths, pens, rp.state.counters
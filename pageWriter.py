@@ -0,0 +1,1060 @@
+import json
+import math
+import pickle
+import re
+import struct
+import tempfile
+from array import array
+from datetime import datetime
+import numpy as np
+import eventSources as es
+
+####
+# Streaming writer for the timeline page.
+# Rather than building the whole page as a minidom document and pretty printing it at the end, everything the layout
+# draws is written to temporary spool files as it's drawn, and the page is streamed out from them once the layout is
+# finished. The only things kept in memory are the paths still being drawn (at most one per component), the detail
+# skeletons that can still change, and the offsets of everything else in the spools.
+# Paths and skeletons are spooled as plain records and only serialised as the page is written, the skeletons as json (see
+# skeletonCollection.write) and the paths as xml in one of two formats:
+# - Normal: exactly as minidom's writexml(writer, "", "    ", "\n") would have written the same document.
+# - Compact: no indentation, relative path commands with as few characters as possible, panel ids replaced by short
+#   tokens (in a short "p" attribute on the paths), the craft styles turned into css classes, the date labels turned by
+#   one css rule (see dateLabelLayer) and shorter skeleton json. It looks and works the same in the browser, but is much
+#   smaller.
+# The page can also be written tiled (see writeTiles): the layers that grow with the history are cut into svg fragments
+# each covering a fixed width of the timeline, written to files of their own, and the page only holds what's needed to
+# fetch them as they scroll into view.
+# Overviews of the whole timeline, scaled down across by 10, 100... can be written alongside (see writeOverview).
+# Or the craft and traveler lines can be written as binary geometry for timeline.js to draw on a canvas (see writeGeometry).
+
+indentStep = "    "
+
+
+# Escape text or an attribute value (the same characters minidom escapes).
+def escape(data):
+    return data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+# Returns the opening of a tag, without its closing bracket. attributes is a list of (name, value) pairs.
+def openTag(tagName, attributes):
+    parts = ["<" + tagName]
+    for name, value in attributes:
+        parts.append(" " + name + "=\"" + escape(value) + "\"")
+    return "".join(parts)
+
+
+# Returns an element with no children, e.g. <path d="..."/>
+def emptyElement(tagName, attributes=()):
+    return openTag(tagName, attributes) + "/>"
+
+
+# Returns an element holding just a text node, e.g. <cr>Vostok_1</cr>
+def textElement(tagName, attributes, text):
+    return openTag(tagName, attributes) + ">" + escape(text) + "</" + tagName + ">"
+
+
+# Path command codes, as held in the command buffer of a path (see pathGroup).
+# - pathMove, pathLine: followed by x, y in the coordinate buffer.
+# - pathArc: followed by radius, direction (the svg sweep flag, 0 or 1), x, y.
+pathMove = 0
+pathLine = 1
+pathArc = 2
+# The svg command letters used for each in compact path data. The first move of a path is written as "M" (see
+# relativePathData).
+relativeCommands = {pathMove: "m", pathLine: "l", pathArc: "a"}
+
+# A spooled path record is this header (panel id, number of commands, number of coordinates), followed by the commands
+# (one byte each) and the coordinates (doubles).
+pathHeader = struct.Struct("<QII")
+
+
+# Pack a path into a record.
+def pathRecord(panelId, commands, coords):
+    return pathHeader.pack(panelId, len(commands), len(coords)) + commands.tobytes() + coords.tobytes()
+
+
+# Unpack a path record. Returns (panelId, commands, coords).
+def readPathRecord(record):
+    panelId, nCommands, nCoords = pathHeader.unpack_from(record)
+    commands = np.frombuffer(record, dtype=np.int8, count=nCommands, offset=pathHeader.size)
+    coords = np.frombuffer(record, dtype=np.float64, count=nCoords, offset=pathHeader.size + nCommands)
+    return panelId, commands, coords
+
+
+# Serialise a path's commands and coordinates to svg path data with absolute commands.
+# Coordinates are rounded to 1 decimal place all in one go (numpy rounding, as the coordinates are drawn as numpy floats).
+def pathData(commands, coords):
+    values = np.round(coords, 1).tolist()
+    parts = []
+    i = 0
+    for command in commands.tolist():
+        if command == pathArc:
+            radius = str(values[i])
+            parts.append("A" + radius + " " + radius + " 0 0 " + str(int(values[i + 1])) + " "
+                         + str(values[i + 2]) + " " + str(values[i + 3]) + " ")
+            i += 4
+        else:
+            parts.append(("M " if command == pathMove else "L ") + str(values[i]) + " " + str(values[i + 1]) + " ")
+            i += 2
+    return "".join(parts)
+
+
+# Returns True if point p is within tolerance of the straight line from a to c (and not beyond either end of it).
+def nearLine(p, a, c, tolerance):
+    dx = c[0] - a[0]
+    dy = c[1] - a[1]
+    px = p[0] - a[0]
+    py = p[1] - a[1]
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return px * px + py * py <= tolerance * tolerance
+    along = px * dx + py * dy
+    if along < 0 or along > length2:
+        return False
+    cross = px * dy - py * dx
+    return cross * cross <= tolerance * tolerance * length2
+
+
+# Simplify a path by merging runs of straight lines that are collinear, or near enough: every vertex dropped from a run
+# is within tolerance (pixels) of the single line that replaces the run. Arcs, and the vertices either end of them, are
+# left as they are.
+# Returns (commands, coords, number of vertices removed).
+def simplifyPath(commands, coords, tolerance):
+    values = coords.tolist()
+    outCommands = []
+    outCoords = []
+    removed = 0
+    anchor = None  # Start of the straight line the path currently ends with, if it ends with one
+    dropped = []  # Vertices already dropped from that line
+    i = 0
+    for command in commands.tolist():
+        n = 4 if command == pathArc else 2
+        segment = values[i:i + n]
+        i += n
+        if command == pathLine:
+            end = (outCoords[-2], outCoords[-1])
+            if not(anchor is None):
+                # The path ends with a line from anchor to end, see if it can be stretched to the new point instead.
+                newEnd = (segment[0], segment[1])
+                if nearLine(end, anchor, newEnd, tolerance) and all(
+                        nearLine(p, anchor, newEnd, tolerance) for p in dropped):
+                    dropped.append(end)
+                    outCoords[-2:] = segment
+                    removed += 1
+                    continue
+            anchor = end
+            dropped = []
+        else:
+            anchor = None
+            dropped = []
+        outCommands.append(command)
+        outCoords.extend(segment)
+    return np.array(outCommands, dtype=np.int8), np.array(outCoords, dtype=np.float64), removed
+
+
+# Returns the range of x, (lowest, highest), a path covers. Arcs are allowed their radius either side of their end points.
+def pathExtent(commands, coords):
+    values = coords.tolist()
+    lowest = math.inf
+    highest = -math.inf
+    i = 0
+    for command in commands.tolist():
+        if command == pathArc:
+            lowest = min(lowest, values[i + 2] - values[i])
+            highest = max(highest, values[i + 2] + values[i])
+            i += 4
+        else:
+            lowest = min(lowest, values[i])
+            highest = max(highest, values[i])
+            i += 2
+    return lowest, highest
+
+
+# Clip a path to the range of x from x1 to x2: returns the lines and arcs of the path that are at least partly in the
+# range, each run of them starting with a move to where it starts, as (commands, coords). None if there aren't any.
+# The parts of them outside the range are left for the svg they're drawn in to clip.
+def clipPath(commands, coords, x1, x2):
+    values = coords.tolist()
+    outCommands = []
+    outCoords = []
+    x = y = None
+    joined = False  # Whether the last line or arc was kept, i.e. the next one kept carries straight on from it
+    i = 0
+    for command in commands.tolist():
+        if command == pathMove:
+            x, y = values[i], values[i + 1]
+            joined = False
+            i += 2
+            continue
+        if command == pathArc:
+            radius = values[i]
+            segment = values[i:i + 4]
+            newX, newY = values[i + 2], values[i + 3]
+            i += 4
+        else:
+            radius = 0
+            segment = values[i:i + 2]
+            newX, newY = segment
+            i += 2
+        if min(x, newX) - radius <= x2 and max(x, newX) + radius >= x1:
+            if not joined:
+                outCommands.append(pathMove)
+                outCoords.extend((x, y))
+            outCommands.append(command)
+            outCoords.extend(segment)
+            joined = True
+        else:
+            joined = False
+        x, y = newX, newY
+    if not outCommands:
+        return None
+    return np.array(outCommands, dtype=np.int8), np.array(outCoords, dtype=np.float64)
+
+
+# Format a whole number of tenths with as few characters as possible, e.g. 30 -> "3", 5 -> ".5", -125 -> "-12.5"
+def shortTenths(n):
+    whole, tenth = divmod(abs(n), 10)
+    text = (str(whole) if whole else "") + ("." + str(tenth) if tenth else "")
+    if not text:
+        return "0"
+    return "-" + text if n < 0 else text
+
+
+# Serialise a path's commands and coordinates to compact svg path data.
+# The path starts with an absolute move, every point after that is relative to the one before, including those of any
+# later moves (a path clipped to a tile or joined up for an overview can have several runs). The points are rounded to
+# 1 decimal place first and the differences taken between the rounded points, so the path lands on exactly the same
+# points as the absolute version. Repeated commands and the spaces before minus signs are left out.
+def relativePathData(commands, coords):
+    tenths = np.rint(np.round(coords, 1) * 10).astype(np.int64).tolist()
+    parts = []
+    i = 0
+    x = 0
+    y = 0
+    lastCommand = None
+    for command in commands.tolist():
+        if command == pathArc:
+            numbers = [tenths[i], tenths[i], 0, 0, tenths[i + 1], tenths[i + 2] - x, tenths[i + 3] - y]
+            x = tenths[i + 2]
+            y = tenths[i + 3]
+            i += 4
+        else:
+            numbers = [tenths[i] - x, tenths[i + 1] - y]
+            x = tenths[i]
+            y = tenths[i + 1]
+            i += 2
+        if lastCommand is None and command == pathMove:
+            # The first move is from the origin, so its differences are the absolute point.
+            parts.append("M")
+        elif command != lastCommand or command == pathMove:
+            parts.append(relativeCommands[command])
+        elif numbers[0] >= 0:
+            parts.append(" ")
+        for j, n in enumerate(numbers):
+            if j > 0 and n >= 0:
+                parts.append(" ")
+            parts.append(shortTenths(n))
+        lastCommand = command
+    return "".join(parts)
+
+
+# Returns a short token for the nth panel id, e.g. "_0", "_a", "_1b"
+def panelToken(n):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    token = ""
+    while True:
+        n, digit = divmod(n, 36)
+        token = digits[digit] + token
+        if n == 0:
+            return "_" + token
+
+
+# xmlStream class - writes an indented xml document to a file one element at a time.
+# - compact: switches on the compact format (see above) for the paths, skeletons and groups written through it.
+# - tolerance: paths are simplified to within this many pixels as they're written (see simplifyPath). None to switch off.
+class xmlStream:
+    def __init__(self, file, compact=False, tolerance=None):
+        self.file = file
+        self.openTags = []
+        self.compact = compact
+        self.tolerance = tolerance
+        self.vertices = 0  # Number of path vertices written
+        self.removedVertices = 0  # Number of path vertices removed by simplification
+        self.indentStep = "" if compact else indentStep
+        self.panelTokens = {}  # Panel id to token (compact)
+        self.styleClasses = {}  # Group style to css class name (compact)
+
+    def indent(self):
+        return self.indentStep * len(self.openTags)
+
+    def declaration(self):
+        self.file.write("<?xml version=\"1.0\" ?>\n")
+
+    # Start an element that will have child elements. end closes it.
+    def start(self, tagName, attributes=()):
+        self.file.write(self.indent() + openTag(tagName, attributes) + ">\n")
+        self.openTags.append(tagName)
+
+    def end(self):
+        tagName = self.openTags.pop()
+        self.file.write(self.indent() + "</" + tagName + ">\n")
+
+    # Write an element with no children (text is None) or with just a text node.
+    def element(self, tagName, attributes=(), text=None):
+        if text is None:
+            self.line(emptyElement(tagName, attributes))
+        else:
+            self.line(textElement(tagName, attributes, text))
+
+    # Write already serialised xml. Each line of it is indented to the current level.
+    def line(self, xml):
+        indent = self.indent()
+        for line in xml.split("\n"):
+            self.file.write(indent + line + "\n")
+
+    # The reference to a mission detail panel, either the panel id itself or (compact) its token.
+    # Tokens are handed out in the order the panels are first referred to.
+    def panelRef(self, panelId):
+        if not self.compact:
+            return str(panelId)
+        token = self.panelTokens.get(panelId)
+        if token is None:
+            token = panelToken(len(self.panelTokens))
+            self.panelTokens[panelId] = token
+        return token
+
+    # The number of a mission detail panel's token (compact): the token is "_" and the number in base 36.
+    def panelNumber(self, panelId):
+        return int(self.panelRef(panelId)[1:], 36)
+
+    # Work out the css classes for the styles of the groups in the given layers. Returns the style sheet text to go in
+    # the page (compact), groups with those styles get the class instead of the inline style.
+    def defineStyles(self, layers):
+        rules = []
+        for layer in layers:
+            for group in layer.groups:
+                style = dict(group.attributes).get("style")
+                if style and not(style in self.styleClasses):
+                    className = "s" + str(len(self.styleClasses))
+                    self.styleClasses[style] = className
+                    rules.append("." + className + "{" + style + "}")
+        return "".join(rules)
+
+    # The attributes of a group as written to the page. A style with no class keeps its inline style.
+    def groupAttributes(self, attributes):
+        if not self.styleClasses:
+            return attributes
+        attributes = dict(attributes)
+        style = attributes.pop("style", "")
+        className = self.styleClasses.get(style)
+        if className:
+            attributes["class"] = (attributes["class"] + " " + className) if attributes.get("class") else className
+        elif style:
+            attributes["style"] = style
+        return list(attributes.items())
+
+    # Returns a stream for an xml fragment to go with this one (a tile): written in the same format, with the same panel
+    # tokens and style classes. Paths written to it aren't simplified, as they should have been already.
+    def fragmentStream(self, file):
+        stream = xmlStream(file, self.compact)
+        stream.panelTokens = self.panelTokens
+        stream.styleClasses = self.styleClasses
+        return stream
+
+    # Simplify a path (if switched on) and count its vertices. Returns (commands, coords).
+    def simplify(self, commands, coords):
+        if not(self.tolerance is None):
+            commands, coords, removed = simplifyPath(commands, coords, self.tolerance)
+            self.removedVertices += removed
+        self.vertices += len(commands)
+        return commands, coords
+
+    # Returns the <path> element for a path record.
+    def pathXml(self, record):
+        panelId, commands, coords = readPathRecord(record)
+        commands, coords = self.simplify(commands, coords)
+        return self.pathElement(panelId, commands, coords)
+
+    # Returns the <path> element for a path.
+    def pathElement(self, panelId, commands, coords):
+        if self.compact:
+            return emptyElement("path", [("p", self.panelRef(panelId)), ("d", relativePathData(commands, coords))])
+        return emptyElement("path", [("missiondetailpanel", self.panelRef(panelId)), ("d", pathData(commands, coords))])
+
+    # Write an element holding raw text, e.g. a script, given as any number of strings. Nothing is escaped.
+    def rawElement(self, tagName, attributes, parts):
+        self.file.write(self.indent() + openTag(tagName, attributes) + ">")
+        for part in parts:
+            self.file.write(part)
+        self.file.write("</" + tagName + ">\n")
+
+
+# spool class - an append only temporary file.
+# The file is only created when something is first written to it. When pickled (layout checkpoints) its contents go with it.
+class spool:
+    def __init__(self):
+        self.file = None
+        self.size = 0
+
+    def __getstate__(self):
+        return {"data": self.read(0, self.size)}
+
+    def __setstate__(self, state):
+        self.file = None
+        self.size = 0
+        if state["data"]:
+            self.write(state["data"])
+
+    # Append some bytes. Returns the offset of the bytes in the spool.
+    def write(self, data):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile()
+        offset = self.size
+        self.file.seek(offset)
+        self.file.write(data)
+        self.size += len(data)
+        return offset
+
+    # Returns length bytes of the spool starting at offset.
+    def read(self, offset, length):
+        if length == 0:
+            return b""
+        self.file.seek(offset)
+        return self.file.read(length)
+
+
+# elementLayer class - a layer (<g> element) of simple elements, e.g. the date labels or the orbit backgrounds.
+# Elements are added already serialised (single line) and spooled until the page is written. An element can be given the
+# range of x it covers, x1 to x2, which is what decides the tiles it goes in if the layer is tiled.
+class elementLayer:
+    def __init__(self, attributes=()):
+        self.attributes = list(attributes)
+        self.spool = spool()
+        self.elements = array("q")  # offset, length pairs of the elements in the spool
+        self.extents = array("d")  # x1, x2 pairs of the elements (nan if not given)
+
+    def __len__(self):
+        return len(self.elements) // 2
+
+    def addElement(self, xml, x1=None, x2=None):
+        data = xml.encode("utf-8")
+        self.elements.extend((self.spool.write(data), len(data)))
+        self.extents.extend((math.nan if x1 is None else x1, math.nan if x2 is None else x2))
+
+    # Generator of the serialised elements, in the order they were added. stream is the xmlStream they're to be written
+    # to, for layers that serialise their elements in its format (see dateLabelLayer).
+    def elementXml(self, stream=None):
+        for i in range(0, len(self.elements), 2):
+            yield self.spool.read(self.elements[i], self.elements[i + 1]).decode("utf-8")
+
+    # Returns the serialised element number i.
+    def elementAt(self, i, stream=None):
+        return self.spool.read(self.elements[i * 2], self.elements[i * 2 + 1]).decode("utf-8")
+
+    # Returns element number i as it's written again in another tile than its own: without its id, ids being unique in
+    # the page.
+    def copyAt(self, i, stream=None):
+        return re.sub(" id=\"[^\"]*\"", "", self.elementAt(i, stream), count=1)
+
+    # Generator of (xml, x1, x2) for each element, in the order they were added.
+    def elementRecords(self):
+        for i, xml in enumerate(self.elementXml()):
+            x1 = self.extents[i * 2]
+            x2 = self.extents[i * 2 + 1]
+            yield xml, (None if math.isnan(x1) else x1), (None if math.isnan(x2) else x2)
+
+    def write(self, stream):
+        if len(self) == 0:
+            stream.element("g", self.attributes)
+            return
+        stream.start("g", self.attributes)
+        for xml in self.elementXml(stream):
+            stream.line(xml)
+        stream.end()
+
+
+# dateLabelLayer class - the layer of date labels along the bottom of the timeline, that timeline.js draws the date lines
+# between. A label is kept as its x and date, and only serialised as it's written, in the format of the stream:
+# - Normal: <text x="x" y="520" transform="rotate(90,x , 520)" id="iso date">dd/mm/yyyy</text>
+# - Compact: <text x="520" y="-x">dd/mm/yyyy</text> with no id (timeline.js reads the date from the text). Every label is
+#   turned by the one rule of labelStyle instead: rotating the point (520, -x) a quarter turn about the origin puts the
+#   label where rotating it about (x, 520) puts the normal one.
+class dateLabelLayer(elementLayer):
+    def __init__(self, attributes=()):
+        self.attributes = list(attributes)
+        self.labels = array("q")  # x, date (as seconds since eventSources.epochDate) pairs
+        self.extents = array("d")  # x1, x2 pairs of the labels
+
+    def __len__(self):
+        return len(self.labels) // 2
+
+    # Add the label for date at x (whole pixels), covering x1 to x2.
+    def addLabel(self, x, date, x1, x2):
+        self.labels.extend((x, es.dateToSeconds(date)))
+        self.extents.extend((x1, x2))
+
+    def elementXml(self, stream=None):
+        for i in range(len(self)):
+            yield self.elementAt(i, stream)
+
+    def elementAt(self, i, stream=None, withId=True):
+        x = self.labels[i * 2]
+        date = es.secondsToDate(self.labels[i * 2 + 1])
+        if not(stream is None) and stream.compact:
+            return textElement("text", [("x", "520"), ("y", str(-x))], date.strftime("%d/%m/%Y"))
+        attributes = [("x", str(x)), ("y", "520"), ("transform", "rotate(90," + str(x) + " , 520)")]
+        if withId:
+            attributes.append(("id", date.isoformat()))
+        return textElement("text", attributes, date.strftime("%d/%m/%Y"))
+
+    def copyAt(self, i, stream=None):
+        return self.elementAt(i, stream, False)
+
+    # The style sheet rule that turns the compact labels, in the page and in tiles (where the layer's id is its class).
+    def labelStyle(self):
+        layerId = dict(self.attributes).get("id", "")
+        return "#" + layerId + " text,." + layerId + " text{transform:rotate(90deg)}"
+
+
+# pathGroup class - the group (<g> element) of paths drawn by one component.
+# A component draws into one path at a time, the open path. Its geometry is kept in two append only buffers, the path
+# commands and their coordinates, so adding a point costs the same however long the path is. When the path is finished
+# (the component starts a new one) it's packed into a record and spooled.
+# A group that isn't being drawn in can be retired: its path offsets and panels are spooled as well, leaving a stub of a
+# few slots. The page writers read them back from the spool (see finishedPaths), and the group must be revived before
+# anything more is drawn in it.
+class pathGroup:
+    __slots__ = ("spool", "attributes", "paths", "panels", "openPanel", "openCommands", "openCoords", "retired")
+
+    def __init__(self, layerSpool, attributes):
+        self.spool = layerSpool
+        self.attributes = attributes
+        self.paths = array("q")  # offset, length pairs of the finished path records in the spool
+        self.panels = array("Q")  # The mission detail panels of the paths, in order (without repeats)
+        self.openPanel = None
+        self.openCommands = None  # array of path command codes of the open path
+        self.openCoords = None  # array of the coordinates that go with them
+        self.retired = None  # offset, length in the spool of the packed paths and panels (if retired)
+
+    # Only called for the paths or panels of a retired group (the other slots are always there).
+    def __getattr__(self, name):
+        if name in ("paths", "panels") and not(self.retired is None):
+            raise AttributeError("The " + name + " of retired group " + str(self.groupId()) + " can't be used until "
+                                 "it's revived")
+        raise AttributeError(name)
+
+    # Spool the paths and panels and drop them from memory. Only a group with no open path can be retired.
+    def retire(self):
+        if not(self.retired is None) or not(self.openCommands is None):
+            return
+        data = pickle.dumps((self.paths, self.panels), pickle.HIGHEST_PROTOCOL)
+        self.retired = (self.spool.write(data), len(data))
+        del self.paths, self.panels
+
+    # Bring a retired group back to life, so that it can be drawn in again.
+    def revive(self):
+        if not(self.retired is None):
+            self.paths, self.panels = self.finishedPaths()
+            self.retired = None
+
+    # Returns the path offsets and panels of the group, reading them from the spool if it's retired (it stays retired).
+    def finishedPaths(self):
+        if self.retired is None:
+            return self.paths, self.panels
+        return pickle.loads(self.spool.read(*self.retired))
+
+    # The id of the group (the name of the component)
+    def groupId(self):
+        for name, value in self.attributes:
+            if name == "id":
+                return value
+
+    # Finish the open path (if there is one) and start a new one at x, y for the given mission detail panel.
+    def newPath(self, panelId, x, y):
+        self.closePath()
+        self.addPanel(panelId)
+        self.openPanel = panelId
+        self.openCommands = array("b", (pathMove,))
+        self.openCoords = array("d", (x, y))
+
+    # Extend the open path with a straight line to x, y.
+    def lineTo(self, x, y):
+        self.openCommands.append(pathLine)
+        self.openCoords.extend((x, y))
+
+    # Extend the open path with an arc to x, y.
+    def arcTo(self, radius, direction, x, y):
+        self.openCommands.append(pathArc)
+        self.openCoords.extend((radius, direction, x, y))
+
+    def closePath(self):
+        if not(self.openCommands is None):
+            self.addPath(pathRecord(self.openPanel, self.openCommands, self.openCoords))
+            self.openPanel = None
+            self.openCommands = None
+            self.openCoords = None
+
+    # The open path as a path record (None if there isn't one).
+    def openRecord(self):
+        if self.openCommands is None:
+            return None
+        return pathRecord(self.openPanel, self.openCommands, self.openCoords)
+
+    # Drop the open path and carry on with the path of a record (or None for no open path) instead. Used to hand the open
+    # paths to and from the processes drawing the layers (see layoutTable.emitter).
+    def reopenPath(self, record):
+        if record is None:
+            self.openPanel = None
+            self.openCommands = None
+            self.openCoords = None
+            return
+        self.openPanel, nCommands, nCoords = pathHeader.unpack_from(record)
+        self.openCommands = array("b", record[pathHeader.size:pathHeader.size + nCommands])
+        self.openCoords = array("d")
+        self.openCoords.frombytes(record[pathHeader.size + nCommands:pathHeader.size + nCommands + nCoords * 8])
+        self.addPanel(self.openPanel)
+
+    # Add a finished path record.
+    def addPath(self, record):
+        self.addPanel(pathHeader.unpack_from(record)[0])
+        self.paths.extend((self.spool.write(record), len(record)))
+
+    def addPanel(self, panelId):
+        if len(self.panels) == 0 or self.panels[-1] != panelId:
+            self.panels.append(panelId)
+
+    # Generator of the path records of the group, finished ones first then the open one.
+    def pathRecords(self):
+        paths = self.finishedPaths()[0]
+        for i in range(0, len(paths), 2):
+            yield self.spool.read(paths[i], paths[i + 1])
+        if not(self.openCommands is None):
+            yield pathRecord(self.openPanel, self.openCommands, self.openCoords)
+
+    def write(self, stream):
+        attributes = stream.groupAttributes(self.attributes)
+        if len(self.finishedPaths()[0]) == 0 and self.openCommands is None:
+            stream.element("g", attributes)
+            return
+        stream.start("g", attributes)
+        for record in self.pathRecords():
+            stream.line(stream.pathXml(record))
+        stream.end()
+
+
+# groupLayer class - a layer (<g> element) of component groups, e.g. the craft layer. All of its groups share a spool.
+class groupLayer:
+    def __init__(self, attributes=()):
+        self.attributes = list(attributes)
+        self.spool = spool()
+        self.groups = []
+        self.groupIds = {}
+
+    # Add a new group to the end of the layer and return it.
+    def addGroup(self, attributes):
+        group = pathGroup(self.spool, list(attributes))
+        self.groups.append(group)
+        groupId = group.groupId()
+        if not(groupId in self.groupIds):
+            self.groupIds[groupId] = group
+        return group
+
+    # Returns the first group with the given id, or None.
+    def group(self, groupId):
+        return self.groupIds.get(groupId)
+
+    def write(self, stream):
+        if len(self.groups) == 0:
+            stream.element("g", self.attributes)
+            return
+        stream.start("g", self.attributes)
+        for group in self.groups:
+            group.write(stream)
+        stream.end()
+
+
+# skeletonCollection class - the mission detail skeletons, in the order they were created.
+# A skeleton can change until it is closed (it has an end date), after which its record is spooled.
+# A skeleton record is the tuple (panelId, name, startDate, endDate, predecessor panelId, successor panelId, craft names,
+# traveler names), with the dates as iso strings. Anything it doesn't have is None.
+class skeletonCollection:
+    def __init__(self):
+        self.spool = spool()
+        self.entries = array("q")  # offset, length pairs of the records in the spool, -1 for skeletons that are still open
+        self.openSkeletons = {}  # Entry number to skeleton object
+
+    def __len__(self):
+        return len(self.entries) // 2
+
+    # Add a new (open) skeleton. Returns its entry number.
+    def add(self, sk):
+        entry = len(self)
+        self.entries.extend((-1, -1))
+        self.openSkeletons[entry] = sk
+        return entry
+
+    # Add the record of a closed skeleton.
+    def addRecord(self, record):
+        data = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        self.entries.extend((self.spool.write(data), len(data)))
+
+    # Close a skeleton: it won't change any more so its record can be spooled and the skeleton dropped.
+    def close(self, sk):
+        entry = sk.entry
+        if self.openSkeletons.pop(entry, None) is sk:
+            data = pickle.dumps(sk.record(), pickle.HIGHEST_PROTOCOL)
+            self.entries[entry * 2] = self.spool.write(data)
+            self.entries[entry * 2 + 1] = len(data)
+
+    # Generator of the skeleton records.
+    def records(self):
+        for entry in range(len(self)):
+            offset = self.entries[entry * 2]
+            if offset < 0:
+                yield self.openSkeletons[entry].record()
+            else:
+                yield pickle.loads(self.spool.read(offset, self.entries[entry * 2 + 1]))
+
+    # Write the skeletons to the page as a json script element, for timeline.js to look the detail panels up in as needed:
+    # {"panels": {panel reference: [sequence number, name, start date, end date, predecessor panel reference, successor
+    # panel reference, [craft], [travelers]]...}, "names": [craft and traveler names], "componentPanels": [[panel
+    # references]...]}
+    # The craft and travelers are given as their numbers in "names". Anything a skeleton doesn't have is null.
+    # componentPanels has the mission detail panels of each name's lines, in order, from its group in groupLayers (the
+    # first layer it has a group in), for the detail panels' previous and next buttons.
+    # Compact, it's {"p": [[name, start, end, predecessor, successor, [craft], [travelers]]...], "n": [names], "c":
+    # [[panel numbers]...]}: the skeletons are listed in the order of their panel tokens, and referred to by the numbers of
+    # their tokens (see xmlStream.panelNumber), so a skeleton's sequence number is its place in the list. The mission
+    # names are given as their numbers in "n" too (a mission has a skeleton for every change to it), and the dates as day
+    # numbers (see dayNumber).
+    def write(self, stream, groupLayers=()):
+        stream.rawElement("script", [("type", "application/json"), ("id", "missionStates")],
+                          self.jsonParts(stream, groupLayers))
+
+    # Generator of the json text of the skeletons, a skeleton at a time.
+    def jsonParts(self, stream, groupLayers):
+        names = {}
+        compact = stream.compact
+
+        def nameCodes(nameList):
+            codes = []
+            for name in nameList:
+                code = names.get(name)
+                if code is None:
+                    code = len(names)
+                    names[name] = code
+                codes.append(code)
+            return codes
+
+        # A reference to a panel from the json: its reference (see xmlStream.panelRef), or (compact) its number.
+        def panelRef(panelId):
+            if not panelId:
+                return None
+            return stream.panelNumber(panelId) if compact else stream.panelRef(panelId)
+
+        if compact:
+            # The skeletons are written before anything else refers to their panels, so handing their tokens out first
+            # numbers them in order.
+            for record in self.records():
+                stream.panelRef(record[0])
+            yield "{\"p\":["
+        else:
+            yield "{\"panels\":{"
+        for sequence, record in enumerate(self.records()):
+            panelId, name, startDate, endDate, predecessor, successor, craft, travelers = record
+            if compact:
+                entry = [nameCodes([name])[0], dayNumber(startDate), dayNumber(endDate), panelRef(predecessor),
+                         panelRef(successor), nameCodes(craft), nameCodes(travelers)]
+                yield jsonText("," if sequence else "", entry)
+            else:
+                entry = [sequence, name, startDate, endDate, panelRef(predecessor), panelRef(successor),
+                         nameCodes(craft), nameCodes(travelers)]
+                yield jsonText(("," if sequence else "") + json.dumps(stream.panelRef(panelId)) + ":", entry)
+        yield jsonText("],\"n\":" if compact else "},\"names\":", list(names))
+        yield ",\"c\":[" if compact else ",\"componentPanels\":["
+        for code, name in enumerate(names):
+            panels = []
+            for layer in groupLayers:
+                group = layer.group(name)
+                if not(group is None):
+                    panels = [stream.panelNumber(panelId) if compact else stream.panelRef(panelId)
+                              for panelId in group.finishedPaths()[1]]
+                    break
+            yield jsonText("," if code else "", panels)
+        yield "]}"
+
+
+# Returns an iso date of a skeleton as the number of days since eventSources.epochDate, if it's midnight (as they all
+# are), or else as it is. None stays None.
+def dayNumber(isoDate):
+    if isoDate is None:
+        return None
+    delta = datetime.fromisoformat(isoDate) - es.epochDate
+    if delta.seconds or delta.microseconds:
+        return isoDate
+    return delta.days
+
+
+# Returns text followed by a value as json, safe to go in a script element (nothing in it can close the element).
+def jsonText(text, value):
+    return text + json.dumps(value, separators=(",", ":")).replace("<", "\\u003c")
+
+
+# The attributes of a layer or group as written to a tile. Ids have to be unique in the page, and a layer or group has a
+# part in many tiles, so the id is given as another attribute (idName) instead.
+def fragmentAttributes(attributes, idName):
+    return [(idName if name == "id" else name, value) for name, value in attributes]
+
+
+# Write the layers of the timeline out as tiles: svg fragments each covering tileWidth pixels of it, for timeline.js to
+# fetch as they scroll into view. Tile n covers x from n * tileWidth to (n + 1) * tileWidth and is written to fileName +
+# str(n) + ".svg". Every tile holds all the layers:
+# - elementLayers: the elements that overlap the tile, and the nearest element either side of those (the date lines
+#   between two labels are drawn from the labels, so a tile needs the labels either side of it). The elements must all
+#   have extents, in order of x. An element belongs to the tile its middle is in, the other tiles it's written to get a
+#   copy without its id (see elementLayer.copyAt).
+# - groupLayers: the groups with paths that cross the tile, with just those paths, clipped to the tile (see clipPath).
+# Paths are simplified (if the page's are) on the way. Returns the number of tiles.
+def writeTiles(page, fileName, tileWidth, width, height, elementLayers, groupLayers):
+    tileCount = max(1, math.ceil(width / tileWidth))
+    starts = np.arange(tileCount) * tileWidth
+
+    # Work out the range of elements in each tile.
+    elementRanges = []  # For each element layer, arrays of the first and last element in each tile
+    for layer in elementLayers:
+        n = len(layer)
+        if n == 0:
+            elementRanges.append((np.zeros(tileCount, dtype=np.int64), np.full(tileCount, -1, dtype=np.int64)))
+            continue
+        extents = np.array(layer.extents, dtype=np.float64)
+        first = np.maximum(np.searchsorted(extents[1::2], starts, "left") - 1, 0)
+        last = np.minimum(np.searchsorted(extents[0::2], starts + tileWidth, "right"), n - 1)
+        elementRanges.append((first, last))
+
+    # Sort the paths into the tiles they cross. They're simplified and spooled again on the way, so that each is only
+    # simplified once however many tiles it crosses.
+    pathSpool = spool()
+    tilePaths = [[array("q") for layer in groupLayers] for tile in range(tileCount)]  # group, offset, length triples
+    for l, layer in enumerate(groupLayers):
+        for g, group in enumerate(layer.groups):
+            for record in group.pathRecords():
+                panelId, commands, coords = readPathRecord(record)
+                commands, coords = page.simplify(commands, coords)
+                lowest, highest = pathExtent(commands, coords)
+                record = pathRecord(panelId, commands, coords)
+                offset = pathSpool.write(record)
+                for tile in range(max(0, int(lowest // tileWidth)), min(tileCount - 1, int(highest // tileWidth)) + 1):
+                    tilePaths[tile][l].extend((g, offset, len(record)))
+
+    for tile in range(tileCount):
+        x = tile * tileWidth
+        with open(fileName + str(tile) + ".svg", "w") as f:
+            stream = page.fragmentStream(f)
+            stream.declaration()
+            stream.start("svg", [("xmlns", "http://www.w3.org/2000/svg"),
+                                 ("width", str(tileWidth)),
+                                 ("height", str(height)),
+                                 ("viewBox", str(x) + " 0 " + str(tileWidth) + " " + str(height)),
+                                 ("style", "position:absolute; left:" + str(x) + "px; top:0px;")])
+            for layer, (first, last) in zip(elementLayers, elementRanges):
+                stream.start("g", fragmentAttributes(layer.attributes, "class"))
+                for i in range(first[tile], last[tile] + 1):
+                    middle = (layer.extents[i * 2] + layer.extents[i * 2 + 1]) / 2
+                    if min(tileCount - 1, max(0, int(middle // tileWidth))) == tile:
+                        stream.line(layer.elementAt(i, stream))
+                    else:
+                        stream.line(layer.copyAt(i, stream))
+                stream.end()
+            for layer, paths in zip(groupLayers, tilePaths[tile]):
+                stream.start("g", fragmentAttributes(layer.attributes, "class"))
+                openGroup = None
+                for i in range(0, len(paths), 3):
+                    panelId, commands, coords = readPathRecord(pathSpool.read(paths[i + 1], paths[i + 2]))
+                    clipped = clipPath(commands, coords, x, x + tileWidth)
+                    if clipped is None:
+                        continue
+                    if paths[i] != openGroup:
+                        if not(openGroup is None):
+                            stream.end()
+                        openGroup = paths[i]
+                        stream.start("g", stream.groupAttributes(
+                            fragmentAttributes(layer.groups[openGroup].attributes, "component")))
+                    stream.line(stream.pathElement(panelId, clipped[0], clipped[1]))
+                if not(openGroup is None):
+                    stream.end()
+                stream.end()
+            stream.end()
+    return tileCount
+
+
+# Returns all the paths of a group joined into one, scaled down by scale across and with the arcs straightened, as
+# (commands, coords). A path that carries on from where the one before ended is joined straight on to it. None if the
+# group has no lines.
+def overviewPath(group, scale):
+    commands = array("b")
+    coords = array("d")
+    for record in group.pathRecords():
+        panelId, pathCommands, pathCoords = readPathRecord(record)
+        values = pathCoords.tolist()
+        i = 0
+        for command in pathCommands.tolist():
+            if command == pathArc:
+                x, y = values[i + 2] / scale, values[i + 3]
+                command = pathLine
+                i += 4
+            else:
+                x, y = values[i] / scale, values[i + 1]
+                i += 2
+            if command == pathMove and len(coords) > 0 and coords[-2] == x and coords[-1] == y:
+                continue
+            commands.append(command)
+            coords.extend((x, y))
+    if not(pathLine in commands):
+        return None
+    return np.array(commands, dtype=np.int8), np.array(coords, dtype=np.float64)
+
+
+# The colour the minor components of an overview are drawn in (see writeOverview).
+minorStroke = "rgb(150,150,150)"
+
+
+# The style of the path the minor components with the given group attributes are merged into: their own style (which
+# gives the line width) with its stroke colour, if it has one, replaced by minorStroke.
+def minorStyle(attributes):
+    declarations = [d for d in dict(attributes).get("style", "").split(";") if d]
+    return "".join(("stroke:" + minorStroke if d.startswith("stroke:") else d) + ";" for d in declarations)
+
+
+# Write an overview of the timeline, scaled down by scale across, to fileName as an svg for timeline.js to show when
+# zoomed out. The missions aren't told apart in an overview: each component's paths are joined into one, straightened
+# and simplified to within tolerance pixels of the overview. The components whose lines cover less than minorWidth
+# pixels of the overview across (those of the short, one off missions) can't be told apart either, so they're merged
+# into one path for each line width in each layer, drawn in minorStroke underneath the rest. The orbit backgrounds come
+# from backgroundLayer, and the years are marked from yearMarks (list of (year, x)) rather than every date being labelled.
+def writeOverview(page, fileName, scale, width, height, backgroundLayer, groupLayers, yearMarks, tolerance=0.5,
+                  minorWidth=4):
+    with open(fileName, "w") as f:
+        stream = page.fragmentStream(f)
+        stream.declaration()
+        stream.start("svg", [("xmlns", "http://www.w3.org/2000/svg"),
+                             ("width", str(round(width / scale, 1))),
+                             ("height", str(height))])
+        stream.start("g", [("transform", "scale(" + str(1 / scale) + ",1)")])
+        for xml in backgroundLayer.elementXml():
+            stream.line(xml)
+        stream.end()
+        stream.start("g", [("class", "yearsLayer"), ("style", "font-size:12px;")])
+        for year, x in yearMarks:
+            x = str(round(x / scale, 1))
+            stream.element("line", [("x1", x), ("y1", "0"), ("x2", x), ("y2", "520"), ("class", "dateLine")])
+            stream.element("text", [("x", x), ("y", "535")], str(year))
+        stream.end()
+        for layer in groupLayers:
+            stream.start("g", fragmentAttributes(layer.attributes, "class"))
+            components = []
+            minorPaths = {}  # Style to the (attributes, commands, coords) of the merged path of the minor components
+            for group in layer.groups:
+                path = overviewPath(group, scale)
+                if path is None:
+                    continue
+                lowest, highest = pathExtent(path[0], path[1])
+                if highest - lowest >= minorWidth:
+                    components.append((fragmentAttributes(group.attributes, "component"), path))
+                    continue
+                style = minorStyle(group.attributes)
+                if not(style in minorPaths):
+                    attributes = [(name, value) for name, value in group.attributes if name == "class"]
+                    minorPaths[style] = (attributes + [("component", "minor"), ("style", style)], [], [])
+                minorPaths[style][1].append(path[0])
+                minorPaths[style][2].append(path[1])
+            minorGroups = [(attributes, (np.concatenate(commands), np.concatenate(coords)))
+                           for attributes, commands, coords in minorPaths.values()]
+            for attributes, path in minorGroups + components:
+                commands, coords, removed = simplifyPath(path[0], path[1], tolerance)
+                stream.start("g", stream.groupAttributes(attributes))
+                if stream.compact:
+                    stream.element("path", [("d", relativePathData(commands, coords))])
+                else:
+                    stream.element("path", [("d", pathData(commands, coords))])
+                stream.end()
+            stream.end()
+        stream.end()
+
+
+# Returns the points along an svg arc (the small one of radius, going clockwise if sweep is 1) from x0, y0 to x1, y1, a
+# point every step radians or so, as a flat list x, y, x, y... The start point isn't included, the end point is.
+def arcPoints(x0, y0, radius, sweep, x1, y1, step=math.pi / 16):
+    # Work out the centre as the svg implementation notes do (for a circle with no rotation).
+    hx = (x0 - x1) / 2
+    hy = (y0 - y1) / 2
+    halfChord2 = hx * hx + hy * hy
+    if halfChord2 == 0:
+        return [x1, y1]
+    radius = max(radius, math.sqrt(halfChord2))
+    factor = math.sqrt(max(radius * radius - halfChord2, 0) / halfChord2)
+    if sweep == 0:  # i.e. the large arc flag, 0, is the same as sweep
+        factor = -factor
+    cx = factor * hy + (x0 + x1) / 2
+    cy = -factor * hx + (y0 + y1) / 2
+    start = math.atan2(y0 - cy, x0 - cx)
+    turn = math.atan2(y1 - cy, x1 - cx) - start
+    if sweep == 1 and turn < 0:
+        turn += 2 * math.pi
+    elif sweep == 0 and turn > 0:
+        turn -= 2 * math.pi
+    n = max(1, math.ceil(abs(turn) / step))
+    points = []
+    for i in range(1, n):
+        angle = start + turn * i / n
+        points.extend((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+    points.extend((x1, y1))
+    return points
+
+
+# Returns a path as a polyline (its arcs turned into runs of short lines), as a flat list x, y, x, y...
+# A path record only has the one move, at its start.
+def polylinePoints(commands, coords):
+    values = coords.tolist()
+    points = []
+    i = 0
+    for command in commands.tolist():
+        if command == pathArc:
+            points.extend(arcPoints(points[-2], points[-1], values[i], values[i + 1], values[i + 2], values[i + 3]))
+            i += 4
+        else:
+            points.extend(values[i:i + 2])
+            i += 2
+    return points
+
+
+# Write the paths of the given layers out as binary geometry for timeline.js to draw on a canvas:
+# - fileName + ".bin": the vertex buffer, every path as a polyline of little endian float32 x, y pairs, one after another
+#   (a component's paths are together, in order).
+# - fileName + ".json": the index into it. {"width", "height", "layers": [{"name", "groups": [{"component", "class",
+#   "style", "paths": [[panel reference, first vertex, number of vertices]...]}...]}...]}, in drawing order.
+# Paths are simplified (if the page's are) on the way. The panel references are the page's (see xmlStream.panelRef).
+def writeGeometry(page, fileName, width, height, groupLayers):
+    index = {"width": width, "height": height, "layers": []}
+    vertices = 0
+    with open(fileName + ".bin", "wb") as f:
+        for layer in groupLayers:
+            layerIndex = {"name": dict(layer.attributes).get("id"), "groups": []}
+            for group in layer.groups:
+                attributes = dict(group.attributes)
+                paths = []
+                for record in group.pathRecords():
+                    panelId, commands, coords = readPathRecord(record)
+                    commands, coords = page.simplify(commands, coords)
+                    points = np.array(polylinePoints(commands, coords), dtype="<f4")
+                    f.write(points.tobytes())
+                    paths.append([page.panelRef(panelId), vertices, len(points) // 2])
+                    vertices += len(points) // 2
+                layerIndex["groups"].append({"component": attributes.get("id"),
+                                             "class": attributes.get("class", ""),
+                                             "style": attributes.get("style", ""),
+                                             "paths": paths})
+            index["layers"].append(layerIndex)
+    with open(fileName + ".json", "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return vertices
@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+
+####
+# Profile of a render: how long each phase took and how many times the hot paths were taken.
+# Switched off by default. Code on a hot path only counts when profiling is on:
+#     if rp.state.enabled:
+#         rp.count("mission.draw.arc")
+# so with it off all it costs is the test of enabled. Counters that go up many times in a tight loop are best counted
+# into a local and added in one go at the end of the loop.
+# The report is plain JSON: {"phases": {name: seconds}, "counters": {name: count}}, so runs can be compared by a script.
+# Each thread has a profile of its own (state), so renders running at the same time in different threads (see
+# renderer) each count just their own.
+
+
+# profileState class - what's been counted and timed in a thread.
+class profileState(threading.local):
+    enabled = False
+
+    def __init__(self):
+        self.counters = {}  # Name to count (or total, e.g. of slip)
+        self.phases = {}  # Name to seconds spent in it, in the order the phases were first entered
+
+
+state = profileState()
+
+
+# Forget everything counted and timed so far.
+def reset():
+    state.counters = {}
+    state.phases = {}
+
+
+# Add amount to a counter.
+def count(name, amount=1):
+    counters = state.counters
+    counters[name] = counters.get(name, 0) + amount
+
+
+# Add a set of counters (e.g. sent back from a worker process) to these.
+def merge(otherCounters):
+    for name, amount in otherCounters.items():
+        count(name, amount)
+
+
+# phase class - times the code in a with block and adds it to the phase's time (if profiling is on).
+#     with rp.phase("layout"):
+#         processor.process(records)
+class phase:
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if state.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if not(self.start is None):
+            phases = state.phases
+            phases[self.name] = phases.get(self.name, 0) + time.perf_counter() - self.start
+            self.start = None
+
+
+# The profile as a dict, ready for json.
+def report():
+    return {"phases": dict(state.phases),
+            "counters": dict(sorted(state.counters.items()))}
+
+
+# Write the profile out as a JSON file.
+def writeReport(fileName):
+    with open(fileName, "w") as outFile:
+        json.dump(report(), outFile, indent=2)
+        outFile.write("\n")
@@ -0,0 +1,230 @@
+import os
+from itertools import chain
+import eventSources as es
+import layoutCheckpoint as lc
+import eventProcessor as ep
+import pageWriter as pw
+import renderProfile as rp
+
+####
+# Renderer: draws the timeline page of an event list and craft list.
+# A renderer holds nothing but its settings. Everything a render makes (the event processor with its registries of
+# craft, travelers, missions and orbits, the layers, the skeleton collection...) belongs to that render alone, so a
+# renderer can render any number of event lists one after another, and any number of renders can run at the same time
+# in threads of one process (each to an output folder of its own). A warm process saves starting the interpreter and
+# importing numpy for every render.
+#     timelines = renderer.renderer(compactOutput=True)
+#     timelines.render("Data/eventList.xml", "Data/craftList.xml", "Output")
+# The log levels of the modules (spaceflight.logLevel etc.) are process wide, they're only for debugging the layout. The
+# renderer's own logLevel is for what it reports about each render.
+
+
+# renderer class - the settings of a render (see SFTL-main.py for what each of them does).
+class renderer:
+    def __init__(self, dayWidth=10, useSourceCache=True, compactOutput=False, simplifyTolerance=None, tileWidth=None,
+                 overviewScales=(), canvasOutput=False, retireWindow=None, logLevel=0):
+        self.dayWidth = dayWidth
+        self.useSourceCache = useSourceCache
+        self.compactOutput = compactOutput
+        self.simplifyTolerance = simplifyTolerance
+        self.tileWidth = tileWidth
+        self.overviewScales = tuple(overviewScales)
+        self.canvasOutput = canvasOutput
+        self.retireWindow = retireWindow
+        self.logLevel = logLevel
+
+    # Open an event list as a stream of event records (seconds, eventType, subject, object), and read its craft list.
+    # xml event lists are read one event at a time as the main loop asks for them, tab-separated dumps are loaded as
+    # columns. With the source cache on, both come straight from the memory mapped cache unless the sources have
+    # changed.
+    def openEvents(self, eventListFile, craftListFile):
+        if self.useSourceCache:
+            sourceEvents, sourceCraft = es.loadCachedSources(eventListFile, craftListFile)
+            return sourceEvents.records(), sourceCraft
+        return es.openEventSource(eventListFile), es.readXmlCraftList(craftListFile)
+
+    # Render an event list and craft list to outputDir/SpaceFlightTimeLine.html (and its tiles, overviews or geometry).
+    # The page expects timeline.js and timeline.css in the same folder.
+    # - checkpointFile: layout checkpoint to carry on from and save to (None to switch off).
+    # - profileFile: write a profile of the render here (None to switch off).
+    # Returns a dict of what's left at the end:
+    # - remainingMissions: (orbit name, [mission names]) of the missions still in flight.
+    # - undrawnCraft: names of the craft in the craft list that were never drawn.
+    # - width: the width of the timeline in pixels.
+    def render(self, eventListFile, craftListFile, outputDir="Output", checkpointFile=None, profileFile=None):
+        dayWidth = self.dayWidth
+        rp.state.enabled = not(profileFile is None)
+        rp.reset()
+        with rp.phase("load"):
+            eventRecords, sourceCraft = self.openEvents(eventListFile, craftListFile)
+        # Every event consumed is logged so that the checkpoint can recognise this event list next time.
+        eventLog = lc.eventLog()
+        eventRecords = eventLog.wrap(eventRecords)
+        checkpoint = None
+        if checkpointFile:
+            with rp.phase("loadCheckpoint"):
+                checkpointSettings = (dayWidth, es.sourceHash([craftListFile]))
+                checkpoint = lc.loadCheckpoint(checkpointFile, checkpointSettings)
+                # If the event list doesn't start with the events the checkpoint covers, start from scratch.
+                if not(checkpoint is None) and not lc.skipCoveredEvents(checkpoint, eventLog, eventRecords):
+                    checkpoint = None
+                    eventRecords, sourceCraft = self.openEvents(eventListFile, craftListFile)
+                    eventLog = lc.eventLog()
+                    eventRecords = eventLog.wrap(eventRecords)
+        # The first event is read straight away as its date is the start of the timeline (x = 0).
+        if checkpoint is None:
+            firstEventRecords = [next(eventRecords)]
+            startSeconds = firstEventRecords[0][0]
+        else:
+            firstEventRecords = []
+            startSeconds = checkpoint["state"]["processor"].startSeconds
+
+        if checkpoint is None:
+            processor = self.newProcessor(startSeconds, sourceCraft)
+        else:
+            # Carry on from the checkpoint: the processor comes with its layers and the geometry drawn so far.
+            processor = checkpoint["state"]["processor"]
+            processor.retireWindow = self.retireWindow
+
+        # Lay the missions out, then draw their lines.
+        with rp.phase("layout"):
+            processor.process(chain(firstEventRecords, eventRecords))
+        with rp.phase("draw"):
+            processor.emit()
+        # The timeline ends at the last arrival or departure, or where it starts (x = 0) if there weren't any.
+        xPos = processor.xPos
+        if xPos is None:
+            xPos = 0
+        yearMarks = processor.yearMarks
+        undrawnCraft = [c.name for c in processor.craftList if c.drawFlag == 0]
+        orbitList = processor.orbitList
+        remainingMissions = [(o.name, [m.name for m in o.slots]) for o in orbitList]
+        # The layers the event loop has drawn onto. Everything drawn is spooled to temporary files, the page is streamed
+        # out from them.
+        gridLinesLayer = processor.gridLinesLayer
+        craftLayer = processor.craftLayer
+        travelerLayer = processor.travelerLayer
+        skeletons = processor.skeletons
+
+        # Check that all the craft in our list have been drawn
+        for craftName in undrawnCraft:
+            if self.logLevel > 0:
+                print("WARNING: Craft " + craftName + " created but never drawn")
+
+        # Resize the svg element to accomodate everything that's been drawn (rounded like the rest of the geometry)
+        svgWidth = round(xPos + dayWidth * 2, 1)
+
+        # Draw the orbit backgrounds (same width as SVG)
+        backgroundLayer = pw.elementLayer()
+        for orbit in orbitList:
+            orbit.drawOrbitRectangle(backgroundLayer, 0, svgWidth)
+
+        with rp.phase("write"):
+            page = self.writePage(outputDir, svgWidth, backgroundLayer, gridLinesLayer, craftLayer, travelerLayer,
+                                  skeletons, yearMarks)
+        if self.logLevel > 0 and not(self.simplifyTolerance is None):
+            print("INFO: Path simplification removed " + str(page.removedVertices) + " of " +
+                  str(page.vertices + page.removedVertices) + " vertices")
+        if rp.state.enabled:
+            rp.count("page.vertices", page.vertices)
+            rp.count("page.removedVertices", page.removedVertices)
+
+        # Save the layout state so that a later render with more events can carry on from here.
+        if checkpointFile:
+            with rp.phase("saveCheckpoint"):
+                lc.saveCheckpoint(checkpointFile,
+                                  checkpointSettings,
+                                  eventLog,
+                                  {"processor": processor})
+
+        if rp.state.enabled:
+            rp.writeReport(profileFile)
+        return {"remainingMissions": remainingMissions,
+                "undrawnCraft": undrawnCraft,
+                "width": svgWidth}
+
+    # A new event processor for a render from the start, with empty layers and skeleton collection to draw onto.
+    def newProcessor(self, startSeconds, sourceCraft):
+        return ep.eventProcessor(startSeconds, self.dayWidth,
+                                 pw.dateLabelLayer([("id", "gridLinesLayer")]),
+                                 pw.groupLayer([("id", "craftLayer")]),
+                                 pw.groupLayer([("id", "travelerLayer")]),
+                                 pw.skeletonCollection(),
+                                 sourceCraft,
+                                 self.retireWindow)
+
+    # Write out the page, streaming the layers and detail panel skeletons out of their spools. Returns the xmlStream it
+    # was written with.
+    def writePage(self, outputDir, svgWidth, backgroundLayer, gridLinesLayer, craftLayer, travelerLayer, skeletons,
+                  yearMarks):
+        with open(os.path.join(outputDir, "SpaceFlightTimeLine.html"), "w") as outFile:
+            page = pw.xmlStream(outFile, self.compactOutput, self.simplifyTolerance)
+            page.declaration()
+            page.start("html")
+            page.start("head")
+            page.element("script", [("src", "timeline.js")], "")
+            # The detail panels
+            skeletons.write(page, [craftLayer, travelerLayer])
+            page.element("link", [("rel", "stylesheet"), ("type", "text/css"), ("href", "timeline.css")])
+            if self.compactOutput:
+                page.element("style", (), page.defineStyles([craftLayer, travelerLayer]) + gridLinesLayer.labelStyle())
+            page.end()
+            page.start("body", [("onload", "completeDraw();")])
+            page.start("div", [("height", "600"), ("style", "overflow:auto; border:1px solid black;")])
+            if self.canvasOutput:
+                # The orbit backgrounds and dates stay svg, the canvas is kept over the part of it in view.
+                vertexCount = pw.writeGeometry(page, os.path.join(outputDir, "geometry"), svgWidth, 600,
+                                               [craftLayer, travelerLayer])
+                page.start("div", [("id", "canvasArea"),
+                                   ("geometryUrl", "geometry"),
+                                   ("style", "position:relative; width:" + str(svgWidth) + "px; height:600px;")])
+                page.start("SVG", [("xmlns", "http://www.w3.org/2000/svg"), ("width", str(svgWidth)),
+                                   ("height", "600"), ("style", "position:absolute; left:0px; top:0px;")])
+                backgroundLayer.write(page)
+                gridLinesLayer.write(page)
+                page.end()
+                page.element("canvas", [("height", "600"), ("style", "position:sticky; left:0px; top:0px;")], "")
+                page.end()
+                if self.logLevel > 0:
+                    print("INFO: Wrote " + str(vertexCount) + " vertices of geometry")
+            elif self.tileWidth is None:
+                page.start("SVG", [("xmlns", "http://www.w3.org/2000/svg"), ("width", str(svgWidth)),
+                                   ("height", "600")])
+                backgroundLayer.write(page)
+                gridLinesLayer.write(page)
+                craftLayer.write(page)
+                travelerLayer.write(page)
+                page.end()
+            else:
+                # Just the orbit backgrounds, the tiles are laid over them as they're fetched.
+                os.makedirs(os.path.join(outputDir, "tiles"), exist_ok=True)
+                tileCount = pw.writeTiles(page, os.path.join(outputDir, "tiles", "tile"), self.tileWidth, svgWidth,
+                                          600, [gridLinesLayer], [craftLayer, travelerLayer])
+                page.start("div", [("id", "tileArea"),
+                                   ("tiles", str(tileCount)),
+                                   ("tileWidth", str(self.tileWidth)),
+                                   ("tileUrl", "tiles/tile"),
+                                   ("style", "position:relative; width:" + str(svgWidth) + "px; height:600px;")])
+                page.start("SVG", [("xmlns", "http://www.w3.org/2000/svg"), ("width", str(svgWidth)),
+                                   ("height", "600"), ("style", "position:absolute; left:0px; top:0px;")])
+                backgroundLayer.write(page)
+                page.end()
+                page.end()
+                if self.logLevel > 0:
+                    print("INFO: Wrote " + str(tileCount) + " tiles")
+            if self.overviewScales:
+                for scale in self.overviewScales:
+                    pw.writeOverview(page, os.path.join(outputDir, "overview" + str(scale) + ".svg"), scale, svgWidth,
+                                     600, backgroundLayer, [craftLayer, travelerLayer], yearMarks)
+                page.element("div", [("id", "overviewArea"),
+                                     ("scales", " ".join(str(scale) for scale in self.overviewScales)),
+                                     ("overviewUrl", "overview"),
+                                     ("style", "display:none;")], "")
+            page.end()
+            page.start("div", [("id", "detailArea"), ("style", "border:1px solid black;")])
+            page.element("div", [("id", "lineDetailArea"), ("style", "height:30px;")], "")
+            page.element("div", [("id", "missionDetailArea")])
+            page.end()
+            page.end()
+            page.end()
+        return page
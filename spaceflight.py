@@ -1,10 +1,209 @@
 import random
-from xml.dom import minidom
-import numpy as np
-import vectorFunctions as vf
+import zlib
+import geometryKernel as gk
+import pageWriter as pw
+import renderProfile as rp
 
 logLevel = 0
 
+# The model classes that are created in large numbers over a long history (missions and their states, craft, travelers,
+# skeletons, transfers and slot nodes) declare their attributes in __slots__, which keeps each object to a fraction of
+# the size of one with an attribute dict. A new attribute on one of them has to be added to its __slots__.
+
+
+# Registry class
+# Holds named objects (craft, travelers, missions, orbits...) keyed by their name.
+# Lookup, insertion and removal by name are all O(1), iteration is in insertion order.
+# Looking up or removing a name that isn't there raises KeyError.
+class registry:
+    def __init__(self, items=()):
+        self.items = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        self.items[item.name] = item
+
+    def remove(self, name):
+        del self.items[name]
+
+    # The item that was added first (e.g. the master mission of a transfer batch)
+    def first(self):
+        return next(iter(self.items.values()))
+
+    def __getitem__(self, name):
+        return self.items[name]
+
+    def __contains__(self, name):
+        return name in self.items
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+
+# Node of a slotList, holding one item.
+# size is the number of nodes in the subtree under (and including) this one, which is what lets a node find its index.
+class slotNode:
+    __slots__ = ("item", "priority", "size", "left", "right", "parent")
+
+    def __init__(self, item, priority):
+        self.item = item
+        self.priority = priority
+        self.size = 1
+        self.left = None
+        self.right = None
+        self.parent = None
+
+
+# Number of nodes in a (possibly empty) subtree.
+def subtreeSize(node):
+    if node is None:
+        return 0
+    return node.size
+
+
+# Recalculate the size of a node after its children have changed, and point the children back at it.
+def updateNode(node):
+    node.size = 1 + subtreeSize(node.left) + subtreeSize(node.right)
+    if not(node.left is None):
+        node.left.parent = node
+    if not(node.right is None):
+        node.right.parent = node
+
+
+# Split a subtree into two, the first index nodes and the rest. Returns the roots of the two parts.
+def splitNodes(node, index):
+    if node is None:
+        return None, None
+    leftSize = subtreeSize(node.left)
+    if leftSize < index:
+        left, right = splitNodes(node.right, index - leftSize - 1)
+        node.right = left
+        updateNode(node)
+        return node, right
+    left, right = splitNodes(node.left, index)
+    node.left = right
+    updateNode(node)
+    return left, node
+
+
+# Join two subtrees, all of the nodes of the first one coming before those of the second. Returns the new root.
+def mergeNodes(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first.priority > second.priority:
+        first.right = mergeNodes(first.right, second)
+        updateNode(first)
+        return first
+    second.left = mergeNodes(first, second.left)
+    updateNode(second)
+    return second
+
+
+# slotList class - the ordered slots of an orbit.
+# A list that items can be inserted into and removed from at any index, and that can tell the index of an item, all in
+# logarithmic time. Busy orbits have missions docking (removed and inserted again next to the master) all the time, and
+# with a plain list every mission after the changed slot would have to be told its new index each time.
+# It is a tree (a treap keyed on position) in which each node knows how many nodes are under it, so an index is found by
+# counting down from the root and a node's own index by counting up from the node. The priorities that keep the tree
+# balanced come from a generator of the list's own, so they don't disturb anything else that uses random.
+# Inserting an item returns its node, which is the handle used to remove it or find its index later.
+# Orbits are drawn far more often than their slots change, so the items are also kept in order in a plain list, rebuilt
+# the first time they're iterated through after a change.
+class slotList:
+    def __init__(self):
+        self.root = None
+        self.priorities = random.Random(0)
+        self.ordered = []
+
+    def __len__(self):
+        return subtreeSize(self.root)
+
+    # Iterate through the items in order.
+    def __iter__(self):
+        if self.ordered is None:
+            self.ordered = []
+            stack = []
+            node = self.root
+            while stack or not(node is None):
+                while not(node is None):
+                    stack.append(node)
+                    node = node.left
+                node = stack.pop()
+                self.ordered.append(node.item)
+                node = node.right
+        return iter(self.ordered)
+
+    # Item at an index. Raises IndexError if there isn't one.
+    def __getitem__(self, index):
+        if index < 0 or index >= len(self):
+            raise IndexError("slot index out of range")
+        node = self.root
+        while True:
+            leftSize = subtreeSize(node.left)
+            if index < leftSize:
+                node = node.left
+            elif index == leftSize:
+                return node.item
+            else:
+                index -= leftSize + 1
+                node = node.right
+
+    # Insert an item so that it ends up at the given index. Returns its node.
+    def insert(self, index, item):
+        node = slotNode(item, self.priorities.random())
+        left, right = splitNodes(self.root, index)
+        self.root = mergeNodes(mergeNodes(left, node), right)
+        self.root.parent = None
+        self.ordered = None
+        return node
+
+    # Add an item at the end. Returns its node.
+    def append(self, item):
+        return self.insert(len(self), item)
+
+    # Remove a node. Raises ValueError if the node isn't in this list.
+    def remove(self, node):
+        top = node
+        while not(top.parent is None):
+            top = top.parent
+        if not(top is self.root):
+            raise ValueError("node is not in this slotList")
+        # The children take the node's place, everything above it has one node fewer under it.
+        children = mergeNodes(node.left, node.right)
+        parent = node.parent
+        if not(children is None):
+            children.parent = parent
+        if parent is None:
+            self.root = children
+        elif parent.left is node:
+            parent.left = children
+        else:
+            parent.right = children
+        while not(parent is None):
+            parent.size -= 1
+            parent = parent.parent
+        node.left = None
+        node.right = None
+        node.parent = None
+        self.ordered = None
+
+    # Index of a node.
+    @staticmethod
+    def index(node):
+        index = subtreeSize(node.left)
+        while not(node.parent is None):
+            if node is node.parent.right:
+                index += subtreeSize(node.parent.left) + 1
+            node = node.parent
+        return index
+
+
 # Orbit class
 class orbit:
     def __init__(self, name, top, height, colour):
@@ -12,8 +211,11 @@ class orbit:
         self.top = top
         self.height = height
         self.colour = colour
-        self.slots = []
-        self.doc = minidom.Document()
+        self.slots = slotList()
+        # Running totals over the missions in the slots, kept up to date as missions come and go (and as craft join or
+        # leave them) so drawing the orbit doesn't have to add them all up again.
+        self.missionWidth = 0  # Combined width of all the missions
+        self.RVCount = 0  # Number of missions with the RV flag set
 
     # Comparison function
     def __eq__(self, other):
@@ -27,58 +229,54 @@ class orbit:
     # Function to draw background rectangles for each orbit.
     # The start and end x-axis positions are provided as parameters.
     # The y-axis is determined from the details of the orbit.
-    def drawOrbitRectangle(self, svgparent, x1, x2):
-        rect = self.doc.createElementNS("http://www.w3.org/2000/svg", "rect")
-        rect.setAttribute("x", str(x1))
-        rect.setAttribute("y", str(self.top))
-        rect.setAttribute("width", str(x2 - x1))
-        rect.setAttribute("height", str(self.height))
-        rect.setAttribute("style", "fill:" + self.colour)
-        svgparent.appendChild(rect)
+    def drawOrbitRectangle(self, svgLayer, x1, x2):
+        svgLayer.addElement(pw.emptyElement("rect", [
+            ("x", str(x1)),
+            ("y", str(self.top)),
+            ("width", str(x2 - x1)),
+            ("height", str(self.height)),
+            ("style", "fill:" + self.colour)]))
 
     def addMission(self, newMission):
         newMission.orbit = self
-        self.slots.append(newMission)
-        newMission.slotIndex = len(self.slots) - 1
+        newMission.slot = self.slots.append(newMission)
+        self.missionWidth += newMission.width()
+        self.RVCount += newMission.RV
         if logLevel > 1:
             print("INFO: Mission " + newMission.name + " added to orbit " + self.name + " in slot " + str(
                 newMission.slotIndex))
 
     def insertMission(self, newMission, index):
-        self.slots.insert(index, newMission)
+        newMission.slot = self.slots.insert(index, newMission)
         newMission.orbit = self
-        # Repair the slot references on this and the remaining missions as they are now pointing at the wrong place in the array.
-        # Start at the position of the new mission, there is no need to repair the ones with lower indexes.
-        orbL = len(self.slots)
-        for i in range(index, orbL):
-            self.slots[i].slotIndex = i
+        self.missionWidth += newMission.width()
+        self.RVCount += newMission.RV
 
     # Remove mission (new style) removes mission and shunts all remaining missions up one place.
     def removeMission(self, exMission):
-        if not(exMission.slotIndex is None) and not(exMission.orbit is None):
+        if not(exMission.slot is None) and not(exMission.orbit is None):
+            slotIndex = exMission.slotIndex
             try:
-                # Remove element from the array.
-                self.slots.remove(exMission)
+                # Remove element from the slots. The missions after it move up a place (their indexes are worked out
+                # from the slots when needed, so there's nothing to repair).
+                self.slots.remove(exMission.slot)
+                self.missionWidth -= exMission.width()
+                self.RVCount -= exMission.RV
             except ValueError:
                 print("ERROR: Removing mission "
                       + exMission.name
                       + " from orbit "
                       + self.name
                       + ", mission not found in orbit slot")
-            # Repair the slot references on the remaining missions as they are now pointing at the wrong place in the array.
-            # Start at the position that old mission previously occupied, there is no need to repair the ones with lower indexes.
-            orbL = len(self.slots)
-            for i in range(exMission.slotIndex, orbL):
-                self.slots[i].slotIndex = i
             if exMission.RV == 1:
                 exMission.RV = 0  # Clear the RV flag on this mission.
             else:
                 # Clear the RV flag on the mission that now occupies the slot previously occupied by the removed mission.
                 # If it has an RV flag that means it was slaved to the mission we just removed and is now free.
                 # Note that we only do this if the RV flag wasn't set on the removed mission. If it was it means there were multiple slaves to another master, the next mission is therefor still a slave.
-                if len(self.slots) > exMission.slotIndex:
-                    self.slots[exMission.slotIndex].RV = 0
-            exMission.slotIndex = None  # ... and set the mission's slot index to null.
+                if len(self.slots) > slotIndex:
+                    self.setRV(self.slots[slotIndex], 0)
+            exMission.slot = None  # ... and clear the mission's slot.
             exMission.orbit = None
         else:
             print("ERROR: Removing mission "
@@ -87,18 +285,16 @@ class orbit:
                   + self.name
                   + ", mission not currently assigned to any orbit")
 
+    # Set the RV flag of a mission in one of this orbit's slots.
+    def setRV(self, slotMission, RV):
+        self.RVCount += RV - slotMission.RV
+        slotMission.RV = RV
+
     def countRV(self):
-        n = 0
-        for slotMission in self.slots:
-            if slotMission.RV == 1:
-                n += 1
-        return n
+        return self.RVCount
 
     def width(self):
-        width = 0
-        for slotMission in self.slots:
-            width += slotMission.width()
-        return width
+        return self.missionWidth
 
     # Function to draw all the missions in an orbit
     # Calculates y-axis position to maintain even gaps between the missions.
@@ -114,11 +310,11 @@ class orbit:
             # The total height of the orbit box
             availableSpace = self.height
             # Minus the combined width of all missions in this orbit
-            availableSpace = availableSpace - self.width()
+            availableSpace = availableSpace - self.missionWidth
             # Minus the gaps between RVed missions (these are fixed and cannot change under any circumstances).
-            availableSpace = availableSpace - self.countRV() * RVGap
+            availableSpace = availableSpace - self.RVCount * RVGap
             # The variable gap is the available space divided by the number of missions that are not in the RV state +1 (more gaps than missions).
-            varGap = availableSpace / (slotsLen + 1 - self.countRV())
+            varGap = availableSpace / (slotsLen + 1 - self.RVCount)
             if varGap > defaultGap:
                 varGap = defaultGap
             for missionSlot in self.slots:
@@ -126,17 +322,22 @@ class orbit:
                     offset += varGap
                 else:
                     offset += RVGap
-                halfWidth = missionSlot.width() / 2
+                halfWidth = missionSlot.craftWidth / 2
                 offset += halfWidth
                 thisSlip = missionSlot.draw(xPos, offset + self.top)
                 offset += halfWidth
                 if thisSlip > maxSlip:
                     maxSlip = thisSlip
+        if rp.state.enabled:
+            rp.count("orbit.draw")
+            rp.count("orbit.draw.slip", maxSlip)
         return maxSlip
 
 
 # Transfer object (it's basically just a pair of objects)
 class transfer:
+    __slots__ = ("subject", "mission")
+
     def __init__(self, subject, mission):
         self.subject = subject
         self.mission = mission
@@ -153,40 +354,40 @@ class transferBatch:
         self.unSupports = []
         self.joins = []
         self.leaves = []
-        self.touchedMissions = []   # A list of all missions involved (touched).
+        self.touchedMissions = registry()   # All the missions involved (touched), in the order they were touched.
 
 
     # Add a SUPPORTS event to the batch.
     def addSupports(self, craft, mission):
-        if not(mission in self.touchedMissions):
-            self.touchedMissions.append(mission)
+        if not(mission.name in self.touchedMissions):
+            self.touchedMissions.add(mission)
         t = transfer(craft, mission)
         self.supports.append(t)
 
     # Add a unSUPPORTS event to the batch.
     def addUnSupports(self, craft, mission):
-        if not(mission in self.touchedMissions):
-            self.touchedMissions.append(mission)
+        if not(mission.name in self.touchedMissions):
+            self.touchedMissions.add(mission)
         t = transfer(craft, mission)
         self.unSupports.append(t)
 
     # Add a JOINS event to the batch.
     def addJoins(self, traveler, mission):
-        if not(mission in self.touchedMissions):
-            self.touchedMissions.append(mission)
+        if not(mission.name in self.touchedMissions):
+            self.touchedMissions.add(mission)
         t = transfer(traveler, mission)
         self.joins.append(t)
 
     # Add a leaves event to the batch.
     def addLeaves(self, traveler, mission):
-        if not(mission in self.touchedMissions):
-            self.touchedMissions.append(mission)
+        if not(mission.name in self.touchedMissions):
+            self.touchedMissions.add(mission)
         t = transfer(traveler, mission)
         self.leaves.append(t)
 
     # Rearrange the slots of missions within an orbit to put the transfer batch missions into adjacent slots.
     def RV(self):
-        transferOrbit = self.touchedMissions[0].orbit
+        transferOrbit = self.touchedMissions.first().orbit
         if not(transferOrbit is None):
             minSlot = 1000
             masterMissionName = None
@@ -194,13 +395,13 @@ class transferBatch:
                 # Check that the orbit to which all of the missions are assigned matches the first one.
                 if not(m.orbit is transferOrbit):
                     print("ERROR: Trying to transfer between multiple orbits! Master mission: "
-                          + self.touchedMissions[0].name
+                          + self.touchedMissions.first().name
                           + " is assigned to: "
-                          + self.touchedMissions[0].orbit.name
+                          + self.touchedMissions.first().orbit.name
                           + ". Slave mission: "
-                          + self.touchedMissions[0].name
+                          + self.touchedMissions.first().name
                           + " is assigned to: "
-                          + self.touchedMissions[0].orbit.name)
+                          + self.touchedMissions.first().orbit.name)
             for m in self.touchedMissions:
                 # Find which of the batch missions has the lowest index
                 if m.slotIndex < minSlot:
@@ -213,7 +414,7 @@ class transferBatch:
                         changedMissions += 1  # Increment the count of missions changed.
                         transferOrbit.removeMission(m)  # Remove slave from it's current slot.
                         transferOrbit.insertMission(m, minSlot + 1)  # Insert slave mission immediately below the master.
-                        m.RV = 1  # Set the RV flag.
+                        transferOrbit.setRV(m, 1)  # Set the RV flag.
                         minSlot += 1  # In case there are multiple RV slaves, put them into subsequent slots.
             return changedMissions  # Return the number of changed missions.
 
@@ -226,7 +427,7 @@ class transferBatch:
         slip = 0
         # Check that all the missions in the TB are actually assigned to an orbit.
         # If not, execute the transfers but don't draw anything (can't work out where to draw without an orbit)
-        transferOrbit = self.touchedMissions[0].orbit
+        transferOrbit = self.touchedMissions.first().orbit
         if not(transferOrbit is None):
             if logLevel > 1:
                 print("INFO: Executing transfer batch at x: "
@@ -240,9 +441,9 @@ class transferBatch:
                 if not(m.orbit is transferOrbit):
                     if logLevel > 0:
                         print("WARNING: Trying to transfer between multiple orbits! Master mission: "
-                              + self.touchedMissions[0].name
+                              + self.touchedMissions.first().name
                               + " is assigned to: "
-                              + self.touchedMissions[0].orbit.name
+                              + self.touchedMissions.first().orbit.name
                               + ". Slave mission: "
                               + m.name
                               + " is assigned to: "
@@ -268,7 +469,7 @@ class transferBatch:
         else:
             if logLevel > 0:
                 print("WARNING: Transfer group not drawn as master mission "
-                      + self.touchedMissions[0].name
+                      + self.touchedMissions.first().name
                       + " is not assigned an orbit")
         # Execute all of the batched transfer events - do the removals first or the mission attribute of the components will be set to null by the remove.
         for x in self.unSupports:
@@ -290,42 +491,41 @@ class transferBatch:
             # Because we are starting a brand new mission line here (remeber the close above?) need a second draws to create a horizontal line
             slip += 2
             slip += transferOrbit.draw(batchXPos + slip)
+        if rp.state.enabled:
+            rp.count("transferBatch.execute")
+            rp.count("transferBatch.missions", len(self.touchedMissions))
+            rp.count("transferBatch.transfers", len(self.supports) + len(self.joins))
+            rp.count("transferBatch.slip", slip)
         return slip
 
 
-# Constructor function for lineOffset object
-# - Offset of this line from the centre point of the line group.
-#   Right is positive. Should always be less than half the width.
-# - Reference to the line creating object (can be either a craft or traveler)
-class lineOffset:
-    def __init__(self, offset, lineObject):
-        self.offset = offset
-        self.lineObject = lineObject
-
-
 # missionState object - captures the current state of the mission for drawing purposes.
 # - Width
 # - ID of relevant HTML details panel
-# - Array of lineOffsets
-# - Creator - Accepts mission as parameter
-# - Draw - Draws lines from array, accepts two vector parameters, draw point and vector representing direction and scale of the group of line points.
+# - The line group: the line creating objects (craft and travelers) in lineObjects, and the offset of each one from the
+#   start of the group in lineOffsets.
+# - Creator - Accepts mission as parameter. The state is added to the mission's layout table.
+# - Draw - Places the line group, accepts two vector parameters, draw point and vector representing direction and scale of the group of line points.
 class missionState:
+    __slots__ = ("panelId", "width", "lineObjects", "lineOffsets", "layout", "tableIndex")
+
     def __init__(self, missionObj, date=None):
         # Only create a detail skeleton if passed a date
         if date is None:
             self.panelId = 0
         else:
-            self.sk = missionObj.createDetailSkeleton(date)
-            self.panelId = self.sk.panelId
+            self.panelId = missionObj.createDetailSkeleton(date).panelId
         self.width = missionObj.width()
-        self.lineGroup = []
-        # Iterate through all of the craft and add a record for each to the line group.
+        self.lineObjects = []
+        self.lineOffsets = []
+        # Iterate through all of the craft and add each to the line group.
         craftOffset = 0
         for c in missionObj.craft:
             # Move in by half a width both before and after the draw. This puts the line in between middle of the width gap.
             halfCraftWidth = c.width / 2
             craftOffset += halfCraftWidth
-            self.lineGroup.append(lineOffset(craftOffset, c))
+            self.lineObjects.append(c)
+            self.lineOffsets.append(craftOffset)
             craftOffset += halfCraftWidth
         # Iterate through all of the travelers and add a record for each to the line group.
         # Define the start point by offsetting each traveler such that they are spaced out
@@ -334,48 +534,47 @@ class missionState:
             # Start out at half a gap in. This will put each line in the middle of it's space.
             travelerOffset = travelerGap / 2
             for tv in missionObj.travelers:
-                self.lineGroup.append(lineOffset(travelerOffset, tv))
+                self.lineObjects.append(tv)
+                self.lineOffsets.append(travelerOffset)
                 travelerOffset += travelerGap
+        self.layout = missionObj.layout
+        self.tableIndex = self.layout.addState(self)
 
     # Draw function
-    # Draws new points for all the lines listed within the lineGroup property.
+    # Places the line group, adding a row for it to the layout table. The lines themselves are drawn from the table in the
+    # emission phase (see layoutTable.emitter).
     # Parameter position is a vector from the origin to the intended centre point of the line points group.
     # Parameter LGV is the line group vector. It is a vector that describes the direction of the line points group and also it's scale. A unity vector (length 1) should draw the group at it's intended width.
     # TurnTest is optional. 0 means straight line, 1 means arc right, -1 means arc left.
     def draw(self, position, LGV, turnTest=0):
-        # Vector from the draw point to the start of the group.
-        halfOutVector = LGV * (-0.5 * self.width)
-        # Vector from the origin to the start of the group
-        LGStart = position + halfOutVector
-        scaleFactor = vf.eDist(LGV)
-        radius = 0
-        for l in self.lineGroup:
-            # Scale the line group vector for this point.
-            pointVector = LGV * l.offset
-            # Add the scaled LGV to the start point to get the absolute coords for this point.
-            pointVector += LGStart
-            if turnTest == -1:
-                radius = l.offset * scaleFactor * -1
-            if turnTest == 1:
-                radius = self.width - l.offset * scaleFactor
-            l.lineObject.draw(self.panelId, pointVector[0], pointVector[1], "black", radius)
+        self.layout.addDraw(self.tableIndex, position, LGV, turnTest)
+        for lineObject in self.lineObjects:
+            lineObject.drawFlag = 1
 
 
 # mission object
 class mission:
-    def __init__(self, name):
+    __slots__ = ("name", "layout", "skeletons", "x", "y", "lastVector", "orbit", "slot", "craft", "craftWidth",
+                 "travelers", "lastState", "lastInset", "RV", "currentDetailSkeleton", "detailSkeletonCount",
+                 "currentState")
+
+    def __init__(self, name, layout, skeletons):
         self.name = name  # String name
+        self.layout = layout  # The layoutTable the mission is laid out into
+        self.skeletons = skeletons  # The skeletonCollection its detail skeletons are written to
         self.x = None  # The co-ords of the most recent point drawn for this mission
         self.y = None
         self.lastVector = None  # The last vector drawn for self mission. Allows subsequent draws to take account of the direction of the last draw.
         self.orbit = None  # The orbit (object) in which the mission currently resides.
-        self.slotIndex = None  # Index of the orbital slot to which this mission is assigned
+        self.slot = None  # The orbital slot (node of orbit.slots) to which this mission is assigned
         self.craft = []  # List of craft assigned to the mission
+        self.craftWidth = 0  # Combined width of the craft, kept up to date by addCraft/removeCraft
         self.travelers = []  # List of space travellers assigned to this mission (i.e. people, crew and/or passengers/tourists).
         self.lastState = None  # The state the mission was in the last time it was drawn (need to remember as we've not yet drawn the bend at the end of that line)
         self.lastInset = 0  # If there is a bend at the begining of the "lastVector", how much space does it take up?
         self.RV = 0  # Rendezvous flag. 1 means this mission is currently rendezvoused with another, 0 means it's free flying.
         self.currentDetailSkeleton = None
+        self.detailSkeletonCount = 0  # Number of detail skeletons created for this mission so far
         self.currentState = missionState(
             self)  # Create missionState to define the mission's initial state (very empty). Because the date parameter has been omitted this call will not also generate a detail panel skeleton
 
@@ -388,20 +587,33 @@ class mission:
         elif isinstance(other, mission):
             return self.name == other.name
 
+    # Index of the orbital slot to which this mission is assigned (None if it isn't in an orbit)
+    @property
+    def slotIndex(self):
+        if self.slot is None:
+            return None
+        return slotList.index(self.slot)
+
     # Function to add up the widths of all the constituent craft
     def width(self):
-        a = 0
-        for craft in self.craft:
-            a = a + craft.width
-        return a
+        return self.craftWidth
+
+    # Add to the combined width of the craft (and so to the width of the orbit the mission is in)
+    def addWidth(self, width):
+        self.craftWidth += width
+        if not(self.orbit is None):
+            self.orbit.missionWidth += width
 
     # Function to create a skeleton detail panel for later
     def createDetailSkeleton(self, date):
         sk = skeleton(self, date)
+        self.detailSkeletonCount += 1
         if self.currentDetailSkeleton:
             self.currentDetailSkeleton.endDate = date  # If this isn't the first detail skeleton to be created for this mission, update the end date of the previous one.
             self.currentDetailSkeleton.sucessor = sk
-            sk.predecessor = self.currentDetailSkeleton
+            self.currentDetailSkeleton.close()
+            # Only the panel id of the closed skeleton is needed from now on, so let it (and the chain before it) go.
+            sk.predecessor = skeletonRef(self.currentDetailSkeleton.panelId)
         self.currentDetailSkeleton = sk
         return sk
 
@@ -409,12 +621,14 @@ class mission:
     def addCraft(self, newCraft):
         newCraft.mission = self.name
         self.craft.append(newCraft)
+        self.addWidth(newCraft.width)
 
     # Function to remove a craft from this mission
     def removeCraft(self, exCraft):
         exCraft.mission = None
         if exCraft in self.craft:
             self.craft.remove(exCraft)
+            self.addWidth(-exCraft.width)
         else:
             print("ERROR: Removing craft " + exCraft.name + " from mission " + self.name + ". Could not find craft.")
 
@@ -474,6 +688,8 @@ class mission:
                       + str(self.x)
                       + "," + str(self.y)
                       + " (previously null)")
+            if rp.state.enabled:
+                rp.count("mission.draw.initialise")
             return 0
 
         # Check that the new draw point is further down the x-axis than last time. The graph must always progress left to right.
@@ -501,6 +717,8 @@ class mission:
                       + str(self.x)
                       + ","
                       + str(self.y))
+            if rp.state.enabled:
+                rp.count("mission.draw.samePosition")
             return 0
 
         # Bend resolution
@@ -512,11 +730,11 @@ class mission:
         # - Previous vector acute to current: draw a simple bend.
         # - Previous vector obtuse to current: add an extra line section to accommodate an extra large bend.
         # Create a vector for the mission line we're currently drawing
-        currentVector = np.array([newX + slip - self.x, newY - self.y])
+        currentVector = gk.vector(newX + slip - self.x, newY - self.y)
         # Unity version of the current mission line vector
-        currentUnityVector = vf.unity(currentVector)
+        currentUnityVector = gk.unity(currentVector)
         # Define the start point of the current mission line
-        lineGroupCentre = np.array([self.x, self.y])
+        lineGroupCentre = gk.vector(self.x, self.y)
 
         # No previous vector case. I.e. the start of a mission line.
         if self.lastVector is None:
@@ -529,7 +747,7 @@ class mission:
                       + str(newX) + "," + str(newY))
                 return 0
             # Define line group vector, this is perpendicular to the mission line
-            lineGroupVector = vf.rotCW270(currentUnityVector)
+            lineGroupVector = gk.rotCW270(currentUnityVector)
             # Draw the all of the lines using this new line group vector
             self.lastState.draw(lineGroupCentre, lineGroupVector)
             self.x = newX + slip
@@ -542,88 +760,97 @@ class mission:
                       + " draw to: "
                       + str(self.x) + "," + str(self.y)
                       + " (first vector)")
+            if rp.state.enabled:
+                rp.count("mission.draw.firstVector")
             return 0
 
         # Cases with a previous vector
         if not(self.lastVector is None):
-            lastUnityVector = vf.unity(self.lastVector)
+            lastUnityVector = gk.unity(self.lastVector)
             # Define the tangent vector: adding the unity versions of the two vectors gives a vector which is tangential to the bend.
-            tangentVector = lastUnityVector + currentUnityVector
+            tangentVector = gk.add(lastUnityVector, currentUnityVector)
 
             # Check for 0 angle, i.e. a draw is an extension of the previous in exactly the same direction.
             # If this is the case it is only necessary to perform a draw if the state has changed.
             # A tangent vector length of 2 can only mean that the last unity vector and the current unity vector are identical in direction.
-            if vf.eDist(tangentVector) == 2:
+            if gk.eDist(tangentVector) == 2:
                 # Check if the state hasn't changed
                 if self.lastState is self.currentState:
                     self.x = newX + slip
                     self.y = newY
                     # Add the current vector to the last vector, this will just make the last vector longer, which might be important later on
-                    self.lastVector += currentVector
+                    self.lastVector = gk.add(self.lastVector, currentVector)
                     if logLevel > 1:
                         print("INFO: Mission " + self.name + " is extension of previous draw to " + str(
                             self.x) + "," + str(self.y))
+                    if rp.state.enabled:
+                        rp.count("mission.draw.extension")
                     return 0
 
             # Mitre joint, like when joining skirting boards, or cornice etc.
             # Can handle angles greater than 90deg but it's a bit rubbish.
             if bendstyle == "MITRE":
                 # Slightly lost track of why this works, but it does somehow scale the tangent vector to the correct length.
-                lineGroupVector = tangentVector * (2 / np.sum(tangentVector **2))
-                lineGroupVector = vf.rotCW270(lineGroupVector)  # Because our coordinates system has +y down, this is actually a CW90 turn.
+                lineGroupVector = gk.scale(tangentVector, 2 / gk.dot(tangentVector, tangentVector))
+                lineGroupVector = gk.rotCW270(lineGroupVector)  # Because our coordinates system has +y down, this is actually a CW90 turn.
                 # The line group vector is now the mitre joint.
                 self.lastState.draw(lineGroupCentre, lineGroupVector)
+                if rp.state.enabled:
+                    rp.count("mission.draw.mitre")
             # Arc bends, uses arcs to create curved bends.
             # Handles all cases inc acute, obtuse and 0 and 180 deg bends.
             elif bendstyle == "ARC":
                 # Check for special case of double back, this is when the bend needs to be 180 degrees which is impossible for the normal bend algorithm.
                 doubleBack = 0
-                if vf.eDist(tangentVector) == 0:
+                if gk.eDist(tangentVector) == 0:
                     # Need to offset the two line groups to the side of the vectors rather than along them. bendOffsetVector captures this translation.
-                    bendOffsetVector = np.copy(lastUnityVector)
-                    bendOffsetVector *= (self.lastState.width + 2)  # Little gap between the two should make it clearer.
-                    bendOffsetVector = vf.rotCW270(bendOffsetVector)
+                    bendOffsetVector = gk.scale(lastUnityVector, self.lastState.width + 2)  # Little gap between the two should make it clearer.
+                    bendOffsetVector = gk.rotCW270(bendOffsetVector)
                     doubleBack = 1
                     if bendOffsetVector[0] < 0:  # Choose which way to go, try to go towards x positive.
-                        bendOffsetVector = vf.rotCW180(bendOffsetVector)
+                        bendOffsetVector = gk.rotCW180(bendOffsetVector)
                         doubleBack = -1
-                    lineGroupCentre1 = np.copy(lineGroupCentre)
-                    lineGroupCentre2 = lineGroupCentre1 + bendOffsetVector
+                    lineGroupCentre1 = lineGroupCentre
+                    lineGroupCentre2 = gk.add(lineGroupCentre1, bendOffsetVector)
                     slip += bendOffsetVector[0]
                     newY += bendOffsetVector[1]  # Need to slip in y as well.
                     if logLevel > 1:
                         print("INFO: Mission "
                               + self.name
                               + " slipped due to doubleback, vector: "
-                              + bendOffsetVector[0]
+                              + str(bendOffsetVector[0])
                               + ","
-                              + bendOffsetVector[1])
+                              + str(bendOffsetVector[1]))
                     inset = self.lastState.width / 2  # 180 degree bend but treated like two 90s.
-                    lineGroupCentre1 += lastUnityVector * (-1 * inset)  # Step back down the incoming vector
-                    lineGroupCentre2 += currentUnityVector * (1 * inset)  # Step forward along the current vector
+                    lineGroupCentre1 = gk.add(lineGroupCentre1, gk.scale(lastUnityVector, -1 * inset))  # Step back down the incoming vector
+                    lineGroupCentre2 = gk.add(lineGroupCentre2, gk.scale(currentUnityVector, 1 * inset))  # Step forward along the current vector
+                    if rp.state.enabled:
+                        rp.count("mission.draw.doubleBack")
                 else:
-                    bendOffsetVector = np.array([0.0, 0.0])
+                    bendOffsetVector = gk.vector(0.0, 0.0)
                     # Calculate a vector at right angle to the bend by subtracting the direction of one vector for the other.
-                    normalVector = currentUnityVector - lastUnityVector
+                    normalVector = gk.subtract(currentUnityVector, lastUnityVector)
                     # It turns out that the ratio of the lengths of these two is equal to the ratio between half the width and the inset.
-                    inset = (self.lastState.width / 2) * (vf.eDist(normalVector) / vf.eDist(tangentVector))
+                    inset = (self.lastState.width / 2) * (gk.eDist(normalVector) / gk.eDist(tangentVector))
                     if inset > self.lastState.width / 2:  # Obtuse bend case
                         insetExcess = inset - self.lastState.width / 2
                         inset = self.lastState.width / 2
-                        bendOffsetVector += lastUnityVector * insetExcess
-                        bendOffsetVector += currentUnityVector * insetExcess
+                        bendOffsetVector = gk.add(bendOffsetVector, gk.scale(lastUnityVector, insetExcess))
+                        bendOffsetVector = gk.add(bendOffsetVector, gk.scale(currentUnityVector, insetExcess))
                         slip += bendOffsetVector[0]
                         newY += bendOffsetVector[1]
                         if logLevel > 1:
                             print(
-                                "INFO: Mission " + self.name + " slipped due to obtuse bend. Vector: " + bendOffsetVector[0] + "," + bendOffsetVector[1])
-                    if (inset + self.lastInset) > vf.eDist(self.lastVector):
+                                "INFO: Mission " + self.name + " slipped due to obtuse bend. Vector: " + str(bendOffsetVector[0]) + "," + str(bendOffsetVector[1]))
+                        if rp.state.enabled:
+                            rp.count("mission.draw.obtuseBend")
+                    if (inset + self.lastInset) > gk.eDist(self.lastVector):
                         # There isn't room for both bends on the last line segment
-                        diff = inset + self.lastInset - vf.eDist(self.lastVector)
-                        lastSlipVector = lastUnityVector * diff
+                        diff = inset + self.lastInset - gk.eDist(self.lastVector)
+                        lastSlipVector = gk.scale(lastUnityVector, diff)
                         slip += lastSlipVector[0]
                         newY += lastSlipVector[1]
-                        lineGroupCentre += lastSlipVector
+                        lineGroupCentre = gk.add(lineGroupCentre, lastSlipVector)
                         if logLevel > 1:
                             print(
                                 "INFO: Mission "
@@ -633,14 +860,14 @@ class mission:
                                 + ","
                                 + str(lastSlipVector[1]))
                     # Step back down the incoming vector
-                    lineGroupCentre1 = lineGroupCentre + lastUnityVector * (-1 * inset)
+                    lineGroupCentre1 = gk.add(lineGroupCentre, gk.scale(lastUnityVector, -1 * inset))
                     # Step forward along the current vector
-                    lineGroupCentre2 = lineGroupCentre + currentUnityVector * (1 * inset)
-                    lineGroupCentre2 += bendOffsetVector
-                lastUnityVector = vf.rotCW270(lastUnityVector)  # The line group vectors are just simple rotations of the unity vectors
+                    lineGroupCentre2 = gk.add(lineGroupCentre, gk.scale(currentUnityVector, 1 * inset))
+                    lineGroupCentre2 = gk.add(lineGroupCentre2, bendOffsetVector)
+                lastUnityVector = gk.rotCW270(lastUnityVector)  # The line group vectors are just simple rotations of the unity vectors
                 # Need to work out whether angle between two vectors is positive or negative. Scalar P is prop to Cosine. Cos of angle rotated by 90deg is Sine.
-                turnTest = np.dot(lastUnityVector, currentUnityVector)
-                currentUnityVector = vf.rotCW270(currentUnityVector)
+                turnTest = gk.dot(lastUnityVector, currentUnityVector)
+                currentUnityVector = gk.rotCW270(currentUnityVector)
                 if turnTest > 0 or doubleBack > 0:
                     turnTest2 = 1
                 if turnTest < 0 or doubleBack < 0:
@@ -651,11 +878,11 @@ class mission:
                 if inset > 0:  # Only draw bend if there is actually a bend to draw
                     self.lastState.draw(lineGroupCentre2, currentUnityVector, turnTest2)  # Second line is an arc.
                 # Check to see if the bend takes up more space than is available
-                if inset > vf.eDist(currentVector):
-                    diff = inset - vf.eDist(currentVector)
+                if inset > gk.eDist(currentVector):
+                    diff = inset - gk.eDist(currentVector)
                     # Rotate the vector back (were previously using it as the direction of the line group which is perpendicular)
-                    currentUnityVector = vf.rotCW90(currentUnityVector)
-                    slipVector = currentUnityVector * diff
+                    currentUnityVector = gk.rotCW90(currentUnityVector)
+                    slipVector = gk.scale(currentUnityVector, diff)
                     slip += slipVector[0]
                     newY += slipVector[1]
                     if logLevel > 1:
@@ -667,6 +894,8 @@ class mission:
                             + ","
                             + str(slipVector[1]))
                 self.lastInset = inset
+                if rp.state.enabled:
+                    rp.count("mission.draw.arc")
 
             self.x = newX + slip
             self.y = newY
@@ -689,9 +918,9 @@ class mission:
     def closeDraw(self):
         # Need to know where we are and which direction we're pointing in.
         if not(self.x is None) and not(self.y is None) and not(self.lastVector is None):
-            lineGroupCentre = np.array([self.x, self.y])  # Defines the start point of the current mission line.
-            lastUnityVector = self.lastVector * (1 / vf.eDist(self.lastVector))
-            lastUnityVector = vf.rotCW270(lastUnityVector)  # The line group vectors are just simple rotations of the unity vectors
+            lineGroupCentre = gk.vector(self.x, self.y)  # Defines the start point of the current mission line.
+            lastUnityVector = gk.scale(self.lastVector, 1 / gk.eDist(self.lastVector))
+            lastUnityVector = gk.rotCW270(lastUnityVector)  # The line group vectors are just simple rotations of the unity vectors
             self.lastState.draw(lineGroupCentre, lastUnityVector)
             if logLevel > 1:
                 print("INFO: Mission: "
@@ -724,13 +953,12 @@ class mission:
         self.closeDraw()
         # Define the end date of the final skeleton
         self.currentDetailSkeleton.endDate = date
-        # Reset all travelers and craft. This resets them to the state they were in when first created. This will prevent their lines being drawn between missions.
+        self.currentDetailSkeleton.close()
+        # Lift the pens of all travelers and craft. This resets them to the state they were in when first created. This will prevent their lines being drawn between missions.
         for t in self.travelers:
-            t.x = None
-            t.y = None
+            self.layout.addLift(t)
         for c in self.craft:
-            c.x = None
-            c.y = None
+            self.layout.addLift(c)
         # Remove references from traveler objects
         while len(self.travelers) > 0:
             toBeRemoved = self.travelers.pop()
@@ -739,6 +967,7 @@ class mission:
         while len(self.craft) > 0:
             toBeRemoved = self.craft.pop()
             toBeRemoved.mission = None
+        self.addWidth(-self.craftWidth)
         # Remove mission from orbit (thus freeing up the slot for another mission)
         if not(self.orbit is None):
             try:
@@ -748,12 +977,22 @@ class mission:
         self.orbit = None
 
 
+# Stand-in for a closed skeleton, as the predecessor of the next one. Only its panel id is needed (see skeleton.record).
+class skeletonRef:
+    __slots__ = ("panelId",)
+
+    def __init__(self, panelId):
+        self.panelId = panelId
+
+
 # Mission panel skeleton
+# Skeletons are written to their mission's collection (see pageWriter.skeletonCollection), the one for the page it's
+# being drawn on.
 class skeleton:
-    skeletonList = []
+    __slots__ = ("startDate", "endDate", "sucessor", "predecessor", "name", "panelId", "travelers", "craft", "owner",
+                 "entry")
 
     def __init__(self, currentMission, date):
-        self.doc = minidom.Document()
         if date:
             self.startDate = date
         else:
@@ -761,59 +1000,50 @@ class skeleton:
         self.endDate = None
         self.sucessor = None
         self.predecessor = None
-        self.written = 0  # Flag to indicate whether or not a skeleton has been written into the document
-        self.panelId = random.randint(0, 4294967295)  # Create a random 32bit integer.
         self.name = currentMission.name
+        # A 32bit id made from the mission name, date and how many skeletons the mission already has.
+        # This makes the ids the same whichever process lays out the mission, and from one render to the next.
+        panelKey = self.name + "|" + (date.isoformat() if date else "") + "|" + str(currentMission.detailSkeletonCount)
+        self.panelId = zlib.crc32(panelKey.encode("utf-8"))
         self.travelers = []
         for t in currentMission.travelers:
             self.travelers.append(t.name)
         self.craft = []
         for c in currentMission.craft:
             self.craft.append(c.name)
-        skeleton.skeletonList.append(self)
-
-    def toXml(self):
-        skRoot = self.doc.createElement("ms")
-        skRoot.setAttribute("pId", str(self.panelId))
-        skRoot.setAttribute("name", self.name)
-        if self.startDate:
-            skRoot.setAttribute("sDate", self.startDate.isoformat())
-        if self.endDate:
-            skRoot.setAttribute("eDate", self.endDate.isoformat())
-        if self.predecessor:
-            skRoot.setAttribute("pre", str(self.predecessor.panelId))
-        if self.sucessor:
-            skRoot.setAttribute("suc", str(self.sucessor.panelId))
+        self.owner = currentMission.skeletons  # The collection the skeleton was added to
+        self.entry = self.owner.add(self)
 
-        for c in self.craft:
-            el = self.doc.createElement("cr")
-            tn = self.doc.createTextNode(c)
-            el.appendChild(tn)
-            skRoot.appendChild(el)
-        for t in self.travelers:
-            el = self.doc.createElement("tv")
-            tn = self.doc.createTextNode(t)
-            el.appendChild(tn)
-            skRoot.appendChild(el)
-        return skRoot
+    # The skeleton won't change any more, write it out.
+    def close(self):
+        self.owner.close(self)
+
+    # The skeleton as a plain record, ready to be written to the page (see pageWriter.skeletonCollection).
+    def record(self):
+        return (self.panelId,
+                self.name,
+                self.startDate.isoformat() if self.startDate else None,
+                self.endDate.isoformat() if self.endDate else None,
+                self.predecessor.panelId if self.predecessor else None,
+                self.sucessor.panelId if self.sucessor else None,
+                list(self.craft),
+                list(self.travelers))
 
 
 # Component - common things between craft and traveler
 class component:
+    __slots__ = ("name", "mission", "drawFlag", "layer", "groupIndex", "tableIndex")
+
     def __init__(self, name, SVGLayer):
-        self.doc = minidom.Document()
         self.name = name  # String name
         self.mission = None  # Mission to which the component is currently assigned
-        self.x = None  # The co-ords of the most recent point drawn
-        self.y = None
-        self.drawFlag = 0  # Used to record whether or not draw function has ever been called on this craft
-        self.lastPanel = None
-        self.currentPath = None
-        self.lineGroupElement = self.doc.createElementNS("http://www.w3.org/2000/svg", "g")
-        self.lineGroupElement.setAttribute("class", self.groupClass)
-        self.lineGroupElement.setAttribute("id", self.name)
-        self.lineGroupElement.setAttribute("style", self.groupStyle)
-        SVGLayer.appendChild(self.lineGroupElement)
+        self.drawFlag = 0  # Used to record whether or not the component has ever been drawn in a line group
+        # Add the group of paths for this component to the layer (see pageWriter.pathGroup), remembering the layer and the
+        # index of the group in it. The lines are drawn into the group in the emission phase (see layoutTable.emitter).
+        self.layer = SVGLayer
+        self.groupIndex = len(SVGLayer.groups)
+        SVGLayer.addGroup([("class", self.groupClass), ("id", self.name), ("style", self.styleString())])
+        self.tableIndex = None  # Index in the layout table, once it's been added to one
 
     # Comparison function for components
     def __eq__(self, other):
@@ -824,64 +1054,20 @@ class component:
         elif isinstance(other, component):
             return self.name == other.name
 
-    # Draws a line from the previous point to a new one. Common to both craft and traveler;
-    def draw(self, missionPanelId, newX, newY, colour, radius):
-        self.drawFlag = 1
-        # If the line is to the same coords as the previous draw to nothing.
-        if not (self.x == newX and self.y == newY):
-            # If the mission panel id has changed create a new line
-            if self.lastPanel != missionPanelId:
-                self.currentPath = self.doc.createElementNS("http://www.w3.org/2000/svg", "path")
-                self.currentPath.setAttribute("missiondetailpanel", str(missionPanelId))
-                self.lineGroupElement.appendChild(self.currentPath)
-                # If either the current x or y values are null start the path using the newX and newY.
-                if self.x is None and self.y is None:
-                    d = "M " + str(round(newX, 1)) + " " + str(round(newY, 1)) + " "
-                    if logLevel > 1:
-                        print("INFO: Initialising line " + self.name + " at " + str(newX) + "," + str(newY))
-                    self.currentPath.setAttribute("d", d)
-                    self.x = newX
-                    self.y = newY
-                    self.lastPanel = missionPanelId
-                    return
-                # Otherwise start the path using the previous x and y
-                else:
-                    d = "M " + str(round(self.x, 1)) + " " + str(round(self.y, 1)) + " "
-                    self.currentPath.setAttribute("d", d)
-            # Append this draw to the existing path (possibly including the one we just created)
-            if radius:  # If a radius is specified draw an arc
-                direction = 1
-                if radius < 0:  # The direction of the radius indicates the direction of the arc, CW or CCW
-                    radius = radius * -1  # Radius must be positive
-                    direction = 0  # 1 = CCW
-                d = self.currentPath.getAttribute("d")
-                d += "A" + str(round(radius, 1)) + " " + str(round(radius, 1)) + " 0 0 " + str(direction) + " " + str(
-                    round(newX, 1)) + " " + str(round(newY, 1)) + " "
-                self.currentPath.setAttribute("d", d)
-                if logLevel > 1:
-                    print("INFO: Line " + self.name + " drawn arc to " + str(newX) + "," + str(newY))
-            else:
-                d = self.currentPath.getAttribute("d")
-                d += "L " + str(round(newX, 1)) + " " + str(round(newY, 1)) + " "
-                self.currentPath.setAttribute("d", d)
-                if logLevel > 1:
-                    print("INFO: Line " + self.name + " drawn straight to " + str(newX) + "," + str(newY))
-            self.lastPanel = missionPanelId
-            self.x = newX
-            self.y = newY
-        else:
-            if logLevel > 0:
-                print("WARNING: Line " + self.name + " not drawn due to zero length")
-
 
 # craft object
+# A craft that isn't given a hue (one that isn't in the craft list) gets one made from its name, so it's the same
+# whichever process or render draws it.
 class craft(component):
-    def __init__(self, name, SVGLayer, width=14, hue=random.randint(0, 360)):
+    __slots__ = ("width", "hue")
+    cssClass = "craft"
+    groupClass = "craftGroup"
+
+    def __init__(self, name, SVGLayer, width=14, hue=None):
         self.width = width
+        if hue is None:
+            hue = zlib.crc32(name.encode("utf-8")) % 361
         self.hue = hue
-        self.cssClass = "craft"
-        self.groupClass = "craftGroup"
-        self.groupStyle = "stroke:hsl(" + str(self.hue) + ",50%,50%);stroke-width:" + str(self.width) + ";"
         component.__init__(self, name, SVGLayer)
 
     def styleString(self):
@@ -890,10 +1076,11 @@ class craft(component):
 
 # traveler object
 class traveler(component):
+    __slots__ = ()
+    cssClass = "traveler"
+    groupClass = "travelerGroup"
+
     def __init__(self, name, SVGLayer):
-        self.cssClass = "traveler"
-        self.groupClass = "travelerGroup"
-        self.groupStyle = ""
         component.__init__(self, name, SVGLayer)
 
     def styleString(self):
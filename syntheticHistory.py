@@ -0,0 +1,236 @@
+import heapq
+import random
+from datetime import datetime
+from xml.sax.saxutils import escape
+import eventSources as es
+import eventProcessor as ep
+
+####
+# Synthetic event histories, for finding out how the renderer copes with histories much bigger than the real one.
+# A history is made up by playing out a simple model of space flight, one thing happening at a time:
+# - A mission is launched (SUPPORTS its craft, JOINS its crew, DEPARTS Earth, ARRIVES orbit) whenever an orbit has fewer
+#   missions in it than its concurrency, so each orbit fills up to its concurrency and stays around it.
+# - Some of the missions in an orbit are stations, which stay up a lot longer than the rest. A visiting mission may
+#   rendezvous with a station in its orbit: its craft and crew transfer to the station (a SUPPORTS/JOINS batch) and
+#   back again some time later.
+# - A few visiting missions move on to another orbit (DEPARTS one orbit, ARRIVES another).
+# - Visiting missions come home (DEPARTS orbit, ARRIVES Earth), stations are ended where they are (ENDS).
+# Each thing happens on a day of its own, so the SUPPORTS/JOINS of two rendezvous never end up in the same transfer
+# batch, and every event is about craft, crew and missions that exist at the time. The same settings and seed always
+# give the same history.
+
+secPerDay = 86400
+
+
+# The default concurrency of each orbit: roughly one mission per 35 pixels of the orbit's height (Earth is left out, it
+# only ever holds missions on their way out).
+def defaultConcurrency():
+    return {o.name: max(1, o.height // 35) for o in ep.defaultOrbits() if o.name != "Earth"}
+
+
+# plannedMission class - the generator's record of a mission it has launched.
+class plannedMission:
+    def __init__(self, name, craftName, crew, orbitName, isStation):
+        self.name = name
+        self.craftName = craftName
+        self.crew = crew
+        self.orbitName = orbitName
+        self.isStation = isStation
+        self.host = None  # The station a visiting mission's craft and crew are with
+        self.visitors = 0  # The number of visiting missions with a station
+        self.ended = False
+
+
+# historyGenerator class - plays out the model above.
+# - eventCount: length of the history. Generation stops at the end of the first action that reaches it.
+# - concurrency: dict of orbit name to the number of missions to keep in it (default defaultConcurrency()).
+# - rendezvousDensity: the chance of a visiting mission in an orbit with a station rendezvousing with it.
+# - stationShare: the share of each orbit's missions that are stations.
+# - moveShare: the chance of a visiting mission moving on to another orbit.
+# - seed: for the random choices. startDate: date of the first event (ISO format).
+# records() generates the event records, craftRecords collects the (name, crewCapacity, hue) of the craft as they are
+# launched, so it holds the whole craft list once the records have all been generated.
+class historyGenerator:
+    def __init__(self, eventCount, concurrency=None, rendezvousDensity=0.5, stationShare=0.2, moveShare=0.05, seed=0,
+                 startDate="1960-01-01T00:00:00.000"):
+        self.eventCount = eventCount
+        if concurrency is None:
+            concurrency = defaultConcurrency()
+        self.concurrency = dict(concurrency)
+        self.rendezvousDensity = rendezvousDensity
+        self.stationShare = stationShare
+        self.moveShare = moveShare
+        self.seed = seed
+        self.startSeconds = es.dateToSeconds(datetime.fromisoformat(startDate))
+        self.craftRecords = []
+        # Missions stay up for long enough that the orbits fill to their concurrency with a launch every few days.
+        totalConcurrency = max(1, sum(self.concurrency.values()))
+        self.visitDays = (2 * totalConcurrency, 6 * totalConcurrency)
+        self.stationDays = (20 * totalConcurrency, 60 * totalConcurrency)
+
+    def records(self):
+        rng = random.Random(self.seed)
+        day = 0
+        missionCount = 0
+        travelerCount = 0
+        freeTravelers = []
+        missions = {name: [] for name in self.concurrency}
+        stations = {name: [] for name in self.concurrency}
+        stationLimits = {name: round(c * self.stationShare) for name, c in self.concurrency.items()}
+        due = []  # Heap of (day, sequence, action, mission) of the things planned to happen
+        sequence = 0
+        count = 0
+        self.craftRecords = []
+
+        while count < self.eventCount:
+            day += rng.randint(1, 3)
+            events = []
+            while not events:
+                # Whatever is due happens first, then launches to fill the orbits back up. With every orbit full, skip
+                # ahead to the next thing planned.
+                action = None
+                if due and due[0][0] <= day:
+                    _, _, action, m = heapq.heappop(due)
+                else:
+                    orbitNames = [o for o, c in self.concurrency.items() if len(missions[o]) < c]
+                    if orbitNames:
+                        weights = [self.concurrency[o] - len(missions[o]) for o in orbitNames]
+                        orbitName = rng.choices(orbitNames, weights)[0]
+                        action = "launch"
+                    elif due:
+                        day = max(day, due[0][0])
+                        _, _, action, m = heapq.heappop(due)
+                    else:
+                        return
+                plan = None
+                if action == "launch":
+                    missionCount += 1
+                    isStation = len(stations[orbitName]) < stationLimits[orbitName]
+                    if isStation:
+                        crewCapacity = rng.randint(3, 6)
+                        crewSize = rng.randint(0, 2)
+                    else:
+                        crewCapacity = rng.randint(1, 3)
+                        crewSize = rng.randint(0, crewCapacity)
+                    crew = []
+                    for _ in range(crewSize):
+                        if freeTravelers and rng.random() < 0.7:
+                            crew.append(freeTravelers.pop(rng.randrange(len(freeTravelers))))
+                        else:
+                            travelerCount += 1
+                            crew.append("Traveler_" + str(travelerCount))
+                    m = plannedMission("Mission_" + str(missionCount), "Craft_" + str(missionCount), crew, orbitName,
+                                       isStation)
+                    self.craftRecords.append((m.craftName, crewCapacity, rng.randint(0, 359)))
+                    events.append(("SUPPORTS", m.craftName, m.name))
+                    events.extend(("JOINS", t, m.name) for t in crew)
+                    events.append(("DEPARTS", m.name, "Earth"))
+                    events.append(("ARRIVES", m.name, orbitName))
+                    missions[orbitName].append(m)
+                    if isStation:
+                        stations[orbitName].append(m)
+                        plan = (rng.randint(*self.stationDays), "end")
+                    elif stations[orbitName] and rng.random() < self.rendezvousDensity:
+                        m.host = rng.choice(stations[orbitName])
+                        plan = (rng.randint(1, 3), "dock")
+                    elif rng.random() < self.moveShare:
+                        plan = (rng.randint(1, 5), "move")
+                    else:
+                        plan = (rng.randint(*self.visitDays), "land")
+
+                elif action == "dock":
+                    host = m.host
+                    if host.ended:
+                        m.host = None
+                        plan = (0, "land")
+                    else:
+                        events.append(("SUPPORTS", m.craftName, host.name))
+                        events.extend(("JOINS", t, host.name) for t in m.crew)
+                        host.visitors += 1
+                        plan = (rng.randint(*self.visitDays), "undock")
+
+                elif action == "undock":
+                    events.append(("SUPPORTS", m.craftName, m.name))
+                    events.extend(("JOINS", t, m.name) for t in m.crew)
+                    m.host.visitors -= 1
+                    m.host = None
+                    plan = (rng.randint(1, 3), "land")
+
+                elif action == "move":
+                    orbitNames = [o for o, c in self.concurrency.items()
+                                  if o != m.orbitName and len(missions[o]) < c]
+                    if orbitNames:
+                        orbitName = rng.choice(orbitNames)
+                        events.append(("DEPARTS", m.name, m.orbitName))
+                        events.append(("ARRIVES", m.name, orbitName))
+                        missions[m.orbitName].remove(m)
+                        missions[orbitName].append(m)
+                        m.orbitName = orbitName
+                        plan = (rng.randint(*self.visitDays), "land")
+                    else:
+                        plan = (0, "land")
+
+                elif action == "land":
+                    events.append(("DEPARTS", m.name, m.orbitName))
+                    events.append(("ARRIVES", m.name, "Earth"))
+                    missions[m.orbitName].remove(m)
+                    freeTravelers.extend(m.crew)
+
+                elif action == "end":
+                    # A station isn't ended while it has visitors, wait for them to go.
+                    if m.visitors > 0:
+                        plan = (rng.randint(5, 20), "end")
+                    else:
+                        events.append(("ENDS", m.name, None))
+                        missions[m.orbitName].remove(m)
+                        stations[m.orbitName].remove(m)
+                        freeTravelers.extend(m.crew)
+                        m.ended = True
+
+                if not(plan is None):
+                    sequence += 1
+                    heapq.heappush(due, (day + plan[0], sequence, plan[1], m))
+
+            seconds = self.startSeconds + day * secPerDay
+            for eventType, subject, obj in events:
+                yield seconds, eventType, subject, obj
+            count += len(events)
+
+
+# Write event records out as an xml event list, in the same layout as Data/eventList.xml.
+def writeXmlEvents(fileName, records):
+    with open(fileName, "w", encoding="utf-8") as outFile:
+        outFile.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n')
+        outFile.write('<spaceEventList xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n')
+        for seconds, eventType, subject, obj in records:
+            outFile.write("\t<spaceEvent>\n"
+                          "\t\t<date>" + es.secondsToDate(seconds).strftime("%Y-%m-%dT%H:%M:%S.000") + "</date>\n"
+                          "\t\t<subject>" + escape(subject) + "</subject>\n"
+                          "\t\t<eventType>" + eventType + "</eventType>\n")
+            if not(obj is None):
+                outFile.write("\t\t<object>" + escape(obj) + "</object>\n")
+            outFile.write("\t</spaceEvent>\n")
+        outFile.write("</spaceEventList>\n")
+
+
+# Write event records out as a tab-separated event list, like those in Notebooks/data.
+def writeTsvEvents(fileName, records):
+    with open(fileName, "w", encoding="utf-8") as outFile:
+        outFile.write("date\tsubject\teventType\tobject\n")
+        for seconds, eventType, subject, obj in records:
+            outFile.write(es.secondsToDate(seconds).strftime("%Y-%m-%dT%H:%M:%S.000") + "\t" + subject + "\t" +
+                          eventType + "\t" + ("" if obj is None else obj) + "\n")
+
+
+# Write a list of (name, crewCapacity, hue) out as an xml craft list, in the same layout as Data/craftList.xml.
+def writeXmlCraftList(fileName, craftRecords):
+    with open(fileName, "w", encoding="utf-8") as outFile:
+        outFile.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n')
+        outFile.write('<craftList xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n')
+        for name, crewCapacity, hue in craftRecords:
+            outFile.write("\t<craft>\n"
+                          "\t\t<name>" + escape(name) + "</name>\n"
+                          "\t\t<CrewCapacity>" + str(crewCapacity) + "</CrewCapacity>\n"
+                          "\t\t<Hue>" + str(hue) + "</Hue>\n"
+                          "\t</craft>\n")
+        outFile.write("</craftList>\n")